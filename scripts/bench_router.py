@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Microbenchmark: compiled keyword router vs the original per-keyword scan.
+
+Builds synthetic registries of increasing size, checks that both routers
+pick the same adapter for every query, then times them. The compiled router
+is timed with both of its matchers (substring table and Aho-Corasick
+automaton) so the AUTOMATON_MIN_PATTERNS crossover can be re-checked.
+
+Usage:
+    python scripts/bench_router.py [--queries 2000] [--seed 0]
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from locollm import router as router_module
+from locollm.router import KeywordRouter
+
+
+def naive_route(adapter_keywords, query):
+    """The original KeywordRouter.route: one substring scan per keyword."""
+    query_lower = query.lower()
+    best_adapter = None
+    best_score = 0
+    for adapter_name in sorted(adapter_keywords):
+        keywords = adapter_keywords[adapter_name]
+        score = sum(1 for kw in keywords if kw in query_lower)
+        if score > best_score:
+            best_score = score
+            best_adapter = adapter_name
+    return best_adapter
+
+
+def make_registry(rng, num_adapters, keywords_per_adapter):
+    """Random lowercase keywords; short ones so overlaps and shared prefixes occur."""
+    registry = {}
+    for a in range(num_adapters):
+        keywords = []
+        for _ in range(keywords_per_adapter):
+            words = rng.randint(1, 2)
+            keywords.append(
+                " ".join(
+                    "".join(rng.choices(string.ascii_lowercase[:12], k=rng.randint(3, 7)))
+                    for _ in range(words)
+                )
+            )
+        registry[f"adapter{a:02d}"] = keywords
+    return registry
+
+
+def make_queries(rng, registry, count, length=30):
+    """Queries mixing random words with keywords drawn from the registry."""
+    all_keywords = [kw for kws in registry.values() for kw in kws]
+    queries = []
+    for _ in range(count):
+        words = [
+            rng.choice(all_keywords).upper()
+            if rng.random() < 0.2
+            else "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+            for _ in range(length)
+        ]
+        queries.append(" ".join(words))
+    return queries
+
+
+def _time(fn):
+    return min(timeit.repeat(fn, number=1, repeat=3))
+
+
+def bench(num_adapters, keywords_per_adapter, num_queries, rng):
+    registry = make_registry(rng, num_adapters, keywords_per_adapter)
+    queries = make_queries(rng, registry, num_queries)
+    lowered = {name: [kw.lower() for kw in kws] for name, kws in registry.items()}
+
+    timings = {"naive": _time(lambda: [naive_route(lowered, q) for q in queries])}
+    mismatches = 0
+    default = KeywordRouter.from_keywords(registry)
+    for label, matcher_cls in [
+        ("substring", router_module._SubstringMatcher),
+        ("automaton", router_module._KeywordAutomaton),
+    ]:
+        router = KeywordRouter.from_keywords(registry)
+        router._matcher = matcher_cls(router._patterns)
+        mismatches += sum(1 for q in queries if router.route(q) != naive_route(lowered, q))
+        timings[label] = _time(lambda r=router: [r.route(q) for q in queries])
+
+    is_automaton = isinstance(default._matcher, router_module._KeywordAutomaton)
+    chosen = "automaton" if is_automaton else "substring"
+    per_query = 1e6 / num_queries
+    print(
+        f"{num_adapters:>4} adapters x {keywords_per_adapter:>3} kw | "
+        + " | ".join(f"{k} {v * per_query:7.1f} us" for k, v in timings.items())
+        + f" | default={chosen} speedup {timings['naive'] / timings[chosen]:4.1f}x"
+        + f" | mismatches {mismatches}"
+    )
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for num_adapters, keywords in [(3, 12), (12, 20), (36, 30), (100, 50)]:
+        failures += bench(num_adapters, keywords, args.queries, rng)
+    if failures:
+        raise SystemExit(f"Parity check failed on {failures} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Startup benchmark: wall time and import cost of `loco` subcommands.
+
+Runs each subcommand in a fresh interpreter with -X importtime and reports
+the median wall time, the time spent importing on top of a bare
+`python -c pass` (which pays for site and friends), and the slowest imports.
+Offline commands must never import the HTTP stack (requests, urllib3); that
+check always applies. Each command also has a budget for its own import
+time in milliseconds, scaled by --budget-scale for slower machines; the
+script exits non-zero when a check or budget fails.
+
+Usage:
+    python scripts/bench_startup.py [--runs 5] [--top 5] [--budget-scale 1.0]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# name -> (argv, offline, import budget in ms above the bare interpreter)
+COMMANDS = {
+    "--version": (["--version"], True, 40),
+    "--help": (["--help"], True, 15),
+    "route": (["route", "solve 2 + 2"], True, 60),
+    "adapters list": (["adapters", "list"], True, 30),
+    "rescore --help": (["rescore", "--help"], True, 15),
+    "query --help": (["query", "--help"], False, 15),
+}
+
+# Packages offline commands must not import
+NETWORK_MODULES = ("requests", "urllib3")
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(args):
+    """Run the interpreter once with -X importtime. Returns (wall seconds, importtime rows)."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode not in (0, 1):
+        raise SystemExit(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    return wall, parse_importtime(proc.stderr)
+
+
+def _import_ms(rows):
+    return sum(self_us for _, self_us, _ in rows) / 1000
+
+
+def baseline(runs):
+    """Median wall and import time (ms), and the modules, of an interpreter that runs nothing."""
+    samples = [run_once(["-c", "pass"]) for _ in range(runs)]
+    return (
+        statistics.median(wall for wall, _ in samples) * 1000,
+        statistics.median(_import_ms(rows) for _, rows in samples),
+        {module for _, rows in samples for module, _, _ in rows},
+    )
+
+
+def bench(name, argv, offline, budget_ms, runs, top, base):
+    walls = []
+    import_ms = []
+    rows = []
+    for _ in range(runs):
+        wall, rows = run_once(["-m", "locollm.cli", *argv])
+        walls.append(wall * 1000 - base[0])
+        import_ms.append(_import_ms(rows) - base[1])
+    median_import = statistics.median(import_ms)
+
+    failures = []
+    network = sorted({m for m, _, _ in rows if m.split(".")[0] in NETWORK_MODULES})
+    if offline and network:
+        failures.append(f"imports {', '.join(network[:3])}")
+    if median_import > budget_ms:
+        failures.append(f"imports take {median_import:.1f}ms > budget {budget_ms:.0f}ms")
+
+    status = "FAIL: " + "; ".join(failures) if failures else "ok"
+    print(
+        f"{name:<22} wall +{statistics.median(walls):5.1f}ms | "
+        f"imports +{median_import:5.1f}ms (budget {budget_ms:.0f}) | {status}"
+    )
+    # Slowest imports of the last run the bare interpreter doesn't make, by own time
+    own = [row for row in rows if row[0] not in base[2]]
+    for module, self_us, cumulative_us in sorted(own, key=lambda r: -r[1])[:top]:
+        print(f"    {self_us / 1000:6.2f}ms self {cumulative_us / 1000:7.2f}ms cum  {module}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list per command")
+    parser.add_argument(
+        "--budget-scale", type=float, default=1.0, help="Multiply every import budget by this"
+    )
+    parser.add_argument("commands", nargs="*", help="Subset of commands to run (default: all)")
+    args = parser.parse_args()
+
+    base = baseline(args.runs)
+    print(f"{'python -c pass':<22} wall {base[0]:6.1f}ms | imports {base[1]:5.1f}ms")
+    failed = []
+    for name, (argv, offline, budget_ms) in COMMANDS.items():
+        if args.commands and name not in args.commands:
+            continue
+        budget_ms *= args.budget_scale
+        if not bench(name, argv, offline, budget_ms, args.runs, args.top, base):
+            failed.append(name)
+    if failed:
+        raise SystemExit(f"Startup regression in: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
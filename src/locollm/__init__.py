@@ -1,5 +1,12 @@
 """LocoLLM: Local Collaborative LLMs for Resource-Constrained AI Access."""
 
-from importlib.metadata import version
 
-__version__ = version("locollm")
+def __getattr__(name):
+    # __version__ is looked up on first use: importing importlib.metadata
+    # costs more than the rest of a `loco route` startup
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value = globals()["__version__"] = version("locollm")
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
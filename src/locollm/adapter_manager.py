@@ -1,10 +1,18 @@
-"""Adapter manager: loads registry, creates Modelfiles, manages adapters in Ollama."""
+"""Adapter manager: loads registry, creates Modelfiles, manages adapters in Ollama.
 
-from pathlib import Path
-
-import yaml
+Reading the registry needs neither the HTTP stack nor, once parsed, YAML:
+ollama_client and yaml are imported only by the functions that use them, so
+offline commands such as `loco route` start quickly. A validated, compiled
+copy of registry.yaml is kept next to it (registry.snapshot.json) and used
+instead of the YAML for as long as the YAML's SHA-256 still matches.
+"""
 
-from locollm import ollama_client
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from types import MappingProxyType
 
 # Locate the adapters directory relative to the project root.
 # Walk up from this file: src/locollm/adapter_manager.py -> project root
@@ -15,11 +23,230 @@ REGISTRY_PATH = ADAPTERS_DIR / "registry.yaml"
 # Prefix used for Ollama model names created from adapters
 ADAPTER_MODEL_PREFIX = "locollm-"
 
+# Adapter types _build_modelfile() knows how to turn into a Modelfile
+ADAPTER_TYPES = ("system-prompt", "merged-gguf")
+
+# Bump when the layout of the compiled snapshot changes
+SNAPSHOT_FORMAT = 1
+
+
+# (path, mtime_ns, size) of the registry file, its frozen contents and the
+# frozen compiled tables (router_keywords, gguf_paths)
+_registry_cache = None
+_registry_lock = threading.Lock()
+
+
+def _freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Return a mutable deep copy (dicts and lists) of a frozen registry value."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def _parse_registry(f):
+    """Parse registry YAML, with libyaml's C loader when PyYAML was built with it."""
+    import yaml
+
+    return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def snapshot_path(registry_path=None):
+    """Return where the compiled snapshot of a registry file lives."""
+    path = Path(registry_path or REGISTRY_PATH)
+    return path.with_name(f"{path.stem}.snapshot.json")
+
+
+def _validate(registry, path):
+    """Raise ValueError listing every structural problem in a parsed registry."""
+    if not isinstance(registry, dict):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    problems = []
+    for block in ("base_model", "residency", "options", "eval_options", "adapters"):
+        if registry.get(block) is not None and not isinstance(registry[block], dict):
+            problems.append(f"{block} must be a mapping")
+    base = registry.get("base_model")
+    if isinstance(base, dict) and not isinstance(base.get("ollama_name"), str):
+        problems.append("base_model.ollama_name must be a string")
+    adapters = registry.get("adapters")
+    for name, config in (adapters if isinstance(adapters, dict) else {}).items():
+        if not isinstance(config, dict):
+            problems.append(f"adapters.{name} must be a mapping")
+            continue
+        if config.get("type", "system-prompt") not in ADAPTER_TYPES:
+            problems.append(f"adapters.{name}.type must be one of {', '.join(ADAPTER_TYPES)}")
+        keywords = config.get("router_keywords")
+        if keywords is not None and (
+            not isinstance(keywords, list) or not all(isinstance(kw, str) for kw in keywords)
+        ):
+            problems.append(f"adapters.{name}.router_keywords must be a list of strings")
+        if config.get("gguf_path") is not None and not isinstance(config["gguf_path"], str):
+            problems.append(f"adapters.{name}.gguf_path must be a string")
+    if problems:
+        raise ValueError(f"{path}: invalid registry: " + "; ".join(problems))
+
+
+def _compile_keywords(registry):
+    """Return {adapter: [lowercased keyword, ...]} for adapters with router keywords."""
+    return {
+        name: [kw.lower() for kw in keywords]
+        for name, config in (registry.get("adapters") or {}).items()
+        if (keywords := config.get("router_keywords"))
+    }
+
+
+def _compile(registry, path):
+    """Return the tables derived from a validated registry, as plain JSON data."""
+    adapters_dir = Path(path).parent
+    return {
+        "router_keywords": _compile_keywords(registry),
+        "gguf_paths": {
+            name: str(adapters_dir / config["gguf_path"])
+            for name, config in (registry.get("adapters") or {}).items()
+            if config.get("gguf_path")
+        },
+    }
+
+
+def _read_snapshot(path, digest):
+    """Return (registry, compiled) from the snapshot if it matches digest, else None."""
+    try:
+        with open(snapshot_path(path)) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format") != SNAPSHOT_FORMAT
+        or snapshot.get("source") != str(path)
+        or snapshot.get("sha256") != digest
+    ):
+        return None
+    return snapshot["registry"], snapshot["compiled"]
+
+
+def _write_snapshot(path, digest, registry, compiled):
+    """Write the compiled snapshot atomically; a registry JSON can't represent is skipped."""
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "source": str(path),
+        "sha256": digest,
+        "registry": registry,
+        "compiled": compiled,
+    }
+    try:
+        text = json.dumps(snapshot)
+    except (TypeError, ValueError):
+        return
+    # YAML dates, non-string keys and the like would not survive the round trip
+    if json.loads(text)["registry"] != registry:
+        return
+    target = snapshot_path(path)
+    tmp = target.with_suffix(f".tmp{os.getpid()}")
+    try:
+        tmp.write_text(text)
+        os.replace(tmp, target)
+    except OSError:
+        # A read-only checkout still works, it just parses the YAML every time
+        tmp.unlink(missing_ok=True)
+
+
+def _load(path):
+    """Return (registry, compiled) for a registry file, via its snapshot when current."""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    loaded = _read_snapshot(path, digest)
+    if loaded is not None:
+        return loaded
+    registry = _parse_registry(data)
+    _validate(registry, path)
+    compiled = _compile(registry, path)
+    _write_snapshot(path, digest, registry, compiled)
+    return registry, compiled
+
 
 def load_registry():
-    """Parse adapters/registry.yaml and return the full config dict."""
-    with open(REGISTRY_PATH) as f:
-        return yaml.safe_load(f)
+    """Return adapters/registry.yaml as a read-only mapping.
+
+    The registry is loaded once per process and cached; the cache is keyed by
+    the file's path, mtime and size, so edits to the registry are picked up
+    on the next call. Loading reads the compiled snapshot when its hash
+    matches the YAML, and otherwise parses and validates the YAML (raising
+    ValueError for a malformed registry) and rewrites the snapshot. Nested
+    dicts are read-only mappings and lists are tuples; use thaw() for a
+    mutable copy.
+    """
+    return _load_cached()[1]
+
+
+def _load_cached():
+    """Return the (key, registry, compiled) cache entry for REGISTRY_PATH, loading if stale."""
+    global _registry_cache
+    path = REGISTRY_PATH
+    st = os.stat(path)
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    cached = _registry_cache
+    if cached is not None and cached[0] == key:
+        return cached
+    with _registry_lock:
+        cached = _registry_cache
+        if cached is not None and cached[0] == key:
+            return cached
+        registry, compiled = _load(path)
+        _registry_cache = (key, _freeze(registry), _freeze(compiled))
+        return _registry_cache
+
+
+def reload_registry():
+    """Discard the cached registry and load registry.yaml again."""
+    global _registry_cache
+    with _registry_lock:
+        _registry_cache = None
+    return load_registry()
+
+
+def router_keywords(registry=None):
+    """Return {adapter: (lowercased keyword, ...)} for adapters with router keywords.
+
+    For the cached registry (the default) this is the precompiled table from
+    the snapshot; any other registry mapping is normalised on the fly.
+    """
+    if registry is None:
+        registry = load_registry()
+    cached = _registry_cache
+    if cached is not None and cached[1] is registry:
+        return cached[2]["router_keywords"]
+    return _compile_keywords(registry)
+
+
+def gguf_path(adapter_name, registry=None):
+    """Return the resolved GGUF path of an adapter, or None if it has none.
+
+    This is the one resolver for the file that is both hashed and loaded
+    into Ollama. For the cached registry (the default) it is the
+    precompiled path from the snapshot; any other registry mapping is
+    resolved against ADAPTERS_DIR.
+    """
+    if registry is None:
+        registry = load_registry()
+    cached = _registry_cache
+    if cached is not None and cached[1] is registry:
+        path = cached[2]["gguf_paths"].get(adapter_name)
+    else:
+        path = ((registry.get("adapters") or {}).get(adapter_name) or {}).get("gguf_path")
+        path = path and ADAPTERS_DIR / path
+    return Path(path) if path else None
 
 
 def get_base_model_name():
@@ -46,12 +273,13 @@ def list_adapters():
     return list(adapters.items())
 
 
-def _build_modelfile(adapter_config, registry):
+def _build_modelfile(adapter_name, adapter_config, registry):
     """Build a Modelfile string from an adapter config.
 
     Supports two adapter types:
     - system-prompt: layers a system prompt on the base model (MVP placeholder)
-    - merged-gguf: uses a standalone GGUF with LoRA weights merged in
+    - merged-gguf: uses a standalone GGUF with LoRA weights merged in, found
+      with gguf_path(adapter_name, registry)
     """
     adapter_type = adapter_config.get("type", "system-prompt")
 
@@ -60,11 +288,9 @@ def _build_modelfile(adapter_config, registry):
         system_prompt = adapter_config.get("system_prompt", "")
         return f'FROM {base_model}\nSYSTEM """{system_prompt}"""'
     elif adapter_type == "merged-gguf":
-        gguf_path = adapter_config.get("gguf_path")
-        if not gguf_path:
+        full_path = gguf_path(adapter_name, registry)
+        if full_path is None:
             raise ValueError("merged-gguf adapter requires 'gguf_path' in config")
-        # Resolve relative to adapters directory
-        full_path = ADAPTERS_DIR / gguf_path
         if not full_path.exists():
             raise FileNotFoundError(f"GGUF file not found: {full_path}")
         return f"FROM {full_path}"
@@ -77,30 +303,139 @@ def adapter_model_name(adapter_name):
     return f"{ADAPTER_MODEL_PREFIX}{adapter_name}"
 
 
-def ensure_adapter_model(adapter_name):
-    """Create the Ollama model for an adapter if it doesn't already exist.
+def _model_config(registry, model):
+    """Return the base_model or adapter config for an Ollama model name ({} if neither)."""
+    name = model.removesuffix(":latest")
+    base = registry.get("base_model") or {}
+    if name == base.get("ollama_name"):
+        return base
+    if name.startswith(ADAPTER_MODEL_PREFIX):
+        adapters = registry.get("adapters") or {}
+        return adapters.get(name[len(ADAPTER_MODEL_PREFIX) :]) or {}
+    return {}
+
+
+def residency_policy(model):
+    """Return the registry's residency policy for an Ollama model name.
 
-    Returns the Ollama model name.
+    Returns {"keep_alive": ..., "preload": bool}. A `residency` block under
+    base_model or an adapter overrides the top-level `residency` defaults.
+    keep_alive is an Ollama duration ("30m", 3600, -1 for forever) or None
+    for Ollama's own default; `pin: true` means keep_alive -1 and preload.
     """
+    registry = load_registry()
+    config = _model_config(registry, model)
+    policy = {**(registry.get("residency") or {}), **(config.get("residency") or {})}
+    pinned = bool(policy.get("pin"))
+    return {
+        "keep_alive": -1 if pinned else policy.get("keep_alive"),
+        "preload": pinned or bool(policy.get("preload")),
+    }
+
+
+def keep_alive_for(model):
+    """Return the keep_alive to send with requests for model, or None."""
+    return residency_policy(model)["keep_alive"]
+
+
+def inference_options(model):
+    """Return the registry's Ollama `options` for requests to a model.
+
+    The top-level `options` block is overlaid by an `options` block under
+    base_model or the model's adapter. Returns a new, mutable dict.
+    """
+    registry = load_registry()
+    config = _model_config(registry, model)
+    return {**(registry.get("options") or {}), **(config.get("options") or {})}
+
+
+def eval_options():
+    """Return the registry's `eval_options`, applied on top for `loco eval` runs."""
+    return dict(load_registry().get("eval_options") or {})
+
+
+def preload_models():
+    """Return the Ollama model names whose residency policy asks for preloading."""
+    names = [get_base_model_name()]
+    names += [adapter_model_name(name) for name, _ in list_adapters()]
+    return [name for name in names if residency_policy(name)["preload"]]
+
+
+def _report(on_progress, status):
+    """Print a status line, or pass it to on_progress as an Ollama-style status dict."""
+    if on_progress is None:
+        print(status)
+    else:
+        on_progress({"status": status})
+
+
+def sync_adapter_model(adapter_name, models=None, on_progress=None, hashes=None):
+    """Create or refresh the Ollama model for an adapter. Returns what was done.
+
+    models is a snapshot of Ollama's /api/tags records (default: fetched
+    now). A merged-gguf adapter's GGUF is hashed (through the HashCache
+    `hashes`, so an unchanged file is not re-read) and compared with the
+    weights the installed model was built from: the hash recorded at the
+    last sync while Ollama's model digest is unchanged, else the blob digest
+    Ollama reports. Returns "unchanged", "created" or "updated"; other
+    adapter types are only created when missing. Status lines are printed,
+    or passed to on_progress as status dicts.
+    """
+    from locollm import ollama_client
+    from locollm.gguf_hashes import HashCache
+
     config = get_adapter(adapter_name)
     if config is None:
         raise ValueError(f"Adapter '{adapter_name}' not found in registry")
 
     model_name = adapter_model_name(adapter_name)
+    if models is None:
+        models = ollama_client.list_model_details()
+    digest = ollama_client.find_digest(models, model_name)
 
-    # Check if it already exists
-    installed = ollama_client.list_models()
-    # Ollama model names may include :latest suffix
-    installed_base = {m.split(":")[0] for m in installed}
-    if model_name in installed_base:
-        print(f"Adapter model '{model_name}' already exists.")
-        return model_name
+    weights = None
+    path = gguf_path(adapter_name) if config.get("type") == "merged-gguf" else None
+    if path is not None and path.exists():
+        hashes = hashes if hashes is not None else HashCache()
+        weights = hashes.sha256(path)
 
-    registry = load_registry()
-    modelfile = _build_modelfile(config, registry)
-    print(f"Creating adapter model '{model_name}'...")
-    ollama_client.create_model(model_name, modelfile)
-    return model_name
+    changed = False
+    if digest is not None:
+        if weights is None:
+            # No GGUF to compare against: keep what is installed
+            _report(on_progress, f"Adapter model '{model_name}' already exists.")
+            return "unchanged"
+        synced = hashes.synced(model_name)
+        if synced is not None and synced["digest"] == digest:
+            installed = synced["sha256"]
+        else:
+            installed = ollama_client.weights_digest(model_name)
+        if installed == weights:
+            if synced != {"sha256": weights, "digest": digest}:
+                hashes.record_sync(model_name, weights, digest)
+            _report(on_progress, f"Adapter model '{model_name}' is up to date.")
+            return "unchanged"
+        changed = True
+
+    # Raises FileNotFoundError for a merged-gguf adapter whose GGUF is missing
+    modelfile = _build_modelfile(adapter_name, config, load_registry())
+    if changed:
+        _report(on_progress, f"GGUF for '{model_name}' changed, recreating...")
+    else:
+        _report(on_progress, f"Creating adapter model '{model_name}'...")
+    ollama_client.create_model(model_name, modelfile, on_progress=on_progress)
+    if weights is not None:
+        hashes.record_sync(model_name, weights, ollama_client.model_digest(model_name))
+    return "updated" if changed else "created"
+
+
+def ensure_adapter_model(adapter_name, models=None, on_progress=None, hashes=None):
+    """Create the Ollama model for an adapter if it is missing or its GGUF changed.
+
+    See sync_adapter_model() for the arguments. Returns the Ollama model name.
+    """
+    sync_adapter_model(adapter_name, models=models, on_progress=on_progress, hashes=hashes)
+    return adapter_model_name(adapter_name)
 
 
 def get_eval_dataset_path(adapter_name):
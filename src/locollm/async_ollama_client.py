@@ -0,0 +1,453 @@
+"""Asyncio client for the Ollama REST API.
+
+Mirrors the surface of :mod:`locollm.ollama_client` but lets many requests
+overlap on one event loop without a thread per request. It speaks HTTP/1.1
+directly over ``asyncio`` streams, keeping a small pool of keep-alive
+connections per client.
+
+Streaming calls return async generators. Cancelling the consuming task, or
+closing the generator early (``contextlib.aclosing`` makes that automatic on
+``break``), aborts the request and drops its connection::
+
+    async with AsyncOllamaClient() as client:
+        async with aclosing(client.chat(model, messages)) as stream:
+            async for text, meta in stream:
+                ...
+
+A client is bound to the event loop it is first used on.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import ssl
+from urllib.parse import urlsplit
+
+from locollm import ollama_client
+from locollm.ollama_client import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUTS, ConnectionStats
+from locollm.timing import StreamTimer
+
+
+class OllamaHTTPError(Exception):
+    """Raised when Ollama answers with an HTTP error status."""
+
+    def __init__(self, status, reason, body=""):
+        super().__init__(f"{status} {reason}: {body}".rstrip(": "))
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+class OllamaConnectError(ConnectionError):
+    """Raised when a connection to Ollama cannot be opened (refused, unreachable, timed out)."""
+
+
+class _Connection:
+    """One HTTP/1.1 connection to the server."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class _Response:
+    """An in-flight response; returns its connection to the pool when done."""
+
+    def __init__(self, client, conn, status, reason, headers, timeout):
+        self._client = client
+        self._conn = conn
+        self._timeout = timeout
+        self._released = False
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._reusable = headers.get("connection", "").lower() != "close"
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self._timeout)
+
+    async def iter_raw(self):
+        """Yield the body as raw byte blocks, then release the connection."""
+        reader = self._conn.reader
+        try:
+            if "chunked" in self.headers.get("transfer-encoding", "").lower():
+                while True:
+                    size_line = await self._read(reader.readline())
+                    if not size_line:
+                        raise ConnectionError("connection closed mid-response")
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                    if size == 0:
+                        # Consume optional trailers up to the blank line
+                        while (await self._read(reader.readline())).strip():
+                            pass
+                        break
+                    yield await self._read(reader.readexactly(size))
+                    await self._read(reader.readexactly(2))
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining:
+                    block = await self._read(reader.read(min(remaining, 65536)))
+                    if not block:
+                        raise ConnectionError("connection closed mid-response")
+                    remaining -= len(block)
+                    yield block
+            else:
+                self._reusable = False
+                while block := await self._read(reader.read(65536)):
+                    yield block
+        except BaseException:
+            self.abort()
+            raise
+        self.release()
+
+    async def iter_lines(self):
+        """Yield non-empty NDJSON lines from the body."""
+        buffer = b""
+        async for block in self.iter_raw():
+            buffer += block
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+
+    async def read(self):
+        return b"".join([block async for block in self.iter_raw()])
+
+    async def json(self):
+        return json.loads(await self.read())
+
+    async def raise_for_status(self):
+        if self.status >= 400:
+            body = (await self.read()).decode(errors="replace")
+            raise OllamaHTTPError(self.status, self.reason, body)
+
+    def release(self):
+        """Hand the connection back to the pool for reuse."""
+        if not self._released:
+            self._released = True
+            self._client._release(self._conn, reusable=self._reusable)
+
+    def abort(self):
+        """Drop the connection without reading the rest of the body."""
+        if not self._released:
+            self._released = True
+            self._client._release(self._conn, reusable=False)
+
+
+class AsyncOllamaClient:
+    """Asyncio Ollama client with a bounded keep-alive connection pool.
+
+    base_url defaults to the host set by LOCOLLM_OLLAMA_HOSTS, which must
+    then name just one; default_client() builds a pool for several.
+    max_connections caps concurrent requests (extra callers wait for a free
+    connection); timeouts overrides entries in DEFAULT_TIMEOUTS by endpoint.
+    keep_alive(model) and options(model) give the keep_alive and default
+    inference options sent with model requests, as for the sync client.
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        max_connections=DEFAULT_POOL_SIZE,
+        timeouts=None,
+        keep_alive=ollama_client.registry_keep_alive,
+        options=ollama_client.registry_options,
+    ):
+        self.base_url = (base_url or ollama_client.single_host_url()).rstrip("/")
+        self.keep_alive = keep_alive
+        self.options = options
+        parts = urlsplit(self.base_url)
+        self._host = parts.hostname or "localhost"
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self._port = parts.port or (443 if self._ssl else 80)
+        self._prefix = parts.path
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.stats = ConnectionStats()
+        self._max_connections = max_connections
+        self._slots = None
+        self._idle = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Close all idle pooled connections."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        for conn in idle:
+            with contextlib.suppress(OSError):
+                await conn.writer.wait_closed()
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    async def _connect(self, timeout):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port, ssl=self._ssl), timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise OllamaConnectError(f"cannot connect to {self.base_url}: {e!r}") from e
+        self.stats.record_new_connection()
+        return _Connection(reader, writer)
+
+    def _release(self, conn, reusable):
+        if reusable and not conn.reader.at_eof():
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    async def _send(self, conn, method, path, payload, timeout):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (
+            f"{method} {self._prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self._host}:{self._port}\r\n"
+            "Connection: keep-alive\r\n"
+            "Accept: application/json, application/x-ndjson\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        conn.writer.write(head.encode() + body)
+        await asyncio.wait_for(conn.writer.drain(), timeout)
+
+        status_line = await asyncio.wait_for(conn.reader.readline(), timeout)
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        _, status, *reason = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(conn.reader.readline(), timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return int(status), (reason[0] if reason else ""), headers
+
+    async def _request(self, method, path, endpoint, payload=None):
+        """Send a request and return a _Response holding a pooled connection."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_connections)
+        timeout = self.timeouts[endpoint]
+        await self._slots.acquire()
+        try:
+            self.stats.record_request()
+            while self._idle:
+                conn = self._idle.pop()
+                try:
+                    status, reason, headers = await self._send(
+                        conn, method, path, payload, timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Server dropped an idle keep-alive connection; try another
+                    conn.close()
+                    continue
+                except BaseException:
+                    conn.close()
+                    raise
+                return _Response(self, conn, status, reason, headers, timeout)
+
+            conn = await self._connect(timeout)
+            try:
+                status, reason, headers = await self._send(conn, method, path, payload, timeout)
+            except BaseException:
+                conn.close()
+                raise
+            return _Response(self, conn, status, reason, headers, timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _request_json(self, method, path, endpoint, payload=None):
+        resp = await self._request(method, path, endpoint, payload)
+        await resp.raise_for_status()
+        return await resp.json()
+
+    async def _request_lines(self, method, path, endpoint, payload):
+        """Yield decoded NDJSON objects from a streaming endpoint."""
+        resp = await self._request(method, path, endpoint, payload)
+        try:
+            await resp.raise_for_status()
+            async for line in resp.iter_lines():
+                yield json.loads(line)
+        finally:
+            # Reached early when the consumer closes or cancels mid-stream
+            resp.abort()
+
+    # ------------------------------------------------------------------
+    # API surface
+    # ------------------------------------------------------------------
+
+    async def check_running(self):
+        """Return True if the Ollama server is reachable."""
+        try:
+            resp = await self._request("GET", "/", "health")
+            await resp.read()
+            return resp.status == 200
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    async def list_model_details(self):
+        """Return the /api/tags records (name, digest, size, ...) for installed models."""
+        data = await self._request_json("GET", "/api/tags", "tags")
+        return data.get("models", [])
+
+    async def list_models(self):
+        """Return a list of locally-installed model names."""
+        return [m["name"] for m in await self.list_model_details()]
+
+    async def model_digest(self, name):
+        """Return the digest of an installed model, or None if it is not installed."""
+        return ollama_client.find_digest(await self.list_model_details(), name)
+
+    async def running_models(self):
+        """Return the names of the models currently loaded in memory."""
+        data = await self._request_json("GET", "/api/ps", "ps")
+        return [m["name"] for m in data.get("models", [])]
+
+    async def pull_model(self, name, on_progress=None):
+        """Pull a model. on_progress, if given, receives each status dict."""
+        async for data in self._request_lines("POST", "/api/pull", "pull", {"name": name}):
+            if on_progress is not None:
+                on_progress(data)
+
+    def _model_payload(self, model, options=None, **fields):
+        payload = {"model": model, **fields}
+        keep_alive = self.keep_alive(model) if self.keep_alive else None
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        merged = {**(self.options(model) if self.options else {}), **(options or {})}
+        if merged:
+            payload["options"] = merged
+        return payload
+
+    def generate(self, model, prompt, stream=True, with_meta=False, options=None):
+        """Generate a response.
+
+        Returns an async iterator of text chunks if stream=True, else a
+        coroutine resolving to the full text. With with_meta=True the
+        iterator yields (text, meta) tuples as chat() does, and the
+        coroutine resolves to (text, meta). options overrides inference
+        options for this request.
+        """
+        payload = self._model_payload(model, options, prompt=prompt, stream=stream)
+        if not stream:
+            return self._generate_text(payload, with_meta)
+        if with_meta:
+            return self._stream_generate_meta(payload)
+        return self._stream_chunks(payload)
+
+    async def _generate_text(self, payload, with_meta):
+        data = await self._request_json("POST", "/api/generate", "generate", payload)
+        text = data.get("response", "")
+        return (text, ollama_client._extract_chat_meta(data)) if with_meta else text
+
+    async def generate_with_meta(self, model, prompt, options=None):
+        """Generate a full response. Returns (text, meta).
+
+        The response is streamed so meta includes client-side TTFT and
+        chunk gaps as well as the server's counters.
+        """
+        parts = []
+        meta = None
+        chunks = self.generate(model, prompt, with_meta=True, options=options)
+        async with contextlib.aclosing(chunks) as stream:
+            async for chunk, chunk_meta in stream:
+                parts.append(chunk)
+                if chunk_meta is not None:
+                    meta = chunk_meta
+        return "".join(parts), meta
+
+    async def load_model(self, model, keep_alive=None):
+        """Load a model into memory. Returns Ollama's load_duration in nanoseconds."""
+        payload = self._model_payload(model, prompt="", stream=False)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        data = await self._request_json("POST", "/api/generate", "generate", payload)
+        return data.get("load_duration", 0)
+
+    async def _stream_chunks(self, payload):
+        async for data in self._request_lines("POST", "/api/generate", "generate", payload):
+            chunk = data.get("response", "")
+            if chunk:
+                yield chunk
+
+    async def _stream_generate_meta(self, payload):
+        timer = StreamTimer()
+        async for data in self._request_lines("POST", "/api/generate", "generate", payload):
+            chunk = data.get("response", "")
+            if chunk:
+                timer.chunk()
+            if data.get("done"):
+                yield (chunk, ollama_client._extract_chat_meta(data, timer))
+            elif chunk:
+                yield (chunk, None)
+
+    def chat(self, model, messages, stream=True, options=None):
+        """Send a chat request.
+
+        Returns an async iterator of (text, meta) tuples if stream=True, where
+        meta is None except on the final chunk; otherwise a coroutine
+        resolving to a one-item list, as with the sync client.
+        """
+        payload = self._model_payload(model, options, messages=messages, stream=stream)
+        if not stream:
+            return self._chat_complete(payload)
+        return self._stream_chat_chunks(payload)
+
+    async def _chat_complete(self, payload):
+        data = await self._request_json("POST", "/api/chat", "chat", payload)
+        text = data.get("message", {}).get("content", "")
+        return [(text, ollama_client._extract_chat_meta(data))]
+
+    async def _stream_chat_chunks(self, payload):
+        timer = StreamTimer()
+        async for data in self._request_lines("POST", "/api/chat", "chat", payload):
+            chunk = data.get("message", {}).get("content", "")
+            if chunk:
+                timer.chunk()
+            if data.get("done"):
+                yield (chunk, ollama_client._extract_chat_meta(data, timer))
+            elif chunk:
+                yield (chunk, None)
+
+    async def create_model(self, name, modelfile, on_progress=None):
+        """Create a model from a Modelfile string.
+
+        on_progress, if given, receives each status dict.
+        """
+        payload = {"name": name, "modelfile": modelfile}
+        async for data in self._request_lines("POST", "/api/create", "create", payload):
+            if on_progress is not None:
+                on_progress(data)
+
+    async def delete_model(self, name):
+        """Delete a model from Ollama."""
+        resp = await self._request("DELETE", "/api/delete", "delete", {"name": name})
+        await resp.raise_for_status()
+        await resp.read()
+
+
+def default_client(max_connections=DEFAULT_POOL_SIZE):
+    """Return an async client for the hosts LOCOLLM_OLLAMA_HOSTS names.
+
+    That is an AsyncOllamaClient for one host (or none set), or an
+    AsyncBackendPool spreading requests across several.
+    """
+    from locollm.backend_pool import AsyncBackendPool, parse_hosts
+
+    urls = parse_hosts(os.environ.get(ollama_client.HOSTS_ENV))
+    if len(urls) > 1:
+        return AsyncBackendPool(urls, max_connections=max_connections)
+    return AsyncOllamaClient(urls[0] if urls else None, max_connections=max_connections)
@@ -0,0 +1,545 @@
+"""Pool of Ollama backends, e.g. one Ollama instance per GPU.
+
+A BackendPool stands in for a single OllamaClient. Each request for a model
+goes to the least-loaded healthy backend that already has that model
+resident (per its /api/ps listing), falling back to the least-loaded healthy
+backend overall. Backends are health-checked every health_interval seconds;
+one that cannot be connected to is marked down and the request fails over to
+the next candidate. A request that times out waiting for a reply is not
+retried elsewhere: the backend is up, just slow, and re-running the
+generation would only double the work. Model management (pull, create,
+delete) is applied to every healthy backend so they all hold the same models.
+
+AsyncBackendPool does the same for the asyncio client, so concurrent eval
+and batch queries spread across the backends too.
+
+Set LOCOLLM_OLLAMA_HOSTS to a comma-separated list of URLs to make the
+shared default clients pools.
+"""
+
+import asyncio
+import threading
+import time
+
+import requests
+
+from locollm.async_ollama_client import AsyncOllamaClient, OllamaConnectError, OllamaHTTPError
+from locollm.ollama_client import DEFAULT_POOL_SIZE, OllamaClient
+
+# Seconds between health / residency checks of every backend
+DEFAULT_HEALTH_INTERVAL = 10.0
+
+# Failures that mean "this backend is unreachable", as opposed to a bad request
+# or a slow reply. ConnectTimeout is a ConnectionError; ReadTimeout is not.
+_BACKEND_ERRORS = (requests.ConnectionError,)
+
+# The asyncio client raises OllamaConnectError only when it cannot open a
+# connection; a reply cut off mid-response is a plain ConnectionError and a
+# slow one asyncio.TimeoutError, and neither is retried elsewhere
+_ASYNC_BACKEND_ERRORS = (OllamaConnectError,)
+
+
+def parse_hosts(value):
+    """Split a comma-separated host list into base URLs."""
+    hosts = []
+    for host in (value or "").split(","):
+        host = host.strip().rstrip("/")
+        if host:
+            hosts.append(host if "://" in host else f"http://{host}")
+    return hosts
+
+
+def _canonical(name):
+    """Model name with an explicit tag; a bare name means ':latest'."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class Backend:
+    """One Ollama endpoint and what the pool knows about it."""
+
+    def __init__(self, client):
+        self.client = client
+        self.healthy = True
+        self.resident = set()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def url(self):
+        return self.client.base_url
+
+    def as_dict(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "resident": sorted(self.resident),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class _Lease:
+    """Iterator over a streamed response that holds a backend's in-flight slot.
+
+    The slot is released when the stream is exhausted, fails, or is closed,
+    even if it was never iterated.
+    """
+
+    def __init__(self, chunks, release):
+        self._chunks = chunks
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            self._chunks.close()
+            release()
+
+    def __del__(self):
+        self.close()
+
+
+class _Pool:
+    """Backend selection and bookkeeping shared by the sync and async pools."""
+
+    def __init__(self, clients, health_interval, clock):
+        self.backends = [Backend(client) for client in clients]
+        self.health_interval = health_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checked_at = None
+
+    def _stale(self):
+        checked = self._checked_at
+        return checked is None or self._clock() - checked >= self.health_interval
+
+    def _update(self, backend, healthy, resident):
+        with self._lock:
+            backend.healthy = healthy
+            backend.resident = {_canonical(name) for name in resident}
+
+    def _order(self, model):
+        """Return healthy backends in dispatch order for model.
+
+        Backends with the model resident come first; within each group the
+        least-loaded backend comes first, then configuration order.
+        """
+        wanted = _canonical(model) if model else None
+        with self._lock:
+            healthy = [b for b in self.backends if b.healthy]
+            return sorted(healthy, key=lambda b: (wanted not in b.resident, b.in_flight))
+
+    def _acquire(self, backend):
+        with self._lock:
+            backend.in_flight += 1
+            backend.requests += 1
+
+    def _release(self, backend):
+        with self._lock:
+            backend.in_flight -= 1
+
+    def _mark_down(self, backend):
+        with self._lock:
+            backend.healthy = False
+            backend.resident = set()
+            backend.failures += 1
+
+    def _mark_resident(self, backend, model):
+        if model:
+            with self._lock:
+                backend.resident.add(_canonical(model))
+
+    def _unreachable(self):
+        return f"No Ollama backend reachable ({', '.join(b.url for b in self.backends)})"
+
+    def status(self):
+        """Return a list of per-backend status dicts."""
+        with self._lock:
+            return [backend.as_dict() for backend in self.backends]
+
+
+class BackendPool(_Pool):
+    """Dispatches Ollama requests across several endpoints.
+
+    Supports the same methods as OllamaClient, so it can be installed with
+    ollama_client.set_client(). client_factory(url) builds the per-backend
+    clients.
+    """
+
+    def __init__(
+        self,
+        urls,
+        health_interval=DEFAULT_HEALTH_INTERVAL,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeouts=None,
+        client_factory=None,
+        clock=time.monotonic,
+    ):
+        if not urls:
+            raise ValueError("BackendPool needs at least one URL")
+        if client_factory is None:
+
+            def client_factory(url):
+                return OllamaClient(url, pool_size=pool_size, timeouts=timeouts)
+
+        super().__init__([client_factory(url) for url in urls], health_interval, clock)
+
+    def close(self):
+        for backend in self.backends:
+            backend.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Health and selection
+    # ------------------------------------------------------------------
+
+    def refresh(self):
+        """Health-check every backend and re-read the models it has loaded."""
+        for backend in self.backends:
+            try:
+                healthy = backend.client.check_running()
+                resident = backend.client.running_models() if healthy else []
+            except (*_BACKEND_ERRORS, requests.Timeout, requests.HTTPError):
+                healthy, resident = False, []
+            self._update(backend, healthy, resident)
+        self._checked_at = self._clock()
+
+    def _maybe_refresh(self):
+        if self._stale():
+            self.refresh()
+
+    def candidates(self, model=None):
+        """Return healthy backends in dispatch order for model.
+
+        Backends with the model resident come first; within each group the
+        least-loaded backend comes first, then configuration order.
+        """
+        self._maybe_refresh()
+        return self._order(model)
+
+    def _dispatch(self, model, call):
+        """Run call(client) on the best backend for model, failing over on errors."""
+        candidates = self.candidates(model)
+        if not candidates:
+            # Everything looked down: re-probe once before giving up
+            self.refresh()
+            candidates = self.candidates(model)
+        if not candidates:
+            raise requests.ConnectionError(self._unreachable())
+        error = None
+        for backend in candidates:
+            self._acquire(backend)
+            try:
+                result = call(backend.client)
+            except _BACKEND_ERRORS as e:
+                self._release(backend)
+                self._mark_down(backend)
+                error = e
+                continue
+            except BaseException:
+                self._release(backend)
+                raise
+            self._mark_resident(backend, model)
+            return backend, result
+        raise error
+
+    def _call(self, model, call):
+        backend, result = self._dispatch(model, call)
+        self._release(backend)
+        return result
+
+    def _primary(self):
+        """Return the first healthy backend's client, in configuration order."""
+        self._maybe_refresh()
+        for backend in self.backends:
+            if backend.healthy:
+                return backend.client
+        raise requests.ConnectionError("No Ollama backend reachable")
+
+    def _broadcast(self, call):
+        """Run call(client) on every healthy backend."""
+        candidates = self.candidates()
+        if not candidates:
+            raise requests.ConnectionError("No Ollama backend reachable")
+        for backend in candidates:
+            call(backend.client)
+
+    # ------------------------------------------------------------------
+    # OllamaClient interface
+    # ------------------------------------------------------------------
+
+    def check_running(self):
+        """Return True if at least one backend is reachable."""
+        self.refresh()
+        return any(backend.healthy for backend in self.backends)
+
+    @property
+    def inventory(self):
+        """Installed models, as reported by the first healthy backend."""
+        return self._primary().inventory
+
+    def list_model_details(self):
+        return self._primary().list_model_details()
+
+    def list_models(self):
+        return self._primary().list_models()
+
+    def model_digest(self, name):
+        return self._primary().model_digest(name)
+
+    def weights_digest(self, name):
+        return self._primary().weights_digest(name)
+
+    def running_models(self):
+        """Return the models loaded on any backend."""
+        self.refresh()
+        with self._lock:
+            return sorted({name for backend in self.backends for name in backend.resident})
+
+    def generate(self, model, prompt, stream=True, with_meta=False, options=None):
+        """Generate on the best backend for model (see OllamaClient.generate)."""
+
+        def call(client):
+            return client.generate(
+                model, prompt, stream=stream, with_meta=with_meta, options=options
+            )
+
+        if not stream:
+            return self._call(model, call)
+        backend, chunks = self._dispatch(model, call)
+        return _Lease(chunks, lambda: self._release(backend))
+
+    def chat(self, model, messages, stream=True, options=None):
+        """Chat on the best backend for model (see OllamaClient.chat)."""
+
+        def call(client):
+            return client.chat(model, messages, stream=stream, options=options)
+
+        if not stream:
+            return self._call(model, call)
+        backend, chunks = self._dispatch(model, call)
+        return _Lease(chunks, lambda: self._release(backend))
+
+    def load_model(self, model, keep_alive=None):
+        """Load model on the backend that would serve it next."""
+        return self._call(model, lambda c: c.load_model(model, keep_alive=keep_alive))
+
+    def pull_model(self, name, on_progress=None):
+        self._broadcast(lambda c: c.pull_model(name, on_progress=on_progress))
+
+    def create_model(self, name, modelfile, on_progress=None):
+        self._broadcast(lambda c: c.create_model(name, modelfile, on_progress=on_progress))
+
+    def delete_model(self, name):
+        self._broadcast(lambda c: c.delete_model(name))
+
+
+class AsyncBackendPool(_Pool):
+    """Dispatches asyncio Ollama requests across several endpoints.
+
+    Supports the request methods of AsyncOllamaClient that eval and batch
+    queries use, with the same selection and failover as BackendPool.
+    client_factory(url) builds the per-backend clients; max_connections and
+    timeouts apply to each of them.
+    """
+
+    def __init__(
+        self,
+        urls,
+        health_interval=DEFAULT_HEALTH_INTERVAL,
+        max_connections=DEFAULT_POOL_SIZE,
+        timeouts=None,
+        client_factory=None,
+        clock=time.monotonic,
+    ):
+        if not urls:
+            raise ValueError("AsyncBackendPool needs at least one URL")
+        if client_factory is None:
+
+            def client_factory(url):
+                return AsyncOllamaClient(url, max_connections=max_connections, timeouts=timeouts)
+
+        super().__init__([client_factory(url) for url in urls], health_interval, clock)
+        self._refreshing = None
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # Health and selection
+    # ------------------------------------------------------------------
+
+    async def refresh(self):
+        """Health-check every backend and re-read the models it has loaded."""
+        # Concurrent callers share one round of checks
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        refreshing = self._refreshing
+        try:
+            await asyncio.shield(refreshing)
+        finally:
+            if self._refreshing is refreshing and refreshing.done():
+                self._refreshing = None
+
+    async def _refresh(self):
+        async def check(backend):
+            try:
+                healthy = await backend.client.check_running()
+                resident = await backend.client.running_models() if healthy else []
+            except (OSError, asyncio.TimeoutError, OllamaHTTPError):
+                healthy, resident = False, []
+            self._update(backend, healthy, resident)
+
+        await asyncio.gather(*(check(backend) for backend in self.backends))
+        self._checked_at = self._clock()
+
+    async def candidates(self, model=None):
+        """Return healthy backends in dispatch order for model (see BackendPool)."""
+        if self._stale():
+            await self.refresh()
+        return self._order(model)
+
+    async def _candidates_or_raise(self, model):
+        candidates = await self.candidates(model)
+        if not candidates:
+            # Everything looked down: re-probe once before giving up
+            await self.refresh()
+            candidates = self._order(model)
+        if not candidates:
+            raise ConnectionError(self._unreachable())
+        return candidates
+
+    async def _call(self, model, call):
+        """Await call(client) on the best backend for model, failing over on errors."""
+        error = None
+        for backend in await self._candidates_or_raise(model):
+            self._acquire(backend)
+            try:
+                result = await call(backend.client)
+            except _ASYNC_BACKEND_ERRORS as e:
+                self._mark_down(backend)
+                error = e
+                continue
+            finally:
+                self._release(backend)
+            self._mark_resident(backend, model)
+            return result
+        raise error
+
+    async def _stream(self, model, open_stream):
+        """Yield from open_stream(client) on the best backend for model.
+
+        Fails over only when a backend cannot be connected to; a stream cut
+        off mid-response is not restarted elsewhere.
+        """
+        error = None
+        for backend in await self._candidates_or_raise(model):
+            self._acquire(backend)
+            stream = open_stream(backend.client)
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                except _ASYNC_BACKEND_ERRORS as e:
+                    self._mark_down(backend)
+                    error = e
+                    continue
+                self._mark_resident(backend, model)
+                yield first
+                async for item in stream:
+                    yield item
+                return
+            finally:
+                await stream.aclose()
+                self._release(backend)
+        raise error
+
+    # ------------------------------------------------------------------
+    # AsyncOllamaClient interface
+    # ------------------------------------------------------------------
+
+    async def check_running(self):
+        """Return True if at least one backend is reachable."""
+        await self.refresh()
+        return any(backend.healthy for backend in self.backends)
+
+    async def _primary(self):
+        """Return the first healthy backend's client, in configuration order."""
+        if self._stale():
+            await self.refresh()
+        for backend in self.backends:
+            if backend.healthy:
+                return backend.client
+        raise ConnectionError(self._unreachable())
+
+    async def list_model_details(self):
+        return await (await self._primary()).list_model_details()
+
+    async def list_models(self):
+        return await (await self._primary()).list_models()
+
+    async def model_digest(self, name):
+        return await (await self._primary()).model_digest(name)
+
+    async def running_models(self):
+        """Return the models loaded on any backend."""
+        await self.refresh()
+        with self._lock:
+            return sorted({name for backend in self.backends for name in backend.resident})
+
+    def generate(self, model, prompt, stream=True, with_meta=False, options=None):
+        """Generate on the best backend for model (see AsyncOllamaClient.generate)."""
+
+        def call(client):
+            return client.generate(
+                model, prompt, stream=stream, with_meta=with_meta, options=options
+            )
+
+        if not stream:
+            return self._call(model, call)
+        return self._stream(model, call)
+
+    async def generate_with_meta(self, model, prompt, options=None):
+        """Generate a full response on the best backend for model. Returns (text, meta)."""
+        return await self._call(
+            model, lambda c: c.generate_with_meta(model, prompt, options=options)
+        )
+
+    def chat(self, model, messages, stream=True, options=None):
+        """Chat on the best backend for model (see AsyncOllamaClient.chat)."""
+
+        def call(client):
+            return client.chat(model, messages, stream=stream, options=options)
+
+        if not stream:
+            return self._call(model, call)
+        return self._stream(model, call)
+
+    async def load_model(self, model, keep_alive=None):
+        """Load model on the backend that would serve it next."""
+        return await self._call(model, lambda c: c.load_model(model, keep_alive=keep_alive))
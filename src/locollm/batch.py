@@ -0,0 +1,177 @@
+"""Batch query processing for `loco query --batch`.
+
+Reads prompts from JSONL, routes them all up front, then runs them with
+bounded concurrency on the async client. Jobs go through a ModelScheduler
+so Ollama swaps models as rarely as possible, while results are written
+back as JSONL in input order.
+
+Input lines are either a JSON string (the prompt) or an object::
+
+    {"prompt": "solve 2+2", "id": "q1", "adapter": "math", "route": true}
+
+Only "prompt" is required. "adapter" pins an adapter; "route": false sends
+the prompt straight to the base model.
+"""
+
+import asyncio
+import json
+import time
+
+from locollm import adapter_manager, async_ollama_client
+from locollm.scheduler import DEFAULT_MAX_WAIT, ModelScheduler
+
+DEFAULT_BATCH_CONCURRENCY = 4
+
+
+def read_requests(lines):
+    """Parse JSONL batch input into a list of request dicts.
+
+    Raises ValueError naming the offending line on malformed input.
+    """
+    requests = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {lineno}: invalid JSON ({e})") from e
+        if isinstance(request, str):
+            request = {"prompt": request}
+        if not isinstance(request, dict) or not isinstance(request.get("prompt"), str):
+            raise ValueError(f"line {lineno}: expected a prompt string or an object with 'prompt'")
+        requests.append(request)
+    return requests
+
+
+def plan_batch(requests, router, installed_base, base_model):
+    """Resolve every request to a target model.
+
+    Returns one job dict per request, in input order, with keys index, id,
+    prompt, routed (the router's pick, if routing ran), adapter and model.
+    Requests that cannot run carry an "error" instead.
+    """
+    jobs = []
+    for index, request in enumerate(requests):
+        prompt = request["prompt"]
+        job = {
+            "index": index,
+            "id": request.get("id", index),
+            "prompt": prompt,
+            "routed": None,
+            "adapter": None,
+            "model": base_model,
+        }
+        adapter = request.get("adapter")
+        if adapter:
+            model = adapter_manager.adapter_model_name(adapter)
+            if adapter_manager.get_adapter(adapter) is None:
+                job["error"] = f"Adapter '{adapter}' not found in registry."
+            elif model not in installed_base:
+                job["error"] = "Adapter model not found. Run 'loco setup' first."
+            else:
+                job["adapter"], job["model"] = adapter, model
+        elif request.get("route", True):
+            routed = router.route(prompt)
+            job["routed"] = routed
+            if routed and adapter_manager.adapter_model_name(routed) in installed_base:
+                job["adapter"] = routed
+                job["model"] = adapter_manager.adapter_model_name(routed)
+        jobs.append(job)
+    return jobs
+
+
+def _record(job, text=None, meta=None, wall_s=None, error=None):
+    record = {
+        "id": job["id"],
+        "index": job["index"],
+        "adapter": job["adapter"],
+        "routed": job["routed"],
+        "model": job["model"],
+    }
+    if error is not None:
+        record["error"] = error
+    else:
+        record["text"] = text
+        record["meta"] = {**meta, "wall_ms": round(wall_s * 1000, 1)}
+    return record
+
+
+def run_batch(
+    jobs,
+    out,
+    concurrency=DEFAULT_BATCH_CONCURRENCY,
+    client=None,
+    max_wait=DEFAULT_MAX_WAIT,
+    options=None,
+):
+    """Run planned jobs and write one JSON result line per job to `out`.
+
+    Results are written in input order as soon as every earlier job has
+    finished. client is an AsyncOllamaClient (or pool); by default one sized to
+    `concurrency` is created. max_wait bounds how long the scheduler may
+    hold a prompt back in favour of the loaded model. options are inference
+    options sent with every prompt. Returns a summary dict.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    return asyncio.run(_run_batch(jobs, out, concurrency, client, max_wait, options))
+
+
+async def _run_batch(jobs, out, concurrency, client, max_wait, options):
+    owns_client = client is None
+    if owns_client:
+        client = async_ollama_client.default_client(max_connections=concurrency)
+
+    finished = {}
+    next_index = 0
+    errors = 0
+
+    def emit(record):
+        nonlocal next_index, errors
+        if "error" in record:
+            errors += 1
+        finished[record["index"]] = record
+        while next_index in finished:
+            out.write(json.dumps(finished.pop(next_index)) + "\n")
+            next_index += 1
+        out.flush()
+
+    runnable = []
+    for job in jobs:
+        if "error" in job:
+            emit(_record(job, error=job["error"]))
+        else:
+            runnable.append(job)
+
+    async def generate(model, prompt):
+        start = time.perf_counter()
+        text, meta = await client.generate_with_meta(model, prompt, options=options)
+        return text, meta, time.perf_counter() - start
+
+    scheduler = ModelScheduler(generate, concurrency=concurrency, max_wait=max_wait)
+
+    async def run_job(job):
+        try:
+            text, meta, wall_s = await scheduler.submit(job["model"], job["prompt"])
+        except Exception as e:  # one bad prompt must not sink the batch
+            emit(_record(job, error=str(e) or type(e).__name__))
+        else:
+            emit(_record(job, text, meta, wall_s))
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_job(job) for job in runnable))
+    finally:
+        if owns_client:
+            await client.close()
+
+    return {
+        "total": len(jobs),
+        "errors": errors,
+        "models": len({job["model"] for job in runnable}),
+        "swaps": scheduler.metrics.swaps,
+        "swaps_avoided": scheduler.metrics.swaps_avoided,
+        "wall_s": time.perf_counter() - start,
+    }
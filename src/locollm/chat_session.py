@@ -5,9 +5,82 @@ and stats formatting. Does no IO (never calls print/input).
 """
 
 import random
+import threading
 
 from locollm import adapter_manager, ollama_client
-from locollm.router import KeywordRouter
+from locollm import router as router_module
+from locollm.timing import LatencyStats, format_timing
+from locollm.tokens import PROMPT_OVERHEAD, message_tokens
+
+# Share of context_limit the prompt may fill; the rest is left for the reply
+CONTEXT_BUDGET = 0.9
+
+# Start summarising old turns once the prompt reaches this share of context_limit
+SUMMARY_THRESHOLD = 0.6
+
+# Most recent messages that are never folded into the summary
+SUMMARY_KEEP_RECENT = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarise the conversation below so it can replace the original messages. "
+    "Keep facts, numbers, names, code identifiers, decisions and open questions; "
+    "drop pleasantries. Write at most 200 words, in the third person."
+)
+
+
+class _SummaryJob:
+    """Background summary of messages[start:start + fold] made by the base model."""
+
+    def __init__(self, client, model, messages, start, epoch):
+        self.start = start
+        self.fold = len(messages)
+        self.epoch = epoch
+        self.summary = None
+        self.error = None
+        self._done = threading.Event()
+        thread = threading.Thread(target=self._run, args=(client, model, messages), daemon=True)
+        thread.start()
+
+    def _run(self, client, model, messages):
+        transcript = "\n\n".join(
+            f"{'Earlier summary' if _is_summary(m) else m['role']}: "
+            f"{m['content'].removeprefix(SUMMARY_PREFIX)}"
+            for m in messages
+        )
+        prompt = [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": transcript},
+        ]
+        try:
+            [(text, _)] = client.chat(model, prompt, stream=False)
+            self.summary = text.strip()
+        except Exception as e:  # a failed summary just means no compaction
+            self.error = e
+        finally:
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+def _is_summary(message):
+    return message["role"] == "system" and message["content"].startswith(SUMMARY_PREFIX)
+
+
+def _pinned(messages):
+    """Count the leading system messages (the caller's instructions) that are never folded."""
+    count = 0
+    for message in messages:
+        if message["role"] != "system" or _is_summary(message):
+            break
+        count += 1
+    return count
+
 
 NUDGE_PHRASES = [
     "Does that make sense? If something seems off, ask me to explain differently.",
@@ -21,12 +94,43 @@ NUDGE_PHRASES = [
 class ChatSession:
     """Manages multi-turn chat state, routing, and compaction."""
 
-    def __init__(self, adapter="auto", context_limit=8192, nudge=True):
+    def __init__(
+        self,
+        adapter="auto",
+        context_limit=8192,
+        nudge=True,
+        client=None,
+        router=None,
+        summarize=True,
+        options=None,
+    ):
+        # Any object with the ollama_client helper surface (e.g. an OllamaClient);
+        # defaults to the module helpers, which share the pooled default client.
+        self._client = client if client is not None else ollama_client
+        # None means the shared, hot-reloading router from router.get_router()
+        self._router = router
+        # Inference options for every turn, over the registry defaults
+        self._options = options
         self._messages: list[dict] = []
+        # Estimated tokens per message (parallel to _messages) and their sum
+        self._message_tokens: list[int] = []
+        self._history_tokens = 0
+        # Correction learned from the server's prompt_eval_count (see record_turn)
+        self._token_scale = 1.0
+        self._sent_estimate = 0
         self._context_limit = context_limit
+        # Rolling-summary compaction: a pending _SummaryJob, a counter bumped
+        # whenever old messages are dropped (invalidating a pending job), and
+        # prompt_eval_count before/after each applied summary
+        self._summarize = summarize
+        self._summary_job = None
+        self._history_epoch = 0
+        self._last_prompt_eval = 0
+        self._compactions: list[dict] = []
         self._total_tokens = 0
         self._total_duration_ns = 0
         self._turn_count = 0
+        self._latency = LatencyStats()
         self._nudge_enabled = nudge
         self._nudge_index = random.randrange(len(NUDGE_PHRASES))
 
@@ -34,7 +138,7 @@ class ChatSession:
         registry = adapter_manager.load_registry()
         self._base_model = registry["base_model"]["ollama_name"]
         self._adapter_names = list((registry.get("adapters") or {}).keys())
-        self._installed = {m.split(":")[0] for m in ollama_client.list_models()}
+        self._installed = {m.split(":")[0] for m in self._client.list_models()}
 
         # Set initial mode
         if adapter == "auto":
@@ -95,13 +199,26 @@ class ChatSession:
         """Append an assistant message."""
         self._messages.append({"role": "assistant", "content": text})
 
-    def send(self):
-        """Return a generator of (text, meta) from ollama_client.chat()."""
-        return ollama_client.chat(self.model, self._messages)
+    def add_system_message(self, text):
+        """Append a system message (e.g. instructions from an API client)."""
+        self._messages.append({"role": "system", "content": text})
+
+    def send(self, options=None):
+        """Return a generator of (text, meta) from the client's chat().
+
+        options overrides the session's inference options for this turn only.
+        """
+        self._sync_tokens()
+        self._sent_estimate = self._history_tokens + PROMPT_OVERHEAD
+        options = {**(self._options or {}), **(options or {})} or None
+        return self._client.chat(self.model, self._messages, options=options)
 
     def clear(self):
         """Reset conversation history. In auto mode, also reset adapter."""
         self._messages.clear()
+        self._sync_tokens()
+        self._history_epoch += 1
+        self._summary_job = None
         if self._mode == "auto":
             self._active_adapter = None
 
@@ -111,18 +228,158 @@ class ChatSession:
             self._total_tokens += meta.get("eval_count", 0)
             self._total_duration_ns += meta.get("total_duration", 0)
             self._turn_count += 1
+            self._latency.add(meta)
+            prompt_eval_count = meta.get("prompt_eval_count", 0)
+            self._calibrate(prompt_eval_count)
+            if self._compactions and self._compactions[-1]["after"] is None:
+                self._compactions[-1]["after"] = prompt_eval_count
+            self._last_prompt_eval = prompt_eval_count
+
+    def _calibrate(self, prompt_eval_count):
+        """Scale future estimates up if the server counted more prompt tokens.
+
+        Ollama skips prompt tokens it already has cached, so its count can
+        undershoot the real prompt length; it is only trusted to raise the
+        scale, never to lower it.
+        """
+        if not self._sent_estimate or not prompt_eval_count:
+            return
+        ratio = prompt_eval_count / self._sent_estimate
+        self._token_scale = min(max(self._token_scale, ratio), 2.0)
+
+    def _sync_tokens(self):
+        """Estimate tokens for messages appended since the last call."""
+        counts = self._message_tokens
+        if len(counts) > len(self._messages):
+            # History was cleared or replaced wholesale
+            counts.clear()
+            self._history_tokens = 0
+        for message in self._messages[len(counts) :]:
+            tokens = message_tokens(message)
+            counts.append(tokens)
+            self._history_tokens += tokens
+
+    def _drop_oldest(self, count, start=0):
+        end = start + count
+        self._history_tokens -= sum(self._message_tokens[start:end])
+        del self._message_tokens[start:end]
+        del self._messages[start:end]
+        self._history_epoch += 1
+
+    def maybe_summarize(self):
+        """Start folding old turns into a summary if the prompt is getting long.
+
+        Call after each turn. The summary is written by the base model on a
+        background thread and swapped in by the next fit_context(). Only the
+        oldest turns are replaced, and only then, so the prompt prefix stays
+        byte-identical between compactions and Ollama's prompt cache keeps
+        hitting. Leading system messages are kept verbatim ahead of the
+        summary. Returns a notice string or None.
+        """
+        if not self._summarize or self._summary_job is not None:
+            return None
+        if self.context_tokens < self._context_limit * SUMMARY_THRESHOLD:
+            return None
+        start = _pinned(self._messages)
+        fold = len(self._messages) - SUMMARY_KEEP_RECENT - start
+        # Folding just the previous summary would gain nothing
+        if fold < 2:
+            return None
+        self._summary_job = _SummaryJob(
+            self._client,
+            self._base_model,
+            self._messages[start : start + fold],
+            start,
+            self._history_epoch,
+        )
+        return f"[summarising {fold} older messages in the background]"
+
+    def _apply_summary(self):
+        """Swap a finished background summary in for the messages it covers."""
+        job = self._summary_job
+        if job is None or not job.done():
+            return None
+        self._summary_job = None
+        if job.error is not None or not job.summary or job.epoch != self._history_epoch:
+            return None
+        self._sync_tokens()
+        self._drop_oldest(job.fold, start=job.start)
+        summary = {"role": "system", "content": SUMMARY_PREFIX + job.summary}
+        self._messages.insert(job.start, summary)
+        tokens = message_tokens(summary)
+        self._message_tokens.insert(job.start, tokens)
+        self._history_tokens += tokens
+        self._compactions.append(
+            {"folded": job.fold, "before": self._last_prompt_eval, "after": None}
+        )
+        return f"[compacted: folded {job.fold} older messages into a summary]"
+
+    @property
+    def context_tokens(self):
+        """Estimated prompt tokens for the current history."""
+        self._sync_tokens()
+        return round((self._history_tokens + PROMPT_OVERHEAD) * self._token_scale)
+
+    def fit_context(self):
+        """Prepare history so the next prompt fits the context budget.
+
+        Call before send(). A finished background summary is swapped in
+        first; then, if the local token estimate is still over budget, the
+        oldest messages are dropped, so an over-long prompt is never sent.
+        Leading system messages and the newest message are always kept, and
+        the turns after the system messages never start with an assistant
+        reply. Returns a notice string or None.
+        """
+        summarized = self._apply_summary()
+        notice = self._trim_to_budget()
+        if summarized and notice:
+            return f"{summarized}\n{notice}"
+        return summarized or notice
+
+    def _trim_to_budget(self):
+        self._sync_tokens()
+        budget = self._context_limit * CONTEXT_BUDGET
+        counts = self._message_tokens
+        remaining = self._history_tokens + PROMPT_OVERHEAD
+        start = _pinned(self._messages)
+        # A rolling summary stands for the oldest turns, so it goes last
+        summary = start < len(counts) - 1 and _is_summary(self._messages[start])
+        first = start + 1 if summary else start
+        drop = 0
+        while first + drop < len(counts) - 1 and remaining * self._token_scale > budget:
+            remaining -= counts[first + drop]
+            drop += 1
+        end = first + drop
+        if drop and end < len(counts) - 1 and self._messages[end]["role"] == "assistant":
+            remaining -= counts[end]
+            drop += 1
+        if drop:
+            self._drop_oldest(drop, start=first)
+        if summary and remaining * self._token_scale > budget:
+            self._drop_oldest(1, start=start)
+            drop += 1
+        if not drop:
+            return None
+        return (
+            f"[compacted: dropped {drop} oldest messages to fit context window "
+            f"(~{self.context_tokens}/{self._context_limit} tokens)]"
+        )
 
     def maybe_compact(self, prompt_eval_count):
         """If tokens exceed 90% of context limit, drop oldest messages.
 
-        Keeps at least the last 4 messages. Returns a notice string or None.
+        Fallback for when the server reports a prompt larger than fit_context()
+        estimated. Keeps leading system messages and the last 4 messages.
+        Returns a notice string or None.
         """
-        if prompt_eval_count < self._context_limit * 0.9:
+        if prompt_eval_count < self._context_limit * CONTEXT_BUDGET:
             return None
-        if len(self._messages) <= 4:
+        start = _pinned(self._messages)
+        dropped = len(self._messages) - 4 - start
+        if dropped <= 0:
             return None
-        dropped = len(self._messages) - 4
-        self._messages = self._messages[-4:]
+        self._sync_tokens()
+        self._drop_oldest(dropped, start=start)
         return f"[compacted: dropped {dropped} oldest messages to fit context window]"
 
     def adapter_list_display(self):
@@ -137,22 +394,45 @@ class ChatSession:
             lines.append("  (using base model)")
         return "\n".join(lines)
 
+    @property
+    def compactions(self):
+        """Applied summaries: dicts with folded, before and after prompt_eval_count."""
+        return [dict(c) for c in self._compactions]
+
     def session_stats_display(self):
         """Return a formatted string with session statistics."""
         duration_s = self._total_duration_ns / 1e9 if self._total_duration_ns else 0
         avg_tps = self._total_tokens / (duration_s) if duration_s > 0 else 0
-        return (
+        stats = (
             f"Session: {self._turn_count} turns | "
             f"{self._total_tokens} tokens | "
             f"{avg_tps:.1f} avg tok/s | "
             f"{duration_s:.1f}s total"
         )
+        if self._latency:
+            stats += f"\n{self._latency.display()}"
+        if self._compactions:
+            last = self._compactions[-1]
+            after = "?" if last["after"] is None else last["after"]
+            stats += (
+                f"\nCompactions: {len(self._compactions)} | "
+                f"last prompt_eval_count {last['before']} -> {after}"
+            )
+        return stats
+
+    def context_display(self):
+        """Return a formatted string with the estimated context usage."""
+        tokens = self.context_tokens
+        pct = tokens / self._context_limit * 100 if self._context_limit else 0
+        return f"Context: ~{tokens}/{self._context_limit} tokens ({pct:.0f}%)"
 
     @staticmethod
     def format_stats(adapter_name, meta):
         """Format a stats line for a single turn.
 
-        Returns e.g. '[math | 147 tokens | 23.4 tok/s | 6.3s]'
+        Returns e.g. '[math | 147 tokens | 23.4 tok/s | 6.3s]', with client-side
+        timings appended when meta has them:
+        '[math | 147 tokens | 23.4 tok/s | 6.3s | TTFT 0.42s | gaps 31/58ms]'
         """
         label = adapter_name if adapter_name else "base"
         eval_count = meta.get("eval_count", 0)
@@ -165,7 +445,9 @@ class ChatSession:
             tok_s = 0.0
 
         total_s = total_duration / 1e9 if total_duration else 0.0
-        return f"[{label} | {eval_count} tokens | {tok_s:.1f} tok/s | {total_s:.1f}s]"
+        timing = format_timing(meta)
+        timing = f" | {timing}" if timing else ""
+        return f"[{label} | {eval_count} tokens | {tok_s:.1f} tok/s | {total_s:.1f}s{timing}]"
 
     @staticmethod
     def parse_slash_command(text):
@@ -192,10 +474,14 @@ class ChatSession:
         self._nudge_index += 1
         return phrase
 
+    @property
+    def router(self):
+        """The KeywordRouter used for auto-routing."""
+        return self._router if self._router is not None else router_module.get_router()
+
     def _auto_route(self, text):
-        """Route a message using KeywordRouter. Only called in auto mode."""
-        router = KeywordRouter()
-        result = router.route(text)
+        """Route a message using the session's router. Only called in auto mode."""
+        result = self.router.route(text)
         if result:
             model_name = adapter_manager.adapter_model_name(result)
             if model_name in self._installed:
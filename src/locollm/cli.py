@@ -2,49 +2,63 @@
 
 import argparse
 import sys
-
-from locollm import __version__
+import time
+from datetime import datetime, timezone
+from pathlib import Path
 
 
 def cmd_setup(args):
     """Pull base model and register adapters."""
     from locollm import adapter_manager, ollama_client
+    from locollm.provision import provision
 
     if not ollama_client.check_running():
         print("Error: Ollama is not running. Start it with: ollama serve")
         sys.exit(1)
 
-    # Pull base model
-    base_model = adapter_manager.get_base_model_name()
-    installed = ollama_client.list_models()
-    installed_base = {m.split(":")[0] for m in installed}
-
-    if base_model.split(":")[0] in installed_base:
-        print(f"Base model '{base_model}' already installed.")
-    else:
-        print(f"Pulling base model '{base_model}'...")
-        ollama_client.pull_model(base_model)
-        print(f"Base model '{base_model}' ready.")
+    if args.concurrency < 1:
+        print("Error: --concurrency must be at least 1.")
+        sys.exit(1)
 
-    # Create adapter models
-    for name, _ in adapter_manager.list_adapters():
-        try:
-            adapter_manager.ensure_adapter_model(name)
-        except FileNotFoundError as e:
-            print(f"Skipping adapter '{name}': {e}")
+    base_model = adapter_manager.get_base_model_name()
+    adapters = [name for name, _ in adapter_manager.list_adapters()]
+    # One listing of installed models serves every job below
+    models = ollama_client.list_model_details()
+    result = provision(base_model, adapters, models, concurrency=args.concurrency)
+
+    for name in adapters:
+        outcome, message = result.outcomes.get(name, (None, ""))
+        if outcome == "skipped":
+            print(f"Skipping adapter '{name}': {message}")
             print("  (Train the adapter first, then re-run setup.)")
+    if not result.ok:
+        for name in result.names("failed"):
+            print(f"Error: {name}: {result.outcomes[name][1]}")
+        sys.exit(1)
 
-    print("\nSetup complete!")
+    changed = len(result.names("created")) + len(result.names("updated"))
+    if result.names("pulled") or changed:
+        print(f"\nSetup complete! ({changed} adapter models created or updated)")
+    else:
+        print("\nSetup complete! (everything was up to date)")
 
 
 def cmd_query(args):
     """Query a model, optionally with an adapter."""
     from locollm import adapter_manager, ollama_client
 
+    if args.batch is None and args.prompt is None:
+        print("Error: give a prompt, or --batch FILE for a JSONL batch.")
+        sys.exit(1)
+
     if not ollama_client.check_running():
         print("Error: Ollama is not running. Start it with: ollama serve")
         sys.exit(1)
 
+    if args.batch is not None:
+        _query_batch(args)
+        return
+
     if args.adapter:
         config = adapter_manager.get_adapter(args.adapter)
         if config is None:
@@ -52,24 +66,19 @@ def cmd_query(args):
             sys.exit(1)
         model = adapter_manager.adapter_model_name(args.adapter)
         # Ensure the adapter model exists
-        installed = ollama_client.list_models()
-        installed_base = {m.split(":")[0] for m in installed}
-        if model not in installed_base:
+        if model not in ollama_client.installed_base_names():
             print("Adapter model not found. Run 'loco setup' first.")
             sys.exit(1)
         print(f"[adapter: {args.adapter}]")
     elif not args.no_route:
         # Auto-route using keyword router
-        from locollm.router import KeywordRouter
+        from locollm.router import get_router
 
-        router = KeywordRouter()
-        routed = router.route(args.prompt)
+        routed = get_router().route(args.prompt)
         if routed:
             config = adapter_manager.get_adapter(routed)
             model = adapter_manager.adapter_model_name(routed)
-            installed = ollama_client.list_models()
-            installed_base = {m.split(":")[0] for m in installed}
-            if model in installed_base:
+            if model in ollama_client.installed_base_names():
                 print(f"[router -> {routed}]")
             else:
                 # Adapter not trained yet, fall back to base
@@ -81,15 +90,93 @@ def cmd_query(args):
     else:
         model = adapter_manager.get_base_model_name()
 
-    for chunk in ollama_client.generate(model, args.prompt):
+    meta = None
+    options = _inference_options(args) or None
+    for chunk, chunk_meta in ollama_client.generate(
+        model, args.prompt, with_meta=True, options=options
+    ):
         print(chunk, end="", flush=True)
+        if chunk_meta is not None:
+            meta = chunk_meta
     print()
+    if args.stats and meta:
+        from locollm.chat_session import ChatSession
+
+        print(ChatSession.format_stats(_label(model), meta), file=sys.stderr)
+
+
+def _label(model):
+    """Adapter name for an Ollama model name, or None for the base model."""
+    from locollm.adapter_manager import ADAPTER_MODEL_PREFIX
+
+    if model.startswith(ADAPTER_MODEL_PREFIX):
+        return model[len(ADAPTER_MODEL_PREFIX) :]
+    return None
+
+
+def _query_batch(args):
+    """Route and run every prompt in a JSONL batch, writing JSONL results."""
+    from locollm import adapter_manager, ollama_client
+    from locollm.batch import plan_batch, read_requests, run_batch
+    from locollm.router import get_router
+
+    try:
+        if args.batch == "-":
+            requests = read_requests(sys.stdin)
+        else:
+            with open(args.batch) as f:
+                requests = read_requests(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read batch {args.batch}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Command-line flags act as defaults for requests that don't say otherwise
+    for request in requests:
+        if args.adapter:
+            request.setdefault("adapter", args.adapter)
+        if args.no_route:
+            request.setdefault("route", False)
+
+    jobs = plan_batch(
+        requests,
+        get_router(),
+        ollama_client.installed_base_names(),
+        adapter_manager.get_base_model_name(),
+    )
+    out = open(args.output, "w") if args.output else sys.stdout  # noqa: SIM115
+    try:
+        summary = run_batch(
+            jobs, out, concurrency=args.concurrency, options=_inference_options(args) or None
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(
+        f"[batch: {summary['total']} prompts | {summary['models']} models | "
+        f"{summary['errors']} errors | {summary['swaps']} model swaps "
+        f"({summary['swaps_avoided']} avoided) | {summary['wall_s']:.1f}s]",
+        file=sys.stderr,
+    )
 
 
 def cmd_eval(args):
     """Run evaluation benchmark comparing base model vs adapter."""
     from locollm import adapter_manager, ollama_client
-    from locollm.eval import format_results, load_dataset, run_eval
+    from locollm.eval import (
+        DEFAULT_CHECKPOINT_DIR,
+        EvalCheckpoint,
+        capped_options,
+        early_stop_summary,
+        format_results,
+        latency_summary,
+        load_dataset,
+        run_eval,
+        run_eval_concurrent,
+    )
+
+    if args.concurrency < 1:
+        print("Error: --concurrency must be at least 1.")
+        sys.exit(1)
 
     if not ollama_client.check_running():
         print("Error: Ollama is not running. Start it with: ollama serve")
@@ -117,33 +204,154 @@ def cmd_eval(args):
     adapter_model = adapter_manager.adapter_model_name(adapter_name)
 
     # Check adapter model exists
-    installed = ollama_client.list_models()
-    installed_base = {m.split(":")[0] for m in installed}
-    if adapter_model not in installed_base:
+    if adapter_model not in ollama_client.installed_base_names():
         print("Adapter model not found. Run 'loco setup' first.")
         sys.exit(1)
 
-    # Run base model eval
-    print(f"\nEvaluating base model ({base_model})...")
-    base_correct, base_total, _ = run_eval(base_model, dataset, eval_type=eval_type)
+    concurrent = args.concurrency > 1 or args.interleave
 
-    # Run adapter eval
-    print(f"\nEvaluating adapter model ({adapter_model})...")
-    adapter_correct, adapter_total, _ = run_eval(adapter_model, dataset, eval_type=eval_type)
+    options = capped_options({**adapter_manager.eval_options(), **_inference_options(args)})
+    print(f"Options: {', '.join(f'{k}={v}' for k, v in sorted(options.items()))}")
+
+    cache = None
+    if not args.no_cache:
+        from locollm.response_cache import ResponseCache
+
+        cache = ResponseCache(read=not args.refresh)
+
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    checkpoint_path = Path(args.checkpoint or DEFAULT_CHECKPOINT_DIR / f"{adapter_name}.jsonl")
+    settings = {"options": options, "early_stop": not args.no_early_stop}
+    try:
+        checkpoint = EvalCheckpoint(
+            checkpoint_path, resume=args.resume, force=args.force, settings=settings
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    with checkpoint:
+        if args.resume:
+            print(f"Resuming from {checkpoint_path} ({len(checkpoint)} items already scored)")
+
+        if concurrent:
+            if args.interleave:
+                print(f"\nEvaluating {base_model} and {adapter_model} interleaved...")
+            summary = run_eval_concurrent(
+                [base_model, adapter_model],
+                dataset,
+                eval_type=eval_type,
+                concurrency=args.concurrency,
+                interleave=args.interleave,
+                cache=cache,
+                checkpoint=checkpoint,
+                options=options,
+                early_stop=not args.no_early_stop,
+            )
+            base_correct, base_total, base_results = summary[base_model]
+            adapter_correct, adapter_total, adapter_results = summary[adapter_model]
+        else:
+            # Run base model eval
+            print(f"\nEvaluating base model ({base_model})...")
+            base_correct, base_total, base_results = run_eval(
+                base_model,
+                dataset,
+                eval_type=eval_type,
+                cache=cache,
+                checkpoint=checkpoint,
+                options=options,
+                early_stop=not args.no_early_stop,
+            )
+
+            # Run adapter eval
+            print(f"\nEvaluating adapter model ({adapter_model})...")
+            adapter_correct, adapter_total, adapter_results = run_eval(
+                adapter_model,
+                dataset,
+                eval_type=eval_type,
+                cache=cache,
+                checkpoint=checkpoint,
+                options=options,
+                early_stop=not args.no_early_stop,
+            )
+    wall_s = time.perf_counter() - started
+    if args.checkpoint is None:
+        # The run finished, so there is nothing left to resume
+        checkpoint_path.unlink(missing_ok=True)
 
     format_results(base_correct, base_total, adapter_correct, adapter_total, adapter_name, base_model)
+    for label, results in ((base_model, base_results), (adapter_model, adapter_results)):
+        latency = latency_summary(results)
+        if latency:
+            print(f"  {label}: {latency.display()}")
+        stopped, saved = early_stop_summary(results)
+        if stopped:
+            print(f"  {label}: stopped {stopped} answers early (up to {saved} tokens saved)")
+    if cache is not None:
+        print(f"  {cache.stats_display()}")
+
+    if not args.no_results:
+        from locollm.eval_report import build_report, default_report_path, write_report
+
+        report = build_report(
+            adapter_name,
+            config,
+            eval_type,
+            dataset_path,
+            {
+                "base": (base_model, ollama_client.model_digest(base_model), base_results),
+                "adapter": (
+                    adapter_model,
+                    ollama_client.model_digest(adapter_model),
+                    adapter_results,
+                ),
+            },
+            options=options,
+            early_stop=not args.no_early_stop,
+            started_at=started_at,
+            wall_s=wall_s,
+        )
+        results_path = Path(
+            args.results or default_report_path(adapter_name, config.get("version"), started_at)
+        )
+        write_report(report, results_path)
+        print(f"  results: {results_path}")
+
+
+def cmd_rescore(args):
+    """Re-score saved eval results with the current scoring rules, offline."""
+    from locollm.rescore import rescore_files
+
+    started = time.perf_counter()
+    try:
+        results = rescore_files(
+            args.paths, dataset_path=args.dataset, workers=args.workers, write=args.write
+        )
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot rescore: {e}")
+        sys.exit(1)
+    items = 0
+    for result in results:
+        print(result.display())
+        items += sum(counts[3] for counts in result.models.values())
+    elapsed = time.perf_counter() - started
+    print(f"Rescored {items} items in {len(results)} files in {elapsed:.1f}s")
+    if not args.write and any(result.changed for result in results):
+        print("(dry run: pass --write to update the files)")
 
 
 def cmd_route(args):
     """Show which adapter the router would pick for a query."""
-    from locollm.router import KeywordRouter
+    from locollm.router import get_router
 
-    router = KeywordRouter()
+    router = get_router()
     result = router.route(args.query)
     if result:
         print(result)
     else:
         print("base model")
+    if args.timing:
+        print(router.metrics.display())
 
 
 def _handle_adapter_command(session, arg):
@@ -184,16 +392,25 @@ Tips:
 
 def cmd_chat(args):
     """Interactive multi-turn chat session."""
-    from locollm import ollama_client
+    from locollm import adapter_manager, ollama_client
     from locollm.chat_session import ChatSession
 
     if not ollama_client.check_running():
         print("Error: Ollama is not running. Start it with: ollama serve")
         sys.exit(1)
 
+    # --context-limit and --num-ctx name the same window: either sets both
+    options = _inference_options(args)
+    if args.context_limit is not None:
+        options.setdefault("num_ctx", args.context_limit)
+    base_options = adapter_manager.inference_options(adapter_manager.get_base_model_name())
+    context_limit = options.get("num_ctx") or base_options.get("num_ctx") or 8192
+
     session = ChatSession(
         adapter=args.adapter,
-        context_limit=args.context_limit,
+        context_limit=context_limit,
+        summarize=not args.no_summary,
+        options=options or None,
     )
 
     mode_info = f"adapter: {args.adapter}" if args.adapter != "auto" else "auto-routing"
@@ -227,6 +444,9 @@ def cmd_chat(args):
             continue
         elif command == "/stats":
             print(session.session_stats_display())
+            print(session.context_display())
+            if session.router.metrics.calls:
+                print(session.router.metrics.display())
             continue
         elif command == "/nudge":
             state = session.toggle_nudge()
@@ -237,6 +457,9 @@ def cmd_chat(args):
             continue
 
         session.add_user_message(user_input)
+        notice = session.fit_context()
+        if notice:
+            print(notice)
 
         full_response = []
         meta = None
@@ -256,11 +479,79 @@ def cmd_chat(args):
             notice = session.maybe_compact(meta.get("prompt_eval_count", 0))
             if notice:
                 print(notice)
+        notice = session.maybe_summarize()
+        if notice:
+            print(notice)
 
         if session.nudge_enabled:
             print(f"\n💬 {session.next_nudge()}\n")
 
 
+def cmd_warm(args):
+    """Preload models so the first query doesn't pay a cold load."""
+    from locollm import adapter_manager, ollama_client
+
+    if not ollama_client.check_running():
+        print("Error: Ollama is not running. Start it with: ollama serve")
+        sys.exit(1)
+
+    if args.adapters:
+        models = []
+        for name in args.adapters:
+            if name == "base":
+                models.append(adapter_manager.get_base_model_name())
+            elif adapter_manager.get_adapter(name) is None:
+                print(f"Error: Adapter '{name}' not found in registry.")
+                sys.exit(1)
+            else:
+                models.append(adapter_manager.adapter_model_name(name))
+    else:
+        models = adapter_manager.preload_models()
+        if not models:
+            print("No models have 'preload' or 'pin' set in registry.yaml.")
+            return
+
+    installed = ollama_client.installed_base_names()
+    failed = 0
+    for model in models:
+        if model.partition(":")[0] not in installed:
+            print(f"{model}: not installed. Run 'loco setup' first.")
+            failed += 1
+            continue
+        keep_alive = adapter_manager.keep_alive_for(model)
+        print(f"Warming {model}...", end=" ", flush=True)
+        load_s = ollama_client.load_model(model) / 1e9
+        kept = "Ollama default" if keep_alive is None else keep_alive
+        print(f"ready (loaded in {load_s:.1f}s, keep_alive: {kept})")
+    if failed:
+        sys.exit(1)
+
+
+def cmd_serve(args):
+    """Run the OpenAI-compatible gateway until interrupted."""
+    from locollm import ollama_client
+    from locollm.server import Gateway, make_server
+
+    if not ollama_client.check_running():
+        print("Error: Ollama is not running. Start it with: ollama serve")
+        sys.exit(1)
+
+    gateway = Gateway(max_sessions=args.max_sessions, session_ttl=args.session_ttl)
+    try:
+        server = make_server(gateway, args.host, args.port)
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e}")
+        sys.exit(1)
+    host, port = server.server_address[:2]
+    print(f"LocoLLM gateway on http://{host}:{port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+
+
 def cmd_adapters_list(args):
     """List all registered adapters."""
     from locollm import adapter_manager
@@ -278,47 +569,246 @@ def cmd_adapters_list(args):
         print(f"{name:<15} {atype:<15} {desc}")
 
 
+class _VersionAction(argparse.Action):
+    """--version that looks the version up only when asked for."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, **kwargs):
+        kwargs.setdefault("help", "show program's version number and exit")
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from locollm import __version__
+
+        print(f"{parser.prog} {__version__}")
+        parser.exit()
+
+
+# (flag, Ollama option, type, help) for the options shared by query, chat and eval
+_INFERENCE_FLAGS = (
+    ("--temperature", "temperature", float, "Sampling temperature (0 = greedy)"),
+    ("--top-p", "top_p", float, "Nucleus sampling probability cutoff"),
+    ("--seed", "seed", int, "Random seed for reproducible sampling"),
+    ("--num-ctx", "num_ctx", int, "Context window size in tokens"),
+    ("--num-predict", "num_predict", int, "Maximum number of tokens to generate"),
+    ("--num-thread", "num_thread", int, "CPU threads to use"),
+    ("--num-gpu", "num_gpu", int, "Number of layers to offload to the GPU"),
+)
+
+
+def _inference_parser():
+    """Return a parent parser holding the inference-option flags."""
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group(
+        "inference options", "override the `options` in registry.yaml for this run"
+    )
+    for flag, name, type_, help_text in _INFERENCE_FLAGS:
+        metavar = "N" if type_ is int else "X"
+        group.add_argument(flag, dest=f"opt_{name}", type=type_, metavar=metavar, help=help_text)
+    return parser
+
+
+def _inference_options(args):
+    """Return the inference options given on the command line, as a new dict."""
+    options = {}
+    for _, name, _, _ in _INFERENCE_FLAGS:
+        value = getattr(args, f"opt_{name}", None)
+        if value is not None:
+            options[name] = value
+    return options
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog="loco",
         description="LocoLLM: Local Collaborative LLMs",
     )
-    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("--version", action=_VersionAction)
     subparsers = parser.add_subparsers(dest="command")
+    inference = _inference_parser()
 
     # setup
     sp_setup = subparsers.add_parser("setup", help="Pull base model and register adapters")
+    sp_setup.add_argument(
+        "--concurrency",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Adapter models to create at once (default: 2)",
+    )
     sp_setup.set_defaults(func=cmd_setup)
 
     # query
-    sp_query = subparsers.add_parser("query", help="Query a model")
-    sp_query.add_argument("prompt", help="The prompt to send")
+    sp_query = subparsers.add_parser("query", help="Query a model", parents=[inference])
+    sp_query.add_argument("prompt", nargs="?", help="The prompt to send")
     sp_query.add_argument("--adapter", help="Name of adapter to use")
     sp_query.add_argument(
         "--no-route",
         action="store_true",
         help="Bypass router and use base model directly",
     )
+    sp_query.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print token counts and latency (TTFT, chunk gaps, model load) to stderr",
+    )
+    sp_query.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Read prompts from a JSONL file ('-' for stdin) and write JSONL results",
+    )
+    sp_query.add_argument(
+        "--output", metavar="FILE", help="Write batch results here instead of stdout"
+    )
+    sp_query.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Batch prompts to keep in flight at once (default: 4)",
+    )
     sp_query.set_defaults(func=cmd_query)
 
     # chat
-    sp_chat = subparsers.add_parser("chat", help="Interactive multi-turn chat session")
+    sp_chat = subparsers.add_parser(
+        "chat", help="Interactive multi-turn chat session", parents=[inference]
+    )
     sp_chat.add_argument("--adapter", default="auto", help="Adapter to use (default: auto)")
     sp_chat.add_argument(
-        "--context-limit", type=int, default=8192, help="Context window limit (default: 8192)"
+        "--context-limit",
+        type=int,
+        help="Context window limit (default: the registry's num_ctx, else 8192)",
+    )
+    sp_chat.add_argument(
+        "--no-summary",
+        action="store_true",
+        help="Drop old messages instead of folding them into a running summary",
     )
     sp_chat.set_defaults(func=cmd_chat)
 
     # eval
-    sp_eval = subparsers.add_parser("eval", help="Run evaluation benchmark")
+    sp_eval = subparsers.add_parser(
+        "eval",
+        help="Run evaluation benchmark",
+        parents=[inference],
+        epilog="Run 'loco rescore RESULTS...' to re-score saved results offline.",
+    )
     sp_eval.add_argument("adapter_name", help="Name of adapter to evaluate")
+    sp_eval.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Keep N requests in flight at once (default: 1, serial)",
+    )
+    sp_eval.add_argument(
+        "--interleave",
+        action="store_true",
+        help="Evaluate base and adapter models together instead of back to back",
+    )
+    sp_eval.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always query the models; neither read nor write the response cache",
+    )
+    sp_eval.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses but store the fresh ones",
+    )
+    sp_eval.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="JSONL file recording each scored item (default: per-adapter file in the cache, "
+        "removed once the run completes)",
+    )
+    sp_eval.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip items already scored in the checkpoint from an interrupted run",
+    )
+    sp_eval.add_argument(
+        "--force",
+        action="store_true",
+        help="Start over even if the checkpoint holds an unfinished run's progress",
+    )
+    sp_eval.add_argument(
+        "--no-early-stop",
+        action="store_true",
+        help="Read every answer to the end instead of stopping once it is scored",
+    )
+    sp_eval.add_argument(
+        "--results",
+        metavar="PATH",
+        help="Write the structured results JSON here (default: timestamped file in the cache)",
+    )
+    sp_eval.add_argument(
+        "--no-results",
+        action="store_true",
+        help="Do not write a results JSON file",
+    )
     sp_eval.set_defaults(func=cmd_eval)
 
+    # rescore
+    sp_rescore = subparsers.add_parser(
+        "rescore",
+        help="Re-score saved eval results offline",
+        description="Re-score saved results files with the current scoring rules, "
+        "without querying Ollama.",
+    )
+    sp_rescore.add_argument("paths", nargs="+", metavar="RESULTS", help="Results JSON files")
+    sp_rescore.add_argument(
+        "--dataset", metavar="PATH", help="Dataset to score against (default: each file's own)"
+    )
+    sp_rescore.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Worker processes for scoring (default: one per CPU)",
+    )
+    sp_rescore.add_argument(
+        "--write", action="store_true", help="Update the files in place with the new scores"
+    )
+    sp_rescore.set_defaults(func=cmd_rescore)
+
     # route
     sp_route = subparsers.add_parser("route", help="Show which adapter the router would pick")
     sp_route.add_argument("query", help="The query to route")
+    sp_route.add_argument("--timing", action="store_true", help="Also print routing latency")
     sp_route.set_defaults(func=cmd_route)
 
+    # warm
+    sp_warm = subparsers.add_parser("warm", help="Preload models into Ollama's memory")
+    sp_warm.add_argument(
+        "adapters",
+        nargs="*",
+        help="Adapters to load ('base' for the base model; default: those marked preload)",
+    )
+    sp_warm.set_defaults(func=cmd_warm)
+
+    # serve
+    sp_serve = subparsers.add_parser(
+        "serve", help="Run an OpenAI-compatible API gateway with auto-routing"
+    )
+    sp_serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    sp_serve.add_argument(
+        "--port", type=int, default=8080, help="Port to listen on (default: 8080)"
+    )
+    sp_serve.add_argument(
+        "--max-sessions",
+        type=int,
+        default=256,
+        metavar="N",
+        help="Server-side conversations (X-Session-Id) to keep at once (default: 256)",
+    )
+    sp_serve.add_argument(
+        "--session-ttl",
+        type=float,
+        default=1800,
+        metavar="SECONDS",
+        help="Forget a conversation after this long idle (default: 1800)",
+    )
+    sp_serve.set_defaults(func=cmd_serve)
+
     # adapters
     sp_adapters = subparsers.add_parser("adapters", help="Manage adapters")
     adapters_sub = sp_adapters.add_subparsers(dest="adapters_command")
@@ -1,10 +1,22 @@
 """Evaluation harness: runs a mini benchmark comparing base model vs adapter."""
 
 import ast
+import asyncio
+import contextlib
+import functools
 import json
 import re
+from pathlib import Path
 
-from locollm import ollama_client
+from locollm import async_ollama_client, ollama_client
+from locollm.response_cache import DEFAULT_CACHE_DIR, cache_key
+from locollm.timing import LatencyStats, StreamTimer
+
+# Where `loco eval` keeps per-adapter checkpoints unless told otherwise
+DEFAULT_CHECKPOINT_DIR = DEFAULT_CACHE_DIR.parent / "checkpoints"
+
+# Tokens an eval answer may run to when no num_predict is configured
+EVAL_NUM_PREDICT = 512
 
 
 def load_dataset(path):
@@ -18,6 +30,14 @@ def load_dataset(path):
     return problems
 
 
+# Scoring patterns, compiled once: rescoring runs them over many stored responses
+_ANSWER_IS = re.compile(r"(?:the answer is|answer:?)\s*[\\$]*\s*(-?[\d,]+\.?\d*)", re.IGNORECASE)
+_BOXED = re.compile(r"\\boxed\{(-?[\d,]+\.?\d*)\}")
+_EQUALS_AT_EOL = re.compile(r"=\s*\$?\s*(-?[\d,]+\.?\d*)\s*\$?\s*$", re.MULTILINE)
+_NUMBER = re.compile(r"-?[\d,]+\.?\d*")
+_CODE_BLOCK = re.compile(r"```(?:python)?\s*\n(.*?)```", re.DOTALL)
+
+
 def extract_number(text):
     """Extract the final numeric answer from model output.
 
@@ -25,22 +45,22 @@ def extract_number(text):
     at the end of the text. Returns None if no number is found.
     """
     # Try "the answer is <number>" pattern
-    m = re.search(r"(?:the answer is|answer:?)\s*[\\$]*\s*(-?[\d,]+\.?\d*)", text, re.IGNORECASE)
+    m = _ANSWER_IS.search(text)
     if m:
         return _parse_number(m.group(1))
 
     # Try boxed answer (LaTeX): \boxed{42}
-    m = re.search(r"\\boxed\{(-?[\d,]+\.?\d*)\}", text)
+    m = _BOXED.search(text)
     if m:
         return _parse_number(m.group(1))
 
     # Try "= <number>" at end of a line
-    m = re.search(r"=\s*\$?\s*(-?[\d,]+\.?\d*)\s*\$?\s*$", text, re.MULTILINE)
+    m = _EQUALS_AT_EOL.search(text)
     if m:
         return _parse_number(m.group(1))
 
     # Fall back to last number in the text
-    matches = re.findall(r"-?[\d,]+\.?\d*", text)
+    matches = _NUMBER.findall(text)
     if matches:
         return _parse_number(matches[-1])
 
@@ -64,16 +84,21 @@ def check_code_syntax(text):
     the full text. Returns True if ast.parse() succeeds.
     """
     # Try to extract from markdown code blocks
-    blocks = re.findall(r"```(?:python)?\s*\n(.*?)```", text, re.DOTALL)
+    blocks = _CODE_BLOCK.findall(text)
     if blocks:
         code = "\n".join(blocks)
     else:
         code = text
+    return _parses(code)
+
 
+@functools.lru_cache(maxsize=4096)
+def _parses(code):
+    """Return True if code is valid Python; memoised, as identical answers recur."""
     try:
         ast.parse(code)
         return True
-    except SyntaxError:
+    except (SyntaxError, ValueError):
         return False
 
 
@@ -90,14 +115,297 @@ def check_contains_answer(text, answer):
     return answer.lower() in text.lower()
 
 
-def run_eval(model_name, dataset, eval_type="numeric"):
-    """Run evaluation on a model. Returns (correct, total, results_list).
+EVAL_TYPES = ("numeric", "code", "analysis")
+
+
+def answer_settled(problem, text, eval_type="numeric"):
+    """Return True once no further output can change how text scores.
+
+    A numeric answer is settled by an "the answer is <number>" match with at
+    least one character after it, so the number is complete: extract_number()
+    always prefers the first such match. An analysis answer is settled once the
+    expected answer appears. Code is only scored complete, so never settles.
+    """
+    if eval_type == "numeric":
+        m = _ANSWER_IS.search(text)
+        return m is not None and m.end() < len(text)
+    if eval_type == "analysis":
+        return check_contains_answer(text, problem["answer"])
+    return False
+
+
+def score_response(problem, response, eval_type="numeric"):
+    """Score one model response. Returns (is_correct, status_detail).
 
     eval_type controls scoring:
     - "numeric": extract a number and compare to expected answer
     - "code": check valid Python syntax + expected keywords present
     - "analysis": check that the answer string appears in the response
     """
+    if eval_type == "numeric":
+        expected = problem["answer"]
+        predicted = extract_number(response)
+        is_correct = predicted is not None and float(predicted) == float(expected)
+        status_detail = f"expected={expected}, got={predicted}"
+
+    elif eval_type == "code":
+        expected_keywords = problem.get("answer_keywords", [])
+        syntax_ok = check_code_syntax(response)
+        keywords_ok = check_keywords(response, expected_keywords)
+        is_correct = syntax_ok and keywords_ok
+        status_detail = (
+            f"syntax={'OK' if syntax_ok else 'FAIL'}, keywords={'OK' if keywords_ok else 'MISS'}"
+        )
+
+    elif eval_type == "analysis":
+        expected = problem["answer"]
+        is_correct = check_contains_answer(response, expected)
+        status_detail = f"expected='{expected}', found={is_correct}"
+
+    else:
+        raise ValueError(f"Unknown eval_type: {eval_type}")
+
+    return is_correct, status_detail
+
+
+def _lookup(cache, key):
+    """Return the cached response for key, or None when caching is off."""
+    if cache is None or key is None:
+        return None
+    return cache.get(key)
+
+
+def _cache_key(cache, digest, prompt, options=None):
+    """Cache key for a prompt, or None if the model digest is unknown."""
+    if cache is None or digest is None:
+        return None
+    return cache_key(digest, prompt, options)
+
+
+def capped_options(options=None):
+    """Return eval request options with a finite num_predict.
+
+    Eval never generates unbounded output: a missing or negative (unlimited)
+    num_predict becomes EVAL_NUM_PREDICT.
+    """
+    options = dict(options or {})
+    if options.get("num_predict") is None or options["num_predict"] < 0:
+        options["num_predict"] = EVAL_NUM_PREDICT
+    return options
+
+
+def _effective_options(model_name, options, early_stop=False):
+    """The options a request will carry, registry defaults included (for cache keys).
+
+    Early-stopped responses are truncated, so they are cached apart from full ones.
+    """
+    key_options = {**ollama_client.registry_options(model_name), **options}
+    if early_stop:
+        key_options["early_stop"] = True
+    return key_options
+
+
+def _early_stop_note(meta):
+    return "stopped early" if meta and meta.get("early_stop") else None
+
+
+def _format_status(is_correct, status_detail, note=None):
+    status = "OK" if is_correct else "MISS"
+    suffix = f" [{note}]" if note else ""
+    return f"{status}  ({status_detail}){suffix}"
+
+
+class EvalCheckpoint:
+    """Append-only JSONL log of scored items, used to resume interrupted runs.
+
+    The first line is a header holding `settings`, the options the items
+    were generated with; each later line records one item: the model, its
+    dataset index, the question and the response. Opening with resume=True
+    loads the recorded items so they can be skipped, and raises ValueError
+    if the log was written with different settings. Otherwise a fresh log
+    is started, but an existing one is only overwritten with force=True
+    (FileExistsError otherwise), so an interrupted run's progress is not
+    lost by accident.
+    """
+
+    def __init__(self, path, resume=False, force=False, settings=None):
+        self.path = Path(path)
+        self.settings = _normalise(settings)
+        self._done = {}
+        exists = self.path.exists() and self.path.stat().st_size > 0
+        if exists and not (resume or force):
+            raise FileExistsError(
+                f"{self.path} holds progress from an earlier run; "
+                "pass --resume to continue it or --force to start over"
+            )
+        header = False
+        if resume and exists:
+            header = self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w")  # noqa: SIM115
+        if not header:
+            self._file.write(json.dumps({"settings": self.settings}) + "\n")
+            self._file.flush()
+
+    def _load(self):
+        """Read recorded items; return True if the log has a header to append to."""
+        header = None
+        with open(self.path, "rb+") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn final line from a crash; that item is simply redone
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if header is None and "settings" in record:
+                    header = record
+                    continue
+                with contextlib.suppress(KeyError, TypeError):
+                    self._done[(record["model"], record["index"])] = record
+            # Appending after a torn line would merge the next record into it
+            f.truncate(end)
+        if header is None and not self._done:
+            return False
+        recorded = header.get("settings") if header is not None else None
+        if recorded != self.settings:
+            raise ValueError(
+                f"{self.path} was written with different settings ({recorded}, now "
+                f"{self.settings}); pass --force instead of --resume to start over"
+            )
+        return True
+
+    def __len__(self):
+        return len(self._done)
+
+    def get(self, model_name, index, question):
+        """Return the recorded result for an item, or None if it must be (re)run."""
+        record = self._done.get((model_name, index))
+        if record is None or record.get("question") != question:
+            return None
+        return record
+
+    def record(self, model_name, index, result):
+        """Append a scored item and flush it to disk."""
+        record = {"model": model_name, "index": index, **result}
+        self._done[(model_name, index)] = record
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _normalise(settings):
+    """Settings as they read back from JSON, so tuples and lists compare equal."""
+    return json.loads(json.dumps(settings)) if settings is not None else None
+
+
+def _collect(stream):
+    """Join a (text, meta) stream into the full text and the final meta."""
+    parts = []
+    meta = None
+    for chunk, chunk_meta in stream:
+        parts.append(chunk)
+        if chunk_meta is not None:
+            meta = chunk_meta
+    return "".join(parts), meta
+
+
+def _early_stop_meta(timer, options):
+    """Meta for a response cut short: client timings plus streamed-token counts.
+
+    Ollama streams one token per chunk, so the chunk count stands in for
+    eval_count and the span from first to last chunk for eval_duration.
+    tokens_saved is an upper bound: the num_predict cap minus tokens generated.
+    """
+    meta = timer.as_meta()
+    tokens = meta["chunks"]
+    meta["eval_count"] = tokens
+    meta["eval_duration"] = int(sum(timer.gaps) * 1e9)
+    meta["early_stop"] = True
+    meta["tokens_saved"] = max(options.get("num_predict", EVAL_NUM_PREDICT) - tokens, 0)
+    return meta
+
+
+def _collect_until_settled(stream, problem, eval_type, timer, options):
+    """Like _collect(), but close the stream as soon as answer_settled()."""
+    parts = []
+    meta = None
+    try:
+        for chunk, chunk_meta in stream:
+            parts.append(chunk)
+            if chunk_meta is not None:
+                meta = chunk_meta
+            elif chunk:
+                timer.chunk()
+                if answer_settled(problem, "".join(parts), eval_type):
+                    meta = _early_stop_meta(timer, options)
+                    break
+    finally:
+        # Hanging up is what stops the server generating
+        if hasattr(stream, "close"):
+            stream.close()
+    return "".join(parts), meta
+
+
+def early_stop_summary(results):
+    """Return (answers cut short, upper bound on tokens saved) over results."""
+    stopped = saved = 0
+    for result in results:
+        meta = result.get("meta") or {}
+        if meta.get("early_stop"):
+            stopped += 1
+            saved += meta["tokens_saved"]
+    return stopped, saved
+
+
+def latency_summary(results):
+    """Return a LatencyStats over the results that were generated, not cached."""
+    stats = LatencyStats()
+    for result in results:
+        stats.add(result.get("meta"))
+    return stats
+
+
+def run_eval(
+    model_name,
+    dataset,
+    eval_type="numeric",
+    client=None,
+    cache=None,
+    checkpoint=None,
+    options=None,
+    early_stop=False,
+):
+    """Run evaluation on a model. Returns (correct, total, results_list).
+
+    client is an OllamaClient (or anything with the same generate()); it
+    defaults to the shared pooled client so every question reuses one connection.
+    cache is an optional ResponseCache consulted before querying the model.
+    checkpoint is an optional EvalCheckpoint: each scored item is appended to
+    it, and items it already holds are re-scored from the stored response.
+    options are inference options for every request, capped by capped_options().
+    With early_stop, each response is read only until answer_settled(), then
+    the request is cancelled; its meta records early_stop and tokens_saved.
+    See score_response() for how eval_type controls scoring.
+    """
+    if client is None:
+        client = ollama_client.get_client()
+    options = capped_options(options)
+    digest = client.model_digest(model_name) if cache is not None else None
+    key_options = None
+    if cache is not None:
+        key_options = _effective_options(model_name, options, early_stop)
     correct = 0
     total = len(dataset)
     results = []
@@ -106,47 +414,243 @@ def run_eval(model_name, dataset, eval_type="numeric"):
         question = problem["question"]
         print(f"  [{i}/{total}] ", end="", flush=True)
 
-        # Collect full response (non-streaming for eval)
-        response = ollama_client.generate(model_name, question, stream=False)
-
-        if eval_type == "numeric":
-            expected = problem["answer"]
-            predicted = extract_number(response)
-            is_correct = predicted is not None and float(predicted) == float(expected)
-            status_detail = f"expected={expected}, got={predicted}"
-
-        elif eval_type == "code":
-            expected_keywords = problem.get("answer_keywords", [])
-            syntax_ok = check_code_syntax(response)
-            keywords_ok = check_keywords(response, expected_keywords)
-            is_correct = syntax_ok and keywords_ok
-            status_detail = f"syntax={'OK' if syntax_ok else 'FAIL'}, keywords={'OK' if keywords_ok else 'MISS'}"
-
-        elif eval_type == "analysis":
-            expected = problem["answer"]
-            is_correct = check_contains_answer(response, expected)
-            status_detail = f"expected='{expected}', found={is_correct}"
-
+        prior = checkpoint.get(model_name, i - 1, question) if checkpoint else None
+        meta = None
+        if prior is not None:
+            response, cached, note = prior["response"], prior.get("cached", False), "resumed"
+            meta = prior.get("meta")
         else:
-            raise ValueError(f"Unknown eval_type: {eval_type}")
+            key = _cache_key(cache, digest, question, key_options)
+            response = _lookup(cache, key)
+            cached = response is not None
+            if not cached:
+                # Streamed, so the meta carries client-side TTFT and chunk gaps
+                timer = StreamTimer()
+                stream = client.generate(model_name, question, with_meta=True, options=options)
+                if early_stop:
+                    response, meta = _collect_until_settled(
+                        stream, problem, eval_type, timer, options
+                    )
+                else:
+                    response, meta = _collect(stream)
+                if key is not None:
+                    cache.put(key, response)
+            note = "cached" if cached else _early_stop_note(meta)
+        is_correct, status_detail = score_response(problem, response, eval_type)
 
         if is_correct:
             correct += 1
 
-        status = "OK" if is_correct else "MISS"
-        print(f"{status}  ({status_detail})")
+        print(_format_status(is_correct, status_detail, note))
 
-        results.append(
-            {
-                "question": question,
-                "correct": is_correct,
-                "response": response,
-            }
-        )
+        result = {
+            "question": question,
+            "correct": is_correct,
+            "detail": status_detail,
+            "response": response,
+            "cached": cached,
+            "meta": meta,
+        }
+        if checkpoint is not None and prior is None:
+            checkpoint.record(model_name, i - 1, result)
+        results.append(result)
 
     return correct, total, results
 
 
+def run_eval_concurrent(
+    model_names,
+    dataset,
+    eval_type="numeric",
+    concurrency=4,
+    interleave=False,
+    client=None,
+    cache=None,
+    checkpoint=None,
+    options=None,
+    early_stop=False,
+):
+    """Evaluate one or more models with up to `concurrency` requests in flight.
+
+    Returns {model_name: (correct, total, results_list)}, with each results
+    list in dataset order regardless of completion order. With interleave,
+    every model's items share one queue (item 1 for each model, then item 2,
+    ...), so all models finish together; otherwise models run one after the
+    other. client is an AsyncOllamaClient (or pool); by default one sized to
+    `concurrency` is created for the run. cache, checkpoint, options and
+    early_stop are as for run_eval().
+    """
+    if eval_type not in EVAL_TYPES:
+        raise ValueError(f"Unknown eval_type: {eval_type}")
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    run = _ConcurrentEval(
+        dataset,
+        eval_type,
+        concurrency,
+        client,
+        cache,
+        checkpoint,
+        capped_options(options),
+        early_stop,
+    )
+    return asyncio.run(run.run(model_names, interleave))
+
+
+class _ConcurrentEval:
+    """State shared by the workers of one run_eval_concurrent() call."""
+
+    def __init__(
+        self, dataset, eval_type, concurrency, client, cache, checkpoint, options, early_stop
+    ):
+        self.dataset = dataset
+        self.eval_type = eval_type
+        self.concurrency = concurrency
+        self.client = client
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.options = options
+        self.early_stop = early_stop
+        self.digests = {}
+        self.results = {}
+
+    async def run(self, model_names, interleave):
+        owns_client = self.client is None
+        if owns_client:
+            self.client = async_ollama_client.default_client(max_connections=self.concurrency)
+        self.results = {name: [None] * len(self.dataset) for name in model_names}
+        try:
+            if self.cache is not None:
+                for name in model_names:
+                    self.digests[name] = await self.client.model_digest(name)
+            if interleave:
+                jobs = [(name, i) for i in range(len(self.dataset)) for name in model_names]
+                await self._run_jobs(jobs)
+            else:
+                for name in model_names:
+                    print(f"\nEvaluating {name} (concurrency {self.concurrency})...")
+                    await self._run_jobs([(name, i) for i in range(len(self.dataset))])
+        finally:
+            if owns_client:
+                await self.client.close()
+
+        summary = {}
+        for name, items in self.results.items():
+            correct = sum(1 for r in items if r["correct"])
+            summary[name] = (correct, len(items), items)
+        return summary
+
+    def _resume(self, name, i):
+        """Fill in a checkpointed item without querying. Returns its status line."""
+        problem = self.dataset[i]
+        prior = self.checkpoint.get(name, i, problem["question"]) if self.checkpoint else None
+        if prior is None:
+            return None
+        is_correct, status_detail = score_response(problem, prior["response"], self.eval_type)
+        self.results[name][i] = {
+            "question": problem["question"],
+            "correct": is_correct,
+            "detail": status_detail,
+            "response": prior["response"],
+            "cached": prior.get("cached", False),
+            "meta": prior.get("meta"),
+        }
+        return _format_status(is_correct, status_detail, "resumed")
+
+    async def _eval_item(self, name, i):
+        problem = self.dataset[i]
+        question = problem["question"]
+        key = None
+        if self.cache is not None:
+            key_options = _effective_options(name, self.options, self.early_stop)
+            key = _cache_key(self.cache, self.digests.get(name), question, key_options)
+        response = _lookup(self.cache, key)
+        cached = response is not None
+        meta = None
+        if not cached:
+            if self.early_stop:
+                response, meta = await self._generate_until_settled(name, problem)
+            else:
+                response, meta = await self.client.generate_with_meta(
+                    name, question, options=self.options
+                )
+            if key is not None:
+                self.cache.put(key, response)
+        is_correct, status_detail = score_response(problem, response, self.eval_type)
+        result = {
+            "question": question,
+            "correct": is_correct,
+            "detail": status_detail,
+            "response": response,
+            "cached": cached,
+            "meta": meta,
+        }
+        self.results[name][i] = result
+        if self.checkpoint is not None:
+            self.checkpoint.record(name, i, result)
+        note = "cached" if cached else _early_stop_note(meta)
+        return _format_status(is_correct, status_detail, note)
+
+    async def _generate_until_settled(self, name, problem):
+        """Async counterpart of _collect_until_settled()."""
+        timer = StreamTimer()
+        parts = []
+        meta = None
+        stream = self.client.generate(
+            name, problem["question"], with_meta=True, options=self.options
+        )
+        # aclosing aborts the request, and so the generation, on break
+        async with contextlib.aclosing(stream):
+            async for chunk, chunk_meta in stream:
+                parts.append(chunk)
+                if chunk_meta is not None:
+                    meta = chunk_meta
+                elif chunk:
+                    timer.chunk()
+                    if answer_settled(problem, "".join(parts), self.eval_type):
+                        meta = _early_stop_meta(timer, self.options)
+                        break
+        return "".join(parts), meta
+
+    async def _run_jobs(self, jobs):
+        """Drain (model_name, index) jobs through a bounded queue of workers."""
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        total = len(self.dataset)
+        label_width = max(len(name) for name, _ in jobs) if jobs else 0
+
+        # Checkpointed items never reach the queue
+        pending = []
+        for name, i in jobs:
+            line = self._resume(name, i)
+            if line is None:
+                pending.append((name, i))
+            else:
+                print(f"  [{name:<{label_width}} {i + 1}/{total}] {line}")
+        jobs = pending
+
+        async def producer():
+            for job in jobs:
+                await queue.put(job)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def worker():
+            while (job := await queue.get()) is not None:
+                name, i = job
+                line = await self._eval_item(name, i)
+                print(f"  [{name:<{label_width}} {i + 1}/{total}] {line}")
+
+        tasks = [asyncio.create_task(producer())]
+        tasks += [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
 def format_results(base_correct, base_total, adapter_correct, adapter_total, adapter_name, base_model_name="base"):
     """Print a comparison table of base vs adapter results."""
     base_pct = base_correct / base_total * 100 if base_total else 0
@@ -0,0 +1,233 @@
+"""Machine-readable reports of `loco eval` runs.
+
+Each run writes one JSON document with everything needed to compare runs
+across adapter versions without scraping stdout: per-item correctness and
+timings, the digests of the models that answered, inference options, the
+host the run used (including its GPUs), and per-model aggregates.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+from datetime import datetime, timezone
+
+from locollm import __version__
+from locollm.eval import early_stop_summary
+from locollm.response_cache import DEFAULT_CACHE_DIR
+from locollm.timing import LatencyStats
+
+# Bump when a field is renamed or its meaning changes
+REPORT_SCHEMA = 1
+
+DEFAULT_RESULTS_DIR = DEFAULT_CACHE_DIR.parent / "results"
+
+
+def gpu_summary():
+    """Return the local NVIDIA GPUs as {"count", "devices": [{"name", "vram_bytes"}]}.
+
+    Read from nvidia-smi; returns "unknown" when it is missing or fails. Only
+    this machine's GPUs are seen, not those behind remote Ollama hosts.
+    """
+    nvidia_smi = shutil.which("nvidia-smi")
+    if nvidia_smi is None:
+        return "unknown"
+    try:
+        out = subprocess.run(
+            [nvidia_smi, "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        ).stdout
+        devices = []
+        for line in out.splitlines():
+            if line.strip():
+                name, vram_mib = line.rsplit(",", 1)
+                devices.append({"name": name.strip(), "vram_bytes": int(vram_mib) * 1024**2})
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return "unknown"
+    if not devices:
+        return "unknown"
+    return {"count": len(devices), "devices": devices}
+
+
+def host_summary():
+    """Return a short description of the machine running the eval."""
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = None
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "memory_bytes": memory,
+        "gpu": gpu_summary(),
+        "python": platform.python_version(),
+    }
+
+
+def _tok_s(tokens, duration_ns):
+    return round(tokens / (duration_ns / 1e9), 2) if duration_ns else None
+
+
+def _ms(duration_ns):
+    return round(duration_ns / 1e6, 1) if duration_ns else None
+
+
+def _tok_s_source(meta):
+    """Where an item's tok_s comes from: Ollama's counters, or client chunk timing."""
+    if not meta.get("eval_duration"):
+        return None
+    return "client" if meta.get("early_stop") else "server"
+
+
+def item_record(index, result):
+    """Flatten one run_eval() result into a report item.
+
+    The response text is kept so the report can be re-scored offline (see rescore).
+    tok_s_source says whether tok_s is Ollama's measurement ("server") or,
+    for an answer cut short by early stop, estimated from streamed chunks
+    ("client"); the two are not directly comparable.
+    """
+    meta = result.get("meta") or {}
+    return {
+        "index": index,
+        "question": result["question"],
+        "correct": result["correct"],
+        "detail": result.get("detail"),
+        "response": result["response"],
+        "cached": result.get("cached", False),
+        "early_stop": meta.get("early_stop", False),
+        "eval_count": meta.get("eval_count"),
+        "prompt_eval_count": meta.get("prompt_eval_count"),
+        "tok_s": _tok_s(meta.get("eval_count", 0), meta.get("eval_duration", 0)),
+        "tok_s_source": _tok_s_source(meta),
+        "ttft_ms": meta.get("ttft_ms"),
+        "gap_p50_ms": meta.get("gap_p50_ms"),
+        "gap_p95_ms": meta.get("gap_p95_ms"),
+        "load_ms": _ms(meta.get("load_duration", 0)),
+        "prompt_eval_ms": _ms(meta.get("prompt_eval_duration", 0)),
+        "total_ms": _ms(meta.get("total_duration", 0)),
+    }
+
+
+def _accuracy(items):
+    correct = sum(1 for item in items if item["correct"])
+    return {
+        "correct": correct,
+        "total": len(items),
+        "accuracy": round(correct / len(items), 4) if items else None,
+    }
+
+
+def model_summary(model, digest, results):
+    """Return the aggregate and per-item report section for one model.
+
+    tok_s counts only items Ollama timed itself, leaving out early-stopped
+    answers whose rate is a client-side estimate.
+    """
+    latency = LatencyStats()
+    eval_tokens = timed_tokens = timed_ns = 0
+    for result in results:
+        meta = result.get("meta") or {}
+        latency.add(meta)
+        eval_tokens += meta.get("eval_count", 0)
+        if not meta.get("early_stop"):
+            timed_tokens += meta.get("eval_count", 0)
+            timed_ns += meta.get("eval_duration", 0)
+    cached = sum(1 for r in results if r.get("cached"))
+    early_stopped, tokens_saved = early_stop_summary(results)
+    return {
+        "model": model,
+        "digest": digest,
+        **_accuracy(results),
+        "cached": cached,
+        "early_stopped": early_stopped,
+        "tokens_saved_max": tokens_saved,
+        "eval_tokens": eval_tokens,
+        "tok_s": _tok_s(timed_tokens, timed_ns),
+        "latency": latency.as_dict(),
+        "items": [item_record(i, r) for i, r in enumerate(results)],
+    }
+
+
+def build_report(
+    adapter_name,
+    adapter_config,
+    eval_type,
+    dataset_path,
+    runs,
+    options=None,
+    early_stop=False,
+    started_at=None,
+    wall_s=None,
+):
+    """Assemble a run report.
+
+    runs maps a role ("base", "adapter") to (model_name, digest, results),
+    where results is the list returned by run_eval() / run_eval_concurrent().
+    """
+    started_at = started_at or datetime.now(timezone.utc)
+    models = {
+        role: model_summary(model, digest, results)
+        for role, (model, digest, results) in runs.items()
+    }
+    report = {
+        "schema": REPORT_SCHEMA,
+        "locollm_version": __version__,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "wall_s": None if wall_s is None else round(wall_s, 2),
+        "adapter": {
+            "name": adapter_name,
+            "version": adapter_config.get("version"),
+            "type": adapter_config.get("type"),
+        },
+        "eval_type": eval_type,
+        "dataset": {"path": str(dataset_path), "items": len(next(iter(runs.values()))[2])},
+        "options": dict(options or {}),
+        "early_stop": early_stop,
+        "host": host_summary(),
+        "models": models,
+    }
+    update_aggregates(report)
+    return report
+
+
+def update_aggregates(report):
+    """Recompute each model's correct / total / accuracy and the accuracy delta from its items."""
+    models = report["models"]
+    for summary in models.values():
+        summary.update(_accuracy(summary["items"]))
+    if "base" in models and "adapter" in models:
+        base, adapter = models["base"]["accuracy"], models["adapter"]["accuracy"]
+        if base is not None and adapter is not None:
+            report["accuracy_delta"] = round(adapter - base, 4)
+
+
+def read_report(path):
+    """Load a report written by write_report()."""
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("schema") != REPORT_SCHEMA:
+        raise ValueError(f"{path}: unsupported results schema {report.get('schema')!r}")
+    return report
+
+
+def default_report_path(adapter_name, version, started_at):
+    """Return e.g. <results dir>/math-0.2.0-20261016T101500Z.json."""
+    stamp = started_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return DEFAULT_RESULTS_DIR / f"{adapter_name}-{version or 'unversioned'}-{stamp}.json"
+
+
+def write_report(report, path):
+    """Write a report as JSON, atomically replacing any existing file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(report, indent=2) + "\n")
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,93 @@
+"""Content hashes of adapter GGUFs, for incremental `loco setup`.
+
+Hashing a multi-GB GGUF takes seconds, so each file's SHA-256 is computed
+by streaming it once and kept in a sidecar JSON cache keyed by the file's
+path, size and mtime; an unchanged file is never read again. The same cache
+remembers, per Ollama model, which GGUF hash it was last created from and
+the model digest Ollama gave it, so a model whose digest is unchanged is
+known to be current without asking Ollama at all.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from locollm.response_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_HASH_CACHE = DEFAULT_CACHE_DIR.parent / "gguf-hashes.json"
+
+# Bytes read per hashing step
+HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path, chunk_size=HASH_CHUNK):
+    """Return the hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """Sidecar cache of GGUF hashes and of what each model was last synced from.
+
+    Safe to share between threads; every update is written through to the
+    JSON file atomically. A missing or unreadable file starts an empty cache.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else DEFAULT_HASH_CACHE
+        self.hashed = 0
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        # abs path -> {"size", "mtime_ns", "sha256"}
+        self._files = data.get("files") or {}
+        # Ollama model name -> {"sha256", "digest"}
+        self._synced = data.get("synced") or {}
+
+    def sha256(self, path):
+        """Return the hex SHA-256 of a file, hashing it only if it changed since last time."""
+        path = Path(path).resolve()
+        st = os.stat(path)
+        key = str(path)
+        with self._lock:
+            entry = self._files.get(key)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["sha256"]
+        sha256 = file_sha256(path)
+        with self._lock:
+            self.hashed += 1
+            self._files[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+            self._save()
+        return sha256
+
+    def synced(self, model):
+        """Return {"sha256", "digest"} recorded for model's last sync, or None."""
+        with self._lock:
+            entry = self._synced.get(model)
+            return dict(entry) if entry else None
+
+    def record_sync(self, model, sha256, digest):
+        """Record that model (Ollama digest `digest`) was built from a GGUF with this hash."""
+        with self._lock:
+            self._synced[model] = {"sha256": sha256, "digest": digest}
+            self._save()
+
+    def _save(self):
+        data = {"files": self._files, "synced": self._synced}
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+            os.replace(tmp, self.path)
+        except OSError:
+            # Losing the cache only costs a re-hash next time
+            tmp.unlink(missing_ok=True)
@@ -1,145 +1,605 @@
-"""Thin wrapper around the Ollama REST API."""
+"""Thin wrapper around the Ollama REST API.
+
+All requests go through an :class:`OllamaClient`, which holds a pooled
+``requests.Session`` so repeated calls reuse keep-alive connections instead
+of paying a TCP connect per request. The module-level helpers delegate to a
+shared default client.
+"""
 
 import json
+import os
+import re
+import threading
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from locollm.timing import StreamTimer
 
 BASE_URL = "http://localhost:11434"
 
+# Comma-separated Ollama URLs; several make the default client a BackendPool
+HOSTS_ENV = "LOCOLLM_OLLAMA_HOSTS"
+
+# Read timeouts (seconds) per API endpoint.
+DEFAULT_TIMEOUTS = {
+    "health": 5,
+    "tags": 10,
+    "ps": 10,
+    "pull": 600,
+    "generate": 300,
+    "chat": 300,
+    "create": 120,
+    "delete": 30,
+    "show": 30,
+}
+
+DEFAULT_POOL_SIZE = 10
+
+# Seconds an installed-model listing is trusted before /api/tags is re-queried
+DEFAULT_INVENTORY_TTL = 5.0
+
+# The weights blob in a model's Modelfile: FROM .../blobs/sha256-<hex>
+_BLOB_DIGEST = re.compile(r"^FROM \S*sha256[-:]([0-9a-f]{64})\s*$", re.MULTILINE)
+
+
+class ConnectionStats:
+    """Counters for requests sent and connections opened by a client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    @property
+    def reused_connections(self):
+        """Requests served over an already-open keep-alive connection."""
+        return max(self.requests - self.new_connections, 0)
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+        }
+
+
+class ModelInventory:
+    """Cached snapshot of installed models (name, digest, size) from /api/tags.
+
+    The snapshot is re-fetched once it is older than ttl seconds, or on the
+    next access after invalidate(). The owning client invalidates it whenever
+    it creates, deletes or pulls a model.
+    """
+
+    def __init__(self, fetch, ttl=DEFAULT_INVENTORY_TTL, clock=time.monotonic):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._models = None
+        self._fetched_at = 0.0
+
+    def invalidate(self):
+        """Forget the snapshot so the next access re-queries the server."""
+        with self._lock:
+            self._models = None
+
+    def models(self):
+        """Return the /api/tags model records, fetching if stale."""
+        with self._lock:
+            if self._models is None or self._clock() - self._fetched_at >= self.ttl:
+                self._models = self._fetch()
+                self._fetched_at = self._clock()
+            return self._models
+
+    def names(self):
+        """Return installed model names, e.g. 'locollm-math:latest'."""
+        return [m["name"] for m in self.models()]
+
+    def base_names(self):
+        """Return installed model names with the ':tag' suffix removed."""
+        return {m["name"].split(":")[0] for m in self.models()}
+
+    def digest(self, name):
+        """Return a model's digest, or None if it is not installed."""
+        return find_digest(self.models(), name)
+
+    def size(self, name):
+        """Return a model's size in bytes, or None if it is not installed."""
+        record = find_model(self.models(), name)
+        return record.get("size") if record else None
+
+
+def _counting_pool(base, stats):
+    """Return a urllib3 pool class that reports each new connection to stats."""
+
+    class _CountingPool(base):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    return _CountingPool
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count the connections they open."""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self._stats),
+            "https": _counting_pool(HTTPSConnectionPool, self._stats),
+        }
+
+
+def registry_keep_alive(model):
+    """Return the registry's keep_alive for model, or None if it has none."""
+    # Imported here: adapter_manager itself imports this module
+    from locollm import adapter_manager
 
-def check_running():
-    """Return True if the Ollama server is reachable."""
     try:
-        resp = requests.get(f"{BASE_URL}/", timeout=5)
-        return resp.status_code == 200
-    except requests.ConnectionError:
-        return False
+        return adapter_manager.keep_alive_for(model)
+    except OSError:
+        return None
 
 
-def list_models():
-    """Return a list of locally-installed model names."""
-    resp = requests.get(f"{BASE_URL}/api/tags", timeout=10)
-    resp.raise_for_status()
-    return [m["name"] for m in resp.json().get("models", [])]
-
-
-def pull_model(name):
-    """Pull a model, streaming progress to stdout."""
-    resp = requests.post(
-        f"{BASE_URL}/api/pull",
-        json={"name": name},
-        stream=True,
-        timeout=600,
-    )
-    resp.raise_for_status()
-    last_status = ""
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        data = json.loads(line)
-        status = data.get("status", "")
-        if status != last_status:
-            print(status)
-            last_status = status
-        # Show download progress
-        total = data.get("total")
-        completed = data.get("completed")
-        if total and completed:
-            pct = completed / total * 100
-            print(f"\r  {pct:.0f}%", end="", flush=True)
-    print()
-
-
-def generate(model, prompt, stream=True):
-    """Generate a response. Yields text chunks if stream=True, else returns full text."""
-    resp = requests.post(
-        f"{BASE_URL}/api/generate",
-        json={"model": model, "prompt": prompt, "stream": stream},
-        stream=stream,
-        timeout=300,
-    )
-    resp.raise_for_status()
-    if not stream:
-        return resp.json().get("response", "")
-    return _stream_chunks(resp)
+def registry_options(model):
+    """Return the registry's inference options for model ({} if it has none)."""
+    from locollm import adapter_manager
 
+    try:
+        return adapter_manager.inference_options(model)
+    except OSError:
+        return {}
 
-def _stream_chunks(resp):
-    """Yield text chunks from a streaming response."""
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        data = json.loads(line)
-        chunk = data.get("response", "")
-        if chunk:
-            yield chunk
 
+class OllamaClient:
+    """Ollama API client backed by a keep-alive connection pool.
+
+    pool_size bounds the number of idle connections kept per host; timeouts
+    overrides entries in DEFAULT_TIMEOUTS by endpoint name. Installed-model
+    listings are served from a ModelInventory cached for inventory_ttl seconds.
+    keep_alive(model) gives the keep_alive sent with generate and chat
+    requests (None sends nothing) and options(model) the default Ollama
+    `options`; by default both read registry.yaml.
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeouts=None,
+        inventory_ttl=DEFAULT_INVENTORY_TTL,
+        keep_alive=registry_keep_alive,
+        options=registry_options,
+    ):
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.keep_alive = keep_alive
+        self.options = options
+        self.stats = ConnectionStats()
+        self.inventory = ModelInventory(self._fetch_tags, ttl=inventory_ttl)
+        self._session = requests.Session()
+        adapter = _PooledAdapter(self.stats, pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def close(self):
+        """Close all pooled connections."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, method, path, endpoint, **kwargs):
+        self.stats.record_request()
+        return self._session.request(
+            method,
+            f"{self.base_url}{path}",
+            timeout=self.timeouts[endpoint],
+            **kwargs,
+        )
+
+    def check_running(self):
+        """Return True if the Ollama server is reachable."""
+        try:
+            resp = self._request("GET", "/", "health")
+            return resp.status_code == 200
+        except requests.ConnectionError:
+            return False
+
+    def _fetch_tags(self):
+        resp = self._request("GET", "/api/tags", "tags")
+        resp.raise_for_status()
+        return resp.json().get("models", [])
+
+    def list_model_details(self):
+        """Return the /api/tags records (name, digest, size, ...) for installed models."""
+        return self.inventory.models()
+
+    def list_models(self):
+        """Return a list of locally-installed model names."""
+        return self.inventory.names()
+
+    def model_digest(self, name):
+        """Return the digest of an installed model, or None if it is not installed."""
+        return self.inventory.digest(name)
+
+    def weights_digest(self, name):
+        """Return the SHA-256 (hex) of an installed model's weights blob, or None.
+
+        This is the hash of the GGUF the model was created from. None means
+        the model is not installed or Ollama's Modelfile names no blob.
+        """
+        resp = self._request("POST", "/api/show", "show", json={"name": name})
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        match = _BLOB_DIGEST.search(resp.json().get("modelfile", ""))
+        return match.group(1) if match else None
+
+    def running_models(self):
+        """Return the names of the models currently loaded in memory."""
+        resp = self._request("GET", "/api/ps", "ps")
+        resp.raise_for_status()
+        return [m["name"] for m in resp.json().get("models", [])]
+
+    def pull_model(self, name, on_progress=None):
+        """Pull a model, streaming progress to stdout.
+
+        on_progress, if given, receives each status dict instead.
+        """
+        resp = self._request("POST", "/api/pull", "pull", json={"name": name}, stream=True)
+        resp.raise_for_status()
+        last_status = ""
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if on_progress is not None:
+                on_progress(data)
+                continue
+            status = data.get("status", "")
+            if status != last_status:
+                print(status)
+                last_status = status
+            # Show download progress
+            total = data.get("total")
+            completed = data.get("completed")
+            if total and completed:
+                pct = completed / total * 100
+                print(f"\r  {pct:.0f}%", end="", flush=True)
+        if on_progress is None:
+            print()
+        self.inventory.invalidate()
+
+    def _model_payload(self, model, options=None, **fields):
+        """Build a generate/chat payload with the model's keep_alive and options.
+
+        options overrides the client's default options for this model key by key.
+        """
+        payload = {"model": model, **fields}
+        keep_alive = self.keep_alive(model) if self.keep_alive else None
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        merged = {**(self.options(model) if self.options else {}), **(options or {})}
+        if merged:
+            payload["options"] = merged
+        return payload
+
+    def generate(self, model, prompt, stream=True, with_meta=False, options=None):
+        """Generate a response. Yields text chunks if stream=True, else returns full text.
+
+        With with_meta=True, streaming yields (text, meta) tuples as chat() does
+        and a full response is returned as (text, meta). options overrides
+        inference options (temperature, num_predict, ...) for this request.
+        """
+        timer = StreamTimer()
+        resp = self._request(
+            "POST",
+            "/api/generate",
+            "generate",
+            json=self._model_payload(model, options, prompt=prompt, stream=stream),
+            stream=stream,
+        )
+        resp.raise_for_status()
+        if not stream:
+            data = resp.json()
+            text = data.get("response", "")
+            return (text, _extract_chat_meta(data)) if with_meta else text
+        if with_meta:
+            return _stream_generate_meta(resp, timer)
+        return _stream_chunks(resp)
+
+    def chat(self, model, messages, stream=True, options=None):
+        """Send a chat request. Yields (text, meta) tuples when streaming.
 
-def chat(model, messages, stream=True):
-    """Send a chat request. Yields (text, meta) tuples when streaming.
+        meta is None on intermediate chunks and a stats dict on the final chunk,
+        including client-side TTFT and inter-chunk gaps. options is as for
+        generate().
+        """
+        timer = StreamTimer()
+        resp = self._request(
+            "POST",
+            "/api/chat",
+            "chat",
+            json=self._model_payload(model, options, messages=messages, stream=stream),
+            stream=stream,
+        )
+        resp.raise_for_status()
+        if not stream:
+            data = resp.json()
+            text = data.get("message", {}).get("content", "")
+            return [(text, _extract_chat_meta(data))]
+        return _stream_chat_chunks(resp, timer)
 
-    meta is None on intermediate chunks and a stats dict on the final chunk.
+    def load_model(self, model, keep_alive=None):
+        """Load a model into memory without generating anything.
+
+        keep_alive overrides the model's policy. Returns Ollama's
+        load_duration in nanoseconds (near zero if it was already loaded).
+        """
+        payload = self._model_payload(model, prompt="", stream=False)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        resp = self._request("POST", "/api/generate", "generate", json=payload)
+        resp.raise_for_status()
+        return resp.json().get("load_duration", 0)
+
+    def create_model(self, name, modelfile, on_progress=None):
+        """Create a model from a Modelfile string, printing its status lines.
+
+        on_progress, if given, receives each status dict instead.
+        """
+        resp = self._request(
+            "POST",
+            "/api/create",
+            "create",
+            json={"name": name, "modelfile": modelfile},
+            stream=True,
+        )
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if on_progress is not None:
+                on_progress(data)
+            elif data.get("status"):
+                print(data["status"])
+        self.inventory.invalidate()
+
+    def delete_model(self, name):
+        """Delete a model from Ollama."""
+        resp = self._request("DELETE", "/api/delete", "delete", json={"name": name})
+        resp.raise_for_status()
+        self.inventory.invalidate()
+
+
+def _stream_chunks(resp):
+    """Yield text chunks from a streaming response.
+
+    Closing the generator early closes the response, so the server stops
+    generating; the same holds for the other _stream_* helpers.
     """
-    resp = requests.post(
-        f"{BASE_URL}/api/chat",
-        json={"model": model, "messages": messages, "stream": stream},
-        stream=stream,
-        timeout=300,
-    )
-    resp.raise_for_status()
-    if not stream:
-        data = resp.json()
-        text = data.get("message", {}).get("content", "")
-        return [(text, _extract_chat_meta(data))]
-    return _stream_chat_chunks(resp)
+    with resp:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            chunk = data.get("response", "")
+            if chunk:
+                yield chunk
+
 
+def _stream_generate_meta(resp, timer):
+    """Yield (chunk_text, meta) tuples from a streaming /api/generate response."""
+    with resp:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            chunk = data.get("response", "")
+            if chunk:
+                timer.chunk()
+            if data.get("done"):
+                yield (chunk, _extract_chat_meta(data, timer))
+            elif chunk:
+                yield (chunk, None)
 
-def _stream_chat_chunks(resp):
+
+def _stream_chat_chunks(resp, timer):
     """Yield (chunk_text, meta) tuples from a streaming /api/chat response."""
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        data = json.loads(line)
-        chunk = data.get("message", {}).get("content", "")
-        if data.get("done"):
-            yield (chunk, _extract_chat_meta(data))
-        elif chunk:
-            yield (chunk, None)
-
-
-def _extract_chat_meta(data):
-    """Pull performance metadata from a chat response."""
-    return {
+    with resp:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            chunk = data.get("message", {}).get("content", "")
+            if chunk:
+                timer.chunk()
+            if data.get("done"):
+                yield (chunk, _extract_chat_meta(data, timer))
+            elif chunk:
+                yield (chunk, None)
+
+
+def find_model(models, name):
+    """Look up a model's /api/tags record; a bare name means ':latest'."""
+    full_name = name if ":" in name else f"{name}:latest"
+    for m in models:
+        if m.get("name") in (name, full_name):
+            return m
+    return None
+
+
+def find_digest(models, name):
+    """Look up a model's digest in /api/tags records; a bare name means ':latest'."""
+    record = find_model(models, name)
+    return record.get("digest") if record else None
+
+
+def _extract_chat_meta(data, timer=None):
+    """Pull performance metadata from a final response chunk.
+
+    With a StreamTimer, the client-side TTFT and chunk-gap percentiles are
+    added alongside Ollama's own durations (all server durations are in ns).
+    """
+    meta = {
         "eval_count": data.get("eval_count", 0),
         "eval_duration": data.get("eval_duration", 0),
         "prompt_eval_count": data.get("prompt_eval_count", 0),
+        "prompt_eval_duration": data.get("prompt_eval_duration", 0),
+        "load_duration": data.get("load_duration", 0),
         "total_duration": data.get("total_duration", 0),
     }
+    if timer is not None:
+        meta.update(timer.as_meta())
+    return meta
+
+
+# ---------------------------------------------------------------------------
+# Shared default client used by the module-level helpers
+# ---------------------------------------------------------------------------
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def _client_from_env():
+    hosts = os.environ.get(HOSTS_ENV)
+    if not hosts:
+        return OllamaClient()
+    from locollm.backend_pool import BackendPool, parse_hosts
+
+    urls = parse_hosts(hosts)
+    if len(urls) == 1:
+        return OllamaClient(urls[0])
+    return BackendPool(urls)
+
+
+def single_host_url():
+    """Return the one Ollama URL configured by LOCOLLM_OLLAMA_HOSTS (BASE_URL if unset).
+
+    For a client bound to one backend, such as an AsyncOllamaClient.
+    Raises ValueError when several hosts are configured.
+    """
+    hosts = os.environ.get(HOSTS_ENV)
+    if not hosts:
+        return BASE_URL
+    from locollm.backend_pool import parse_hosts
+
+    urls = parse_hosts(hosts)
+    if len(urls) > 1:
+        raise ValueError(
+            f"{HOSTS_ENV} lists {len(urls)} hosts, but concurrent requests go to a single "
+            "Ollama host; set it to one URL"
+        )
+    return urls[0] if urls else BASE_URL
+
+
+def get_client():
+    """Return the process-wide default client, creating it on first use.
+
+    This is a BackendPool when LOCOLLM_OLLAMA_HOSTS lists several URLs.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = _client_from_env()
+    return _default_client
+
+
+def set_client(client):
+    """Replace the process-wide default client (e.g. to tune pool size)."""
+    global _default_client
+    with _default_lock:
+        old, _default_client = _default_client, client
+    if old is not None and old is not client:
+        old.close()
+
+
+def check_running():
+    """Return True if the Ollama server is reachable."""
+    return get_client().check_running()
+
+
+def list_models():
+    """Return a list of locally-installed model names."""
+    return get_client().list_models()
+
+
+def installed_base_names():
+    """Return installed model names without their ':tag' suffix."""
+    return get_client().inventory.base_names()
+
+
+def list_model_details():
+    """Return the /api/tags records (name, digest, size, ...) for installed models."""
+    return get_client().list_model_details()
 
 
-def create_model(name, modelfile):
-    """Create a model from a Modelfile string."""
-    resp = requests.post(
-        f"{BASE_URL}/api/create",
-        json={"name": name, "modelfile": modelfile},
-        stream=True,
-        timeout=120,
+def model_digest(name):
+    """Return the digest of an installed model, or None if it is not installed."""
+    return get_client().model_digest(name)
+
+
+def weights_digest(name):
+    """Return the SHA-256 of an installed model's weights blob, or None."""
+    return get_client().weights_digest(name)
+
+
+def running_models():
+    """Return the names of the models currently loaded in memory."""
+    return get_client().running_models()
+
+
+def pull_model(name, on_progress=None):
+    """Pull a model, streaming progress to stdout (or to on_progress)."""
+    return get_client().pull_model(name, on_progress=on_progress)
+
+
+def generate(model, prompt, stream=True, with_meta=False, options=None):
+    """Generate a response. Yields text chunks if stream=True, else returns full text."""
+    return get_client().generate(
+        model, prompt, stream=stream, with_meta=with_meta, options=options
     )
-    resp.raise_for_status()
-    for line in resp.iter_lines():
-        if not line:
-            continue
-        data = json.loads(line)
-        status = data.get("status", "")
-        if status:
-            print(status)
+
+
+def chat(model, messages, stream=True, options=None):
+    """Send a chat request. Yields (text, meta) tuples when streaming."""
+    return get_client().chat(model, messages, stream=stream, options=options)
+
+
+def load_model(model, keep_alive=None):
+    """Load a model into memory. Returns Ollama's load_duration in nanoseconds."""
+    return get_client().load_model(model, keep_alive=keep_alive)
+
+
+def create_model(name, modelfile, on_progress=None):
+    """Create a model from a Modelfile string, printing status (or passing it to on_progress)."""
+    return get_client().create_model(name, modelfile, on_progress=on_progress)
 
 
 def delete_model(name):
     """Delete a model from Ollama."""
-    resp = requests.delete(
-        f"{BASE_URL}/api/delete",
-        json={"name": name},
-        timeout=30,
-    )
-    resp.raise_for_status()
+    return get_client().delete_model(name)
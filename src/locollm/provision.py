@@ -0,0 +1,200 @@
+"""Concurrent model provisioning for `loco setup`.
+
+Pulling the base model and creating each adapter's Ollama model are
+independent, network- and disk-bound jobs, so they run on a thread pool
+under a concurrency limit instead of one after another. Every job reports
+to one ProgressBoard, and all of them decide what is already installed from
+a single model-listing snapshot taken up front. Adapters built FROM the
+base model (system-prompt adapters) wait for its pull to finish.
+
+Adapter models are only (re)created when missing or when their GGUF's
+content hash no longer matches the installed weights (see
+adapter_manager.sync_adapter_model), so re-running setup on an up-to-date
+machine touches neither Ollama nor, thanks to the hash cache, the GGUFs.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from locollm import adapter_manager, ollama_client
+from locollm.gguf_hashes import HashCache
+
+# Adapter models created at once; each create copies a multi-GB GGUF, so
+# more than a few mostly queue on the disk
+DEFAULT_SETUP_CONCURRENCY = 2
+
+# Seconds between redraws of the progress board on a terminal
+REDRAW_INTERVAL = 0.1
+
+
+def _status_text(data):
+    """Return a display line for an Ollama status dict, with a percentage for downloads."""
+    status = data.get("status", "")
+    total = data.get("total")
+    completed = data.get("completed")
+    if total and completed:
+        return f"{status} {completed / total * 100:.0f}%"
+    return status
+
+
+class ProgressBoard:
+    """One status line per setup job, shared by all of them.
+
+    On a terminal the lines are redrawn in place (at most every
+    REDRAW_INTERVAL seconds); elsewhere each job's status is printed as a
+    "name: status" line whenever it changes, without download percentages.
+    """
+
+    def __init__(self, names, out=None, interactive=None, clock=time.monotonic):
+        self._out = out if out is not None else sys.stdout
+        if interactive is None:
+            interactive = self._out.isatty()
+        self._interactive = interactive
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._lines = dict.fromkeys(names, "waiting")
+        self._width = max((len(name) for name in names), default=0)
+        self._drawn = 0
+        self._last_draw = None
+
+    def callback(self, name):
+        """Return an on_progress callback that reports Ollama status dicts for name."""
+        return lambda data: self.update(name, data)
+
+    def update(self, name, data):
+        """Record an Ollama status dict for name."""
+        with self._lock:
+            if self._interactive:
+                self._lines[name] = _status_text(data)
+                now = self._clock()
+                if self._last_draw is None or now - self._last_draw >= REDRAW_INTERVAL:
+                    self._draw(now)
+            else:
+                self._set(name, data.get("status", ""))
+
+    def finish(self, name, text):
+        """Record name's final status and show it straight away."""
+        with self._lock:
+            if self._interactive:
+                self._lines[name] = text
+                self._draw(self._clock())
+            else:
+                self._set(name, text)
+
+    def _set(self, name, text):
+        if text and text != self._lines.get(name):
+            self._lines[name] = text
+            print(f"{name}: {text}", file=self._out, flush=True)
+
+    def _draw(self, now):
+        # Move back over the previous drawing and overwrite it line by line
+        parts = [f"\x1b[{self._drawn}F"] if self._drawn else []
+        for name, text in self._lines.items():
+            parts.append(f"\x1b[2K{name:<{self._width}}  {text}\n")
+        self._out.write("".join(parts))
+        self._out.flush()
+        self._drawn = len(self._lines)
+        self._last_draw = now
+
+
+class SetupResult:
+    """What setup did for each job.
+
+    Outcomes are "ready", "pulled", "created", "updated", "skipped" or "failed".
+    """
+
+    def __init__(self):
+        # name -> (outcome, message)
+        self.outcomes = {}
+
+    def record(self, name, outcome, message=""):
+        self.outcomes[name] = (outcome, message)
+
+    def names(self, outcome):
+        return [name for name, (o, _) in self.outcomes.items() if o == outcome]
+
+    @property
+    def ok(self):
+        return not self.names("failed")
+
+
+# sync_adapter_model() action -> (outcome, final board line)
+_ACTIONS = {
+    "unchanged": ("ready", "up to date"),
+    "created": ("created", "created"),
+    "updated": ("updated", "recreated (GGUF changed)"),
+}
+
+
+def _needs_base(config):
+    """True if an adapter's Modelfile is built FROM the registry's base model."""
+    return config.get("type", "system-prompt") == "system-prompt" and not config.get("ollama_base")
+
+
+def provision(
+    base_model,
+    adapter_names,
+    models,
+    concurrency=DEFAULT_SETUP_CONCURRENCY,
+    board=None,
+    hashes=None,
+):
+    """Pull base_model if missing and sync adapter models, concurrently.
+
+    models is one snapshot of Ollama's /api/tags records
+    (ollama_client.list_model_details()), used for every decision; hashes
+    is the HashCache of GGUF hashes (the default sidecar file if None).
+    Progress goes to board (a ProgressBoard on stdout by default). Adapters
+    whose GGUF is missing are skipped; other errors mark the job failed
+    without stopping the rest. Returns a SetupResult.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if board is None:
+        board = ProgressBoard([base_model, *adapter_names])
+    if hashes is None:
+        hashes = HashCache()
+    installed = {m["name"].split(":")[0] for m in models}
+    result = SetupResult()
+
+    def pull_base():
+        try:
+            if base_model.split(":")[0] in installed:
+                result.record(base_model, "ready")
+                board.finish(base_model, "already installed")
+                return
+            ollama_client.pull_model(base_model, on_progress=board.callback(base_model))
+        except Exception as e:
+            result.record(base_model, "failed", str(e))
+            board.finish(base_model, f"failed: {e}")
+            raise
+        result.record(base_model, "pulled")
+        board.finish(base_model, "pulled")
+
+    def create(name, base_pull):
+        try:
+            config = adapter_manager.get_adapter(name) or {}
+            if _needs_base(config):
+                base_pull.result()
+            action = adapter_manager.sync_adapter_model(
+                name, models=models, on_progress=board.callback(name), hashes=hashes
+            )
+        except FileNotFoundError as e:
+            result.record(name, "skipped", str(e))
+            board.finish(name, "skipped (GGUF not found)")
+        except Exception as e:
+            result.record(name, "failed", str(e))
+            board.finish(name, f"failed: {e}")
+        else:
+            outcome, text = _ACTIONS[action]
+            result.record(name, outcome)
+            board.finish(name, text)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loco-setup") as pool:
+        # Submitted first, so adapters waiting on it never hold every worker
+        base_pull = pool.submit(pull_base)
+        for name in adapter_names:
+            pool.submit(create, name, base_pull)
+    return result
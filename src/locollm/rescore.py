@@ -0,0 +1,121 @@
+"""Offline re-scoring of saved eval results.
+
+`loco rescore` re-applies the current scoring rules to the responses
+stored in results files (see eval_report) without querying Ollama, so a
+change to extract_number() or a checker can be measured against every past
+run. Items from all files are scored together in chunks over a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from locollm.eval import load_dataset, score_response
+from locollm.eval_report import read_report, update_aggregates, write_report
+
+# Items per task sent to a worker process; small batches stay in-process
+RESCORE_CHUNK = 2000
+
+
+def _score_chunk(task):
+    eval_type, pairs = task
+    return [score_response(problem, response, eval_type) for problem, response in pairs]
+
+
+def score_many(tasks, workers=None, chunk_size=RESCORE_CHUNK):
+    """Score (eval_type, problem, response) triples. Returns [(is_correct, detail)].
+
+    Work is split into chunks of chunk_size items of one eval_type and spread
+    over `workers` processes (default: one per CPU); with a single chunk or a
+    single worker everything is scored in this process.
+    """
+    chunks = []
+    for eval_type, problem, response in tasks:
+        if not chunks or chunks[-1][0] != eval_type or len(chunks[-1][1]) >= chunk_size:
+            chunks.append((eval_type, []))
+        chunks[-1][1].append((problem, response))
+    workers = workers or os.cpu_count() or 1
+    if len(chunks) <= 1 or workers == 1:
+        scored = map(_score_chunk, chunks)
+        return [result for chunk in scored for result in chunk]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        return [result for chunk in pool.map(_score_chunk, chunks) for result in chunk]
+
+
+def _problem_for(item, dataset):
+    """Return the dataset problem an item answered, or None if it no longer matches."""
+    index = item.get("index")
+    if index is None or not 0 <= index < len(dataset):
+        return None
+    problem = dataset[index]
+    return problem if problem.get("question") == item.get("question") else None
+
+
+class RescoreResult:
+    """Outcome of re-scoring one results file."""
+
+    def __init__(self, path, report):
+        self.path = path
+        self.report = report
+        # role -> [correct before, correct after, items whose verdict flipped, total]
+        self.models = {}
+        self.skipped = 0
+        # True once any item's verdict or detail differs from the file
+        self.changed = False
+
+    def display(self):
+        parts = [
+            f"{role} {before}/{total} -> {after}/{total} ({flipped} flipped)"
+            for role, (before, after, flipped, total) in self.models.items()
+        ]
+        if self.skipped:
+            parts.append(f"{self.skipped} skipped")
+        return f"{self.path}: " + " | ".join(parts)
+
+
+def rescore_files(paths, dataset_path=None, workers=None, write=False):
+    """Re-score every item of the given results files. Returns [RescoreResult].
+
+    Each report's own dataset is used unless dataset_path is given. Items
+    without a stored response, or whose question no longer matches the
+    dataset, are skipped. With write, files whose scores changed are updated
+    in place, aggregates included.
+    """
+    datasets = {}
+    results = []
+    tasks = []
+    # (result, role, item) per entry in tasks
+    targets = []
+    for path in map(Path, paths):
+        report = read_report(path)
+        result = RescoreResult(path, report)
+        results.append(result)
+        source = str(dataset_path or report["dataset"]["path"])
+        if source not in datasets:
+            datasets[source] = load_dataset(source)
+        for role, summary in report["models"].items():
+            result.models[role] = [summary["correct"], 0, 0, summary["total"]]
+            for item in summary["items"]:
+                problem = _problem_for(item, datasets[source])
+                if problem is None or item.get("response") is None:
+                    result.skipped += 1
+                    result.models[role][1] += bool(item["correct"])
+                    continue
+                tasks.append((report["eval_type"], problem, item["response"]))
+                targets.append((result, role, item))
+
+    for (result, role, item), (is_correct, detail) in zip(
+        targets, score_many(tasks, workers=workers), strict=True
+    ):
+        counts = result.models[role]
+        counts[1] += is_correct
+        counts[2] += is_correct != item["correct"]
+        if is_correct != item["correct"] or detail != item.get("detail"):
+            result.changed = True
+            item["correct"], item["detail"] = is_correct, detail
+
+    for result in results:
+        update_aggregates(result.report)
+        if write and result.changed:
+            write_report(result.report, result.path)
+    return results
@@ -0,0 +1,112 @@
+"""On-disk, content-addressed cache of model responses.
+
+Entries are keyed by a hash of (model digest, prompt, generation options), so
+a cached answer is only reused while the exact same model weights are
+installed. The cache is bounded in size; when it grows past max_bytes the
+least recently used entries are evicted (file mtime doubles as the LRU clock).
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "locollm" / "responses"
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_key(model_digest, prompt, options=None):
+    """Return the hex cache key for a (model digest, prompt, options) triple."""
+    payload = json.dumps([model_digest, prompt, options or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of responses stored as one JSON file per entry.
+
+    With read=False lookups always miss but new responses are still stored,
+    which refreshes stale entries.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, read=True):
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.read = read
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached response for key, or None."""
+        if not self.read:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                response = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        self.hits += 1
+        return response
+
+    def put(self, key, response):
+        """Store a response and evict old entries if over the size limit."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"response": response}).encode()
+        tmp = path.with_suffix(f".tmp{os.getpid()}.{threading.get_ident()}")
+        tmp.write_bytes(data)
+        with self._lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Delete least recently used entries until under max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def stats_display(self):
+        return f"cache: {self.hits} hits, {self.misses} misses"
@@ -4,23 +4,177 @@ Scores each adapter by counting keyword hits in the query, then returns
 the adapter with the most hits. Returns None when no keywords match,
 meaning the base model should handle the query.
 
+All keywords are compiled once at construction into a single pattern table;
+large keyword sets use an Aho-Corasick automaton, so scoring every adapter
+takes a single pass over the query no matter how many adapters or keywords
+are registered.
+
 This is a deliberately simple PoC — students upgrade to an ML classifier later.
 """
 
+import threading
+import time
+from collections import deque
+
 from locollm import adapter_manager
 
 
+class _KeywordAutomaton:
+    """Aho-Corasick automaton that reports which patterns occur in a text.
+
+    Failure links are folded into the transition table at build time, so
+    each input character costs one dict lookup. Characters that appear in
+    no pattern send the scan back to the root.
+    """
+
+    def __init__(self, patterns):
+        self._delta = [{}]
+        outputs = [set()]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._delta[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._delta)
+                    self._delta[state][ch] = nxt
+                    self._delta.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(pattern_id)
+
+        # Breadth-first: resolve failure links and complete the transitions
+        fail = [0] * len(self._delta)
+        queue = deque(self._delta[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            for ch, nxt in self._delta[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in self._delta[f]:
+                    f = fail[f]
+                fail[nxt] = self._delta[f].get(ch, 0) if f or state else 0
+            # Inherit the failure state's moves for characters we lack
+            if state:
+                for ch, target in self._delta[fail[state]].items():
+                    self._delta[state].setdefault(ch, target)
+
+        self._outputs = [frozenset(out) if out else None for out in outputs]
+        # Empty patterns match every text
+        self._always = frozenset(outputs[0])
+
+    def matches(self, text):
+        """Return the set of pattern ids that occur in text."""
+        delta = self._delta
+        outputs = self._outputs
+        found = set(self._always)
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            out = outputs[state]
+            if out is not None:
+                found |= out
+        return found
+
+
+class _SubstringMatcher:
+    """Reports which patterns occur in a text using one C-level scan per pattern.
+
+    Cheaper than the automaton's per-character Python loop when there are
+    only a few dozen patterns.
+    """
+
+    def __init__(self, patterns):
+        self._patterns = list(enumerate(patterns))
+
+    def matches(self, text):
+        """Return the set of pattern ids that occur in text."""
+        return {pid for pid, pattern in self._patterns if pattern in text}
+
+
+# Below this many distinct keywords, per-pattern substring scans beat the
+# automaton (see scripts/bench_router.py).
+AUTOMATON_MIN_PATTERNS = 128
+
+
+class RouterMetrics:
+    """Routing latency counters, shared across hot reloads of a router."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.last_ns = 0
+
+    def record(self, elapsed_ns):
+        with self._lock:
+            self.calls += 1
+            self.total_ns += elapsed_ns
+            self.last_ns = elapsed_ns
+            self.max_ns = max(self.max_ns, elapsed_ns)
+
+    @property
+    def mean_us(self):
+        return self.total_ns / self.calls / 1e3 if self.calls else 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "mean_us": round(self.mean_us, 2),
+            "max_us": round(self.max_ns / 1e3, 2),
+            "last_us": round(self.last_ns / 1e3, 2),
+        }
+
+    def display(self):
+        return (
+            f"routing: {self.calls} calls | "
+            f"{self.mean_us:.1f} us avg | {self.max_ns / 1e3:.1f} us max"
+        )
+
+
 class KeywordRouter:
     """Routes queries to adapters based on keyword matching."""
 
-    def __init__(self):
-        self._adapter_keywords = {}
-        registry = adapter_manager.load_registry()
-        adapters = registry.get("adapters") or {}
-        for name, config in adapters.items():
-            keywords = config.get("router_keywords", [])
-            if keywords:
-                self._adapter_keywords[name] = [kw.lower() for kw in keywords]
+    def __init__(self, registry=None, metrics=None):
+        if registry is None:
+            registry = adapter_manager.load_registry()
+        self.metrics = metrics if metrics is not None else RouterMetrics()
+        # Already lowercased in the compiled registry snapshot
+        self._adapter_keywords = dict(adapter_manager.router_keywords(registry))
+        self._compile()
+
+    @classmethod
+    def from_keywords(cls, adapter_keywords):
+        """Build a router from {adapter_name: [keyword, ...]} without the registry."""
+        router = cls.__new__(cls)
+        router.metrics = RouterMetrics()
+        router._adapter_keywords = {
+            name: [kw.lower() for kw in keywords]
+            for name, keywords in adapter_keywords.items()
+            if keywords
+        }
+        router._compile()
+        return router
+
+    def _compile(self):
+        """Build the automaton and the pattern -> adapter score table."""
+        # Adapters in tie-break order: alphabetical, first one wins a tie
+        self._adapter_order: list[str] = sorted(self._adapter_keywords)
+        pattern_ids = {}
+        self._pattern_hits = []
+        for rank, name in enumerate(self._adapter_order):
+            for kw in self._adapter_keywords[name]:
+                pid = pattern_ids.setdefault(kw, len(pattern_ids))
+                if pid == len(self._pattern_hits):
+                    self._pattern_hits.append([])
+                # Duplicate keywords count once per occurrence, as before
+                self._pattern_hits[pid].append(rank)
+        self._patterns = list(pattern_ids)
+        if len(self._patterns) >= AUTOMATON_MIN_PATTERNS:
+            self._matcher = _KeywordAutomaton(self._patterns)
+        else:
+            self._matcher = _SubstringMatcher(self._patterns)
 
     def route(self, query: str) -> str | None:
         """Return the best adapter name for a query, or None for base model.
@@ -28,15 +182,51 @@ class KeywordRouter:
         Scoring: count how many keywords appear (case-insensitive) in the query.
         Ties are broken by alphabetical order (deterministic).
         """
-        query_lower = query.lower()
-        best_adapter = None
-        best_score = 0
-
-        for adapter_name in sorted(self._adapter_keywords):
-            keywords = self._adapter_keywords[adapter_name]
-            score = sum(1 for kw in keywords if kw in query_lower)
-            if score > best_score:
-                best_score = score
-                best_adapter = adapter_name
-
-        return best_adapter
+        start = time.perf_counter_ns()
+        result = self._route(query)
+        self.metrics.record(time.perf_counter_ns() - start)
+        return result
+
+    def _route(self, query: str) -> str | None:
+        found = self._matcher.matches(query.lower())
+        if not found:
+            return None
+
+        scores = [0] * len(self._adapter_order)
+        for pid in found:
+            for rank in self._pattern_hits[pid]:
+                scores[rank] += 1
+
+        best_score = max(scores)
+        if best_score == 0:
+            return None
+        # index() returns the first, i.e. alphabetically earliest, best adapter
+        return self._adapter_order[scores.index(best_score)]
+
+
+# The shared router and the registry object it was built from
+_shared_router = None
+_shared_lock = threading.Lock()
+
+
+def get_router():
+    """Return the process-wide KeywordRouter.
+
+    The router is built on first use and rebuilt whenever load_registry()
+    returns a new registry (i.e. registry.yaml changed), so long-lived
+    callers such as chat sessions pick up keyword edits without restarting.
+    Latency metrics carry over across rebuilds.
+    """
+    global _shared_router
+    registry = adapter_manager.load_registry()
+    shared = _shared_router
+    if shared is not None and shared[0] is registry:
+        return shared[1]
+    with _shared_lock:
+        shared = _shared_router
+        if shared is not None and shared[0] is registry:
+            return shared[1]
+        metrics = shared[1].metrics if shared is not None else None
+        router = KeywordRouter(registry, metrics=metrics)
+        _shared_router = (registry, router)
+        return router
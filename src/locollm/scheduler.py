@@ -0,0 +1,165 @@
+"""Model-affinity request scheduler.
+
+Every adapter is its own merged GGUF, so serving requests in arrival order
+makes Ollama evict and reload multi-GB weights whenever consecutive requests
+target different models. The scheduler queues requests per model and keeps
+draining the resident model's queue, switching only when it runs dry or when
+another model's oldest request has waited longer than max_wait.
+
+Requests run on the asyncio loop; the caller supplies the coroutine that
+actually talks to Ollama, e.g. ``AsyncOllamaClient.generate_with_meta``.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+DEFAULT_MAX_WAIT = 10.0
+
+
+class SchedulerMetrics:
+    """Counts model swaps, and the swaps arrival order would have caused."""
+
+    def __init__(self):
+        self.dispatched = 0
+        self.swaps = 0
+        self.fifo_swaps = 0
+        self.forced_switches = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def record_dispatch(self, wait_s):
+        self.dispatched += 1
+        self.total_wait_s += wait_s
+        self.max_wait_s = max(self.max_wait_s, wait_s)
+
+    @property
+    def swaps_avoided(self):
+        return max(0, self.fifo_swaps - self.swaps)
+
+    @property
+    def mean_wait_s(self):
+        return self.total_wait_s / self.dispatched if self.dispatched else 0.0
+
+    def as_dict(self):
+        return {
+            "dispatched": self.dispatched,
+            "swaps": self.swaps,
+            "swaps_avoided": self.swaps_avoided,
+            "forced_switches": self.forced_switches,
+            "mean_wait_s": round(self.mean_wait_s, 3),
+            "max_wait_s": round(self.max_wait_s, 3),
+        }
+
+    def display(self):
+        return (
+            f"scheduler: {self.swaps} swaps ({self.swaps_avoided} avoided) | "
+            f"{self.forced_switches} forced | {self.max_wait_s:.1f}s max wait"
+        )
+
+
+class ModelScheduler:
+    """Admits queued requests so that one model is served at a time.
+
+    run(model, *args) is the coroutine that performs a request. Up to
+    `concurrency` requests run at once, all against the resident model; a
+    switch to another model waits until in-flight requests have finished.
+    `resident` is the model Ollama currently has loaded, if known.
+    """
+
+    def __init__(
+        self,
+        run,
+        concurrency=1,
+        max_wait=DEFAULT_MAX_WAIT,
+        resident=None,
+        metrics=None,
+        clock=time.monotonic,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self._run = run
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+        self.resident = resident
+        self.metrics = metrics if metrics is not None else SchedulerMetrics()
+        self._clock = clock
+        self._queues = {}
+        self._in_flight = 0
+        self._last_arrival = resident
+
+    async def submit(self, model, *args):
+        """Queue a request for model and return run(model, *args) once admitted."""
+        if self._last_arrival is not None and model != self._last_arrival:
+            self.metrics.fifo_swaps += 1
+        self._last_arrival = model
+
+        ticket = asyncio.get_running_loop().create_future()
+        entry = (ticket, self._clock())
+        self._queues.setdefault(model, deque()).append(entry)
+        self._pump()
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            if ticket.cancelled():
+                self._discard(model, entry)
+            else:
+                # Admitted, then cancelled before it could start
+                self._release()
+            raise
+        try:
+            return await self._run(model, *args)
+        finally:
+            self._release()
+
+    def pending(self):
+        """Return {model: queued request count}."""
+        return {model: len(queue) for model, queue in self._queues.items()}
+
+    def _release(self):
+        self._in_flight -= 1
+        self._pump()
+
+    def _discard(self, model, entry):
+        queue = self._queues.get(model)
+        if queue is None or entry not in queue:
+            return
+        queue.remove(entry)
+        if not queue:
+            del self._queues[model]
+
+    def _pick(self, now):
+        """Return the model to admit next, or None to wait."""
+        others = [m for m in self._queues if m != self.resident]
+        if not others:
+            return self.resident if self._queues else None
+        oldest = min(others, key=lambda m: self._queues[m][0][1])
+        overdue = now - self._queues[oldest][0][1] >= self.max_wait
+        if self.resident in self._queues and not overdue:
+            return self.resident
+        # Switching models: let the resident model's in-flight requests finish
+        if self._in_flight:
+            return None
+        if self.resident in self._queues:
+            self.metrics.forced_switches += 1
+        return oldest
+
+    def _pump(self):
+        while self._in_flight < self.concurrency:
+            now = self._clock()
+            model = self._pick(now)
+            if model is None:
+                return
+            queue = self._queues[model]
+            ticket, enqueued = queue.popleft()
+            if not queue:
+                del self._queues[model]
+            if ticket.cancelled():
+                continue
+            if model != self.resident:
+                if self.resident is not None:
+                    self.metrics.swaps += 1
+                self.resident = model
+            self.metrics.record_dispatch(now - enqueued)
+            self._in_flight += 1
+            ticket.set_result(None)
@@ -0,0 +1,609 @@
+"""OpenAI-compatible HTTP gateway for `loco serve`.
+
+A resident process keeps the registry, the keyword router and the Ollama
+connection pool warm, and answers the OpenAI endpoints most clients speak:
+
+- POST /v1/chat/completions: chat turns, routed and trimmed like `loco chat`
+- POST /v1/completions: single prompts, routed like `loco query`
+- GET /v1/models: "auto", the base model and the installed adapters
+
+`model` is "auto" for keyword routing, "base" (or the base model's name) for
+the base model, or an adapter name, bare or "locollm-" prefixed. With
+"stream": true the reply is sent as server-sent events.
+
+Chat requests are stateless by default: each carries the full message
+history, as the OpenAI API expects, and a fresh ChatSession routes it and
+trims it to the context window. A request with an X-Session-Id header joins
+a server-side conversation instead: it sends only its new messages, and the
+session keeps the history, the adapter it was routed to and its running
+summary between requests. Turns of one session run one at a time; other
+sessions run concurrently on the server's threads, all sharing one Ollama
+client and its connection pool.
+"""
+
+import json
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from locollm import adapter_manager, ollama_client
+from locollm import router as router_module
+from locollm.chat_session import ChatSession
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+SESSION_HEADER = "X-Session-Id"
+
+# Server-side conversations kept at once, and seconds one may sit idle
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_SESSION_TTL = 1800.0
+
+# `model` values that ask for keyword routing
+AUTO_MODELS = ("auto", "locollm")
+
+# OpenAI request fields -> Ollama options
+_OPENAI_OPTIONS = {
+    "temperature": "temperature",
+    "top_p": "top_p",
+    "seed": "seed",
+    "max_tokens": "num_predict",
+    "max_completion_tokens": "num_predict",
+    "stop": "stop",
+    "presence_penalty": "presence_penalty",
+    "frequency_penalty": "frequency_penalty",
+}
+
+
+class GatewayError(Exception):
+    """A request the gateway rejects, with the HTTP status to answer with."""
+
+    def __init__(self, status, message, error_type="invalid_request_error"):
+        super().__init__(message)
+        self.status = status
+        self.error_type = error_type
+
+    def as_dict(self):
+        return {"error": {"message": str(self), "type": self.error_type, "code": None}}
+
+
+@contextmanager
+def _upstream():
+    """Turn Ollama request failures into GatewayErrors."""
+    try:
+        yield
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        raise GatewayError(404 if status == 404 else 502, f"Ollama error: {e}", "api_error") from e
+    except requests.RequestException as e:
+        raise GatewayError(503, f"Ollama is not reachable: {e}", "api_error") from e
+
+
+def request_options(body):
+    """Return the Ollama options for the sampling fields of an OpenAI request."""
+    options = {}
+    for field, name in _OPENAI_OPTIONS.items():
+        value = body.get(field)
+        if value is not None:
+            options[name] = [value] if name == "stop" and isinstance(value, str) else value
+    return options
+
+
+def _content(message):
+    """Return a message's text; content parts other than text are ignored."""
+    content = message.get("content")
+    if isinstance(content, list):
+        content = "".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    if not isinstance(content, str):
+        raise GatewayError(400, "message content must be a string or a list of text parts")
+    return content
+
+
+def _messages(body):
+    """Validate an OpenAI `messages` list. Returns [(role, content)]."""
+    messages = body.get("messages")
+    if not isinstance(messages, list) or not messages:
+        raise GatewayError(400, "'messages' must be a non-empty list")
+    parsed = []
+    for message in messages:
+        if not isinstance(message, dict) or message.get("role") not in (
+            "system",
+            "user",
+            "assistant",
+        ):
+            raise GatewayError(400, "each message needs a role of system, user or assistant")
+        parsed.append((message["role"], _content(message)))
+    return parsed
+
+
+class SessionStore:
+    """Server-side conversations by id; the least recently used go first.
+
+    Sessions idle for longer than ttl seconds are dropped, as is the least
+    recently used one whenever more than max_sessions exist.
+    """
+
+    def __init__(
+        self, max_sessions=DEFAULT_MAX_SESSIONS, ttl=DEFAULT_SESSION_TTL, clock=time.monotonic
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # id -> [ChatSession, turn lock, last used]
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def get(self, session_id, create):
+        """Return (session, turn lock) for session_id, calling create() if it is new."""
+        with self._lock:
+            entry = self._touch(session_id)
+        if entry is None:
+            # Built outside the lock: a new ChatSession may query Ollama
+            session = create()
+            with self._lock:
+                entry = self._touch(session_id)
+                if entry is None:
+                    entry = [session, threading.Lock(), self._clock()]
+                    self._sessions[session_id] = entry
+                    while len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+        return entry[0], entry[1]
+
+    def _touch(self, session_id):
+        now = self._clock()
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest[2] < self.ttl:
+                break
+            del self._sessions[oldest_id]
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry[2] = now
+            self._sessions.move_to_end(session_id)
+        return entry
+
+
+class Reply:
+    """A reply in progress: the model serving it and an iterator of (text, meta).
+
+    release, if given (e.g. a session's turn lock), runs once the stream is
+    exhausted, fails or is closed, even if it was never iterated.
+    """
+
+    def __init__(self, model, adapter, chunks, release=None):
+        self.model = model
+        self.adapter = adapter
+        self._chunks = chunks
+        self._release = release
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._chunks.close()
+        finally:
+            if self._release is not None:
+                self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class _Turn:
+    """A chat turn in progress; finish() records its reply in the session.
+
+    finish() runs however the turn ends. A reply cut short (the client hung
+    up, Ollama failed) is recorded as far as it got, so the history keeps
+    alternating user and assistant messages.
+    """
+
+    def __init__(self, session, stream):
+        self.session = session
+        self._stream = stream
+        self._parts = []
+        self._meta = None
+
+    def chunks(self):
+        """Yield the chat stream's (text, meta), keeping the reply."""
+        for chunk, chunk_meta in self._stream:
+            self._parts.append(chunk)
+            if chunk_meta is not None:
+                self._meta = chunk_meta
+            yield chunk, chunk_meta
+
+    def finish(self):
+        self._stream.close()
+        session = self.session
+        session.add_assistant_message("".join(self._parts))
+        if self._meta:
+            session.record_turn(self._meta)
+            session.maybe_compact(self._meta.get("prompt_eval_count", 0))
+        session.maybe_summarize()
+
+
+class Gateway:
+    """Routing and conversation state shared by every request to the server.
+
+    client defaults to the process-wide Ollama client and router to the
+    shared, hot-reloading KeywordRouter; context_limit to the registry's
+    num_ctx for the base model, else 8192.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        router=None,
+        max_sessions=DEFAULT_MAX_SESSIONS,
+        session_ttl=DEFAULT_SESSION_TTL,
+        context_limit=None,
+    ):
+        self.client = client if client is not None else ollama_client.get_client()
+        self._router = router
+        self.sessions = SessionStore(max_sessions, session_ttl)
+        if context_limit is None:
+            base_options = adapter_manager.inference_options(adapter_manager.get_base_model_name())
+            context_limit = base_options.get("num_ctx") or 8192
+        self.context_limit = context_limit
+        self.started = int(time.time())
+
+    @property
+    def router(self):
+        return self._router if self._router is not None else router_module.get_router()
+
+    def _installed(self):
+        return self.client.inventory.base_names()
+
+    def _adapter_for(self, model):
+        """Return the ChatSession adapter argument ("auto", "none" or a name) for `model`."""
+        if model is None or model in AUTO_MODELS:
+            return "auto"
+        name = model.removesuffix(":latest")
+        if name in ("base", "none") or model == adapter_manager.get_base_model_name():
+            return "none"
+        name = name.removeprefix(adapter_manager.ADAPTER_MODEL_PREFIX)
+        if adapter_manager.get_adapter(name) is None:
+            raise GatewayError(404, f"The model '{model}' does not exist")
+        return name
+
+    def _new_session(self, adapter, summarize):
+        return ChatSession(
+            adapter=adapter,
+            context_limit=self.context_limit,
+            nudge=False,
+            client=self.client,
+            router=self._router,
+            summarize=summarize,
+        )
+
+    def models(self):
+        """Return the OpenAI model list: "auto", the base model and installed adapters."""
+        installed = self._installed()
+        ids = ["auto", adapter_manager.get_base_model_name()]
+        for name, _ in adapter_manager.list_adapters():
+            model = adapter_manager.adapter_model_name(name)
+            if model in installed:
+                ids.append(model)
+        return {
+            "object": "list",
+            "data": [
+                {"id": i, "object": "model", "created": self.started, "owned_by": "locollm"}
+                for i in ids
+            ],
+        }
+
+    def chat(self, body, session_id=None):
+        """Start the chat turn an OpenAI chat request asks for. Returns a Reply."""
+        messages = _messages(body)
+        adapter = self._adapter_for(body.get("model"))
+        if session_id is None:
+            session = self._new_session(adapter, summarize=False)
+            lock = None
+        else:
+            session, lock = self.sessions.get(
+                session_id, lambda: self._new_session(adapter, summarize=True)
+            )
+            lock.acquire()
+        added = False
+        try:
+            if session_id is not None:
+                _switch_adapter(session, adapter)
+            add = {
+                "system": session.add_system_message,
+                "user": session.add_user_message,
+                "assistant": session.add_assistant_message,
+            }
+            for role, content in messages:
+                add[role](content)
+            added = True
+            session.fit_context()
+            stream = session.send(options=request_options(body))
+        except BaseException:
+            if added:
+                # Ollama failed before replying; record an empty reply in its place
+                session.add_assistant_message("")
+            if lock is not None:
+                lock.release()
+            raise
+        turn = _Turn(session, stream)
+
+        def release():
+            try:
+                turn.finish()
+            finally:
+                if lock is not None:
+                    lock.release()
+
+        return Reply(session.model, session.active_adapter, turn.chunks(), release)
+
+    def complete(self, body):
+        """Start the generation an OpenAI completion request asks for. Returns a Reply."""
+        prompt = body.get("prompt")
+        if isinstance(prompt, list) and len(prompt) == 1:
+            prompt = prompt[0]
+        if not isinstance(prompt, str):
+            raise GatewayError(400, "'prompt' must be a string")
+        adapter = self._adapter_for(body.get("model"))
+        if adapter == "auto":
+            # As ChatSession does: only route to adapters that are installed
+            routed = self.router.route(prompt)
+            installed = routed and adapter_manager.adapter_model_name(routed) in self._installed()
+            adapter = routed if installed else "none"
+        if adapter == "none":
+            model, adapter = adapter_manager.get_base_model_name(), None
+        else:
+            model = adapter_manager.adapter_model_name(adapter)
+        chunks = self.client.generate(
+            model, prompt, stream=True, with_meta=True, options=request_options(body) or None
+        )
+        return Reply(model, adapter, chunks)
+
+
+def _switch_adapter(session, adapter):
+    """Point an existing session at the adapter mode a later request asks for."""
+    if adapter == "auto":
+        if session.mode != "auto":
+            session.set_adapter("auto")
+    elif session.mode != "locked" or session.active_adapter != (
+        None if adapter == "none" else adapter
+    ):
+        session.set_adapter(adapter)
+
+
+def _usage(meta):
+    prompt_tokens = meta.get("prompt_eval_count", 0) if meta else 0
+    completion_tokens = meta.get("eval_count", 0) if meta else 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _finish_reason(meta, body):
+    """Return "length" if the reply used up the request's max_tokens, else "stop"."""
+    limit = request_options(body).get("num_predict")
+    if meta and limit and meta.get("eval_count", 0) >= limit:
+        return "length"
+    return "stop"
+
+
+def _make_handler(gateway):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "locollm"
+
+        def _body(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError as e:
+                # The body can't be skipped, so the connection can't be reused
+                self.close_connection = True
+                raise GatewayError(400, "invalid Content-Length header") from e
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else {}
+            except ValueError as e:
+                raise GatewayError(400, f"request body is not valid JSON ({e})") from e
+            if not isinstance(body, dict):
+                raise GatewayError(400, "request body must be a JSON object")
+            return body
+
+        def _send_json(self, payload, status=200, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_error(self, error):
+            self._send_json(error.as_dict(), status=error.status)
+
+        def send_response(self, code, message=None):
+            self._responded = True
+            super().send_response(code, message)
+
+        def _handle(self, method):
+            """Run method, answering any failure with an OpenAI-style JSON error."""
+            self._responded = False
+            try:
+                method()
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            except Exception as e:
+                if not isinstance(e, GatewayError):
+                    self.log_error("error serving %s:\n%s", self.path, traceback.format_exc())
+                    e = GatewayError(500, f"internal error: {e}", "server_error")
+                if self._responded:
+                    # The status line is gone already; all that is left is to hang up
+                    self.close_connection = True
+                else:
+                    self._send_error(e)
+
+        def do_GET(self):
+            self._handle(self._get)
+
+        def do_POST(self):
+            self._handle(self._post)
+
+        def _get(self):
+            if self.path.split("?")[0] != "/v1/models":
+                raise GatewayError(404, f"Unknown path: {self.path}")
+            with _upstream():
+                self._send_json(gateway.models())
+
+        def _post(self):
+            body = self._body()
+            path = self.path.split("?")[0]
+            headers = {}
+            with _upstream():
+                if path == "/v1/chat/completions":
+                    session_id = self.headers.get(SESSION_HEADER)
+                    if session_id:
+                        headers[SESSION_HEADER] = session_id
+                    reply = gateway.chat(body, session_id or None)
+                elif path == "/v1/completions":
+                    reply = gateway.complete(body)
+                else:
+                    raise GatewayError(404, f"Unknown path: {self.path}")
+            chat = path == "/v1/chat/completions"
+            headers["X-Locollm-Adapter"] = reply.adapter or "base"
+            with reply:
+                if body.get("stream"):
+                    self._stream(reply, body, chat, headers)
+                else:
+                    self._complete(reply, body, chat, headers)
+
+        def _complete(self, reply, body, chat, headers):
+            text = []
+            meta = None
+            with _upstream():
+                for chunk, chunk_meta in reply:
+                    text.append(chunk)
+                    if chunk_meta is not None:
+                        meta = chunk_meta
+            finish = _finish_reason(meta, body)
+            if chat:
+                choice = {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(text)},
+                    "finish_reason": finish,
+                }
+            else:
+                choice = {"index": 0, "text": "".join(text), "finish_reason": finish}
+            payload = {
+                "id": _completion_id(chat),
+                "object": "chat.completion" if chat else "text_completion",
+                "created": int(time.time()),
+                "model": reply.model,
+                "choices": [choice],
+                "usage": _usage(meta),
+            }
+            self._send_json(payload, headers=headers)
+
+        def _stream(self, reply, body, chat, headers):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            base = {
+                "id": _completion_id(chat),
+                "object": "chat.completion.chunk" if chat else "text_completion",
+                "created": int(time.time()),
+                "model": reply.model,
+            }
+
+            def event(text=None, finish=None, role=None):
+                if chat:
+                    delta = {} if text is None else {"content": text}
+                    if role:
+                        delta["role"] = role
+                    choice = {"index": 0, "delta": delta, "finish_reason": finish}
+                else:
+                    choice = {"index": 0, "text": text or "", "finish_reason": finish}
+                return {**base, "choices": [choice]}
+
+            try:
+                if chat:
+                    self._send_event(event("", role="assistant"))
+                meta = None
+                try:
+                    with _upstream():
+                        for chunk, chunk_meta in reply:
+                            if chunk:
+                                self._send_event(event(chunk))
+                            if chunk_meta is not None:
+                                meta = chunk_meta
+                except GatewayError as e:
+                    # Headers are gone already; report the failure in-band
+                    self._send_event(e.as_dict())
+                else:
+                    final = event(finish=_finish_reason(meta, body))
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        final["usage"] = _usage(meta)
+                    self._send_event(final)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client hung up; closing the reply stops Ollama generating
+                self.close_connection = True
+
+        def _send_event(self, payload):
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def _completion_id(chat):
+    return f"{'chatcmpl' if chat else 'cmpl'}-{uuid.uuid4().hex[:24]}"
+
+
+def make_server(gateway, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Return a ThreadingHTTPServer serving gateway; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), _make_handler(gateway))
+    server.daemon_threads = True
+    return server
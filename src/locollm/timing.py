@@ -0,0 +1,119 @@
+"""Client-side latency measurements for streamed responses.
+
+Ollama's own counters (load_duration, prompt_eval_duration, eval_duration)
+say where the server spent its time; StreamTimer adds what the user sees:
+time to the first streamed chunk (TTFT) and the gaps between chunks. A cold
+model load shows up as a large load_duration and TTFT with normal gaps; slow
+decoding shows up as large gaps.
+"""
+
+import time
+
+# A load_duration above this means the model had to be read into memory
+COLD_LOAD_NS = 500_000_000
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of values, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class StreamTimer:
+    """Times one streamed response from the moment the request is sent."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._start = clock()
+        self._last = None
+        self.first_s = None
+        self.gaps = []
+
+    def chunk(self):
+        """Record the arrival of a non-empty chunk."""
+        now = self._clock()
+        if self._last is None:
+            self.first_s = now - self._start
+        else:
+            self.gaps.append(now - self._last)
+        self._last = now
+
+    def as_meta(self):
+        """Return ttft_ms, gap_p50_ms, gap_p95_ms and chunks for a response's meta."""
+        return {
+            "ttft_ms": _ms(self.first_s),
+            "gap_p50_ms": _ms(percentile(self.gaps, 50)),
+            "gap_p95_ms": _ms(percentile(self.gaps, 95)),
+            "chunks": len(self.gaps) + (self.first_s is not None),
+        }
+
+
+def format_timing(meta):
+    """Return e.g. 'TTFT 0.42s | gaps 31/58ms | cold load 2.1s', or '' without timings."""
+    parts = []
+    if meta.get("ttft_ms") is not None:
+        parts.append(f"TTFT {meta['ttft_ms'] / 1000:.2f}s")
+    if meta.get("gap_p50_ms") is not None:
+        parts.append(f"gaps {meta['gap_p50_ms']:.0f}/{meta['gap_p95_ms']:.0f}ms")
+    load = meta.get("load_duration", 0)
+    if load >= COLD_LOAD_NS:
+        parts.append(f"cold load {load / 1e9:.1f}s")
+    return " | ".join(parts)
+
+
+class LatencyStats:
+    """Aggregates the timing meta of many responses (a chat session, an eval run)."""
+
+    def __init__(self):
+        self.ttft_ms = []
+        self.gap_p50_ms = []
+        self.gap_p95_ms = []
+        self.load_ns = 0
+        self.prompt_eval_ns = 0
+        self.cold_loads = 0
+
+    def add(self, meta):
+        if not meta:
+            return
+        for name in ("ttft_ms", "gap_p50_ms", "gap_p95_ms"):
+            if meta.get(name) is not None:
+                getattr(self, name).append(meta[name])
+        load = meta.get("load_duration", 0)
+        self.load_ns += load
+        self.cold_loads += load >= COLD_LOAD_NS
+        self.prompt_eval_ns += meta.get("prompt_eval_duration", 0)
+
+    def __bool__(self):
+        return bool(self.ttft_ms)
+
+    def as_dict(self):
+        """TTFT p50/p95 across responses, the median per-response gap p50, the
+        p95 of per-response gap p95s, and total load / prompt-eval time."""
+        return {
+            "responses": len(self.ttft_ms),
+            "ttft_p50_ms": percentile(self.ttft_ms, 50),
+            "ttft_p95_ms": percentile(self.ttft_ms, 95),
+            "gap_p50_ms": percentile(self.gap_p50_ms, 50),
+            "gap_p95_ms": percentile(self.gap_p95_ms, 95),
+            "cold_loads": self.cold_loads,
+            "load_s": round(self.load_ns / 1e9, 2),
+            "prompt_eval_s": round(self.prompt_eval_ns / 1e9, 2),
+        }
+
+    def display(self):
+        stats = self.as_dict()
+        line = (
+            f"latency: TTFT p50 {stats['ttft_p50_ms'] or 0:.0f}ms "
+            f"p95 {stats['ttft_p95_ms'] or 0:.0f}ms"
+        )
+        if stats["gap_p50_ms"] is not None:
+            line += f" | gaps p50 {stats['gap_p50_ms']:.0f}ms p95 {stats['gap_p95_ms']:.0f}ms"
+        line += f" | {stats['cold_loads']} cold loads ({stats['load_s']:.1f}s)"
+        return line + f" | prompt eval {stats['prompt_eval_s']:.1f}s"
@@ -0,0 +1,42 @@
+"""Local token-count estimates for chat prompts.
+
+Approximates how a BPE tokenizer like Qwen's splits text without loading
+one: digits count one token each, words about one token per six letters,
+punctuation runs one per two characters, and non-ASCII letters one each.
+It errs on the high side, so a prompt that fits by this estimate fits the
+model's context. Callers that see the server's real prompt_eval_count can
+refine the estimate with a scale factor (see ChatSession).
+"""
+
+import re
+
+# Chat template tokens around each message (<|im_start|>role\n ... <|im_end|>\n)
+MESSAGE_OVERHEAD = 5
+
+# Tokens that prime the assistant's reply at the end of every prompt
+PROMPT_OVERHEAD = 3
+
+_PIECES = re.compile(r"\d|[^\W\d_]+|\s+|[^\w\s]+|_+")
+
+
+def estimate_tokens(text):
+    """Return an estimate of the number of tokens in text."""
+    tokens = 0
+    for match in _PIECES.finditer(text):
+        piece = match.group()
+        first = piece[0]
+        if first.isdigit():
+            tokens += 1
+        elif first.isspace():
+            # A single space merges into the following word
+            tokens += piece != " "
+        elif first.isalpha():
+            tokens += (len(piece) + 5) // 6 if piece.isascii() else len(piece)
+        else:
+            tokens += (len(piece) + 1) // 2
+    return tokens
+
+
+def message_tokens(message):
+    """Return the estimated prompt tokens for one chat message, template included."""
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
@@ -0,0 +1,197 @@
+"""Shared fixtures: a minimal in-process stand-in for the Ollama REST API."""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+
+class StubOllama:
+    """Records requests and serves canned Ollama-style responses.
+
+    Streaming endpoints reply with chunked NDJSON, like the real server.
+    Set ``replies[model]`` to control the text a model generates; it is
+    streamed one word per chunk.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.replies = {}
+        # Models reported as loaded by /api/ps; generate/chat load their model
+        self.running = []
+        self.models = [
+            {"name": "qwen3:4b", "digest": "d-base", "size": 2_500_000_000},
+            {"name": "locollm-math:latest", "digest": "d-math", "size": 2_600_000_000},
+        ]
+        # Model name -> SHA-256 of its weights blob, reported by /api/show
+        self.blobs = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply_for(self, model):
+        return self.replies.get(model, "The answer is 42")
+
+    def blob_for(self, name):
+        return self.blobs.get(name if ":" in name else f"{name}:latest", self.blobs.get(name))
+
+    def created(self, name, modelfile):
+        """Install a created model, hashing its FROM file as Ollama would."""
+        name = name if ":" in name else f"{name}:latest"
+        source = Path(modelfile.split("\n")[0].removeprefix("FROM ").strip())
+        blob = hashlib.sha256(source.read_bytes() if source.is_file() else b"").hexdigest()
+        self.blobs[name] = blob
+        self.models = [m for m in self.models if m["name"] != name]
+        self.models.append({"name": name, "digest": f"d-{blob[:12]}", "size": 1})
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw) if raw else {}
+
+        def _send_json(self, payload, status=200):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, lines):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for obj in lines:
+                    data = (json.dumps(obj) + "\n").encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Client hung up mid-stream (cancellation tests)
+                self.close_connection = True
+
+        def do_GET(self):
+            stub.requests.append(("GET", self.path, None))
+            if self.path == "/":
+                body = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == "/api/tags":
+                self._send_json({"models": stub.models})
+            elif self.path == "/api/ps":
+                self._send_json({"models": [{"name": name} for name in stub.running]})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        def do_DELETE(self):
+            body = self._body()
+            stub.requests.append(("DELETE", self.path, body))
+            self._send_json({})
+
+        def do_POST(self):
+            body = self._body()
+            stub.requests.append(("POST", self.path, body))
+            stream = body.get("stream", True)
+            model = body.get("model")
+            if self.path in ("/api/generate", "/api/chat") and model not in stub.running:
+                stub.running.append(model)
+            if self.path == "/api/generate" and not body.get("prompt"):
+                # An empty prompt just loads the model
+                self._send_json({"response": "", "done": True, "load_duration": 1_500_000_000})
+            elif self.path == "/api/generate":
+                words = stub.reply_for(body.get("model")).split(" ")
+                final = {"done": True, "eval_count": len(words), "eval_duration": 1_000_000}
+                if not stream:
+                    self._send_json({"response": " ".join(words), **final})
+                    return
+                chunks = [
+                    {"response": w if i == 0 else " " + w, "done": False}
+                    for i, w in enumerate(words)
+                ]
+                self._send_stream([*chunks, {"response": "", **final}])
+            elif self.path == "/api/chat":
+                words = stub.reply_for(body.get("model")).split(" ")
+                final = {
+                    "done": True,
+                    "eval_count": len(words),
+                    "eval_duration": 1_000_000,
+                    "prompt_eval_count": 10,
+                    "total_duration": 2_000_000,
+                }
+                if not stream:
+                    message = {"role": "assistant", "content": " ".join(words)}
+                    self._send_json({"message": message, **final})
+                    return
+                chunks = [
+                    {"message": {"content": w if i == 0 else " " + w}, "done": False}
+                    for i, w in enumerate(words)
+                ]
+                self._send_stream([*chunks, {"message": {"content": ""}, **final}])
+            elif self.path == "/api/show":
+                name = body.get("name", "")
+                blob = stub.blob_for(name)
+                if blob is None:
+                    self._send_json({"error": f"model '{name}' not found"}, status=404)
+                else:
+                    self._send_json({"modelfile": f"FROM /models/blobs/sha256-{blob}\n"})
+            elif self.path == "/api/create":
+                stub.created(body["name"], body.get("modelfile", ""))
+                self._send_stream([{"status": "working"}, {"status": "success"}])
+            elif self.path == "/api/pull":
+                self._send_stream([{"status": "working"}, {"status": "success"}])
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+    return Handler
+
+
+@pytest.fixture
+def ollama_stub():
+    stub = StubOllama().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def ollama_stub_factory():
+    """Return a function that starts additional stub servers for the test."""
+    stubs = []
+
+    def start():
+        stub = StubOllama().start()
+        stubs.append(stub)
+        return stub
+
+    yield start
+    for stub in stubs:
+        stub.stop()
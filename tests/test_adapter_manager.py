@@ -1,8 +1,12 @@
 """Tests for the adapter manager — registry loading, modelfile building."""
 
+import hashlib
+
 import pytest
 
-from locollm import adapter_manager
+from locollm import adapter_manager, ollama_client
+from locollm.gguf_hashes import HashCache
+from locollm.ollama_client import OllamaClient
 
 
 class TestRegistry:
@@ -60,7 +64,7 @@ class TestModelfile:
             "ollama_base": "qwen3:4b",
             "system_prompt": "You are a math tutor.",
         }
-        mf = adapter_manager._build_modelfile(config, {})
+        mf = adapter_manager._build_modelfile("tutor", config, {})
         assert mf.startswith("FROM qwen3:4b")
         assert "You are a math tutor." in mf
 
@@ -81,7 +85,7 @@ class TestModelfile:
             # Use an absolute-style path by making gguf_path the filename
             # and ADAPTERS_DIR the parent
             config["gguf_path"] = tmp_path.name + "/model.gguf"
-            mf = am._build_modelfile(config, {})
+            mf = am._build_modelfile("math", config, {"adapters": {"math": config}})
             assert mf.startswith("FROM ")
             assert "model.gguf" in mf
         finally:
@@ -93,12 +97,17 @@ class TestModelfile:
             "gguf_path": "nonexistent/model.gguf",
         }
         with pytest.raises(FileNotFoundError):
-            adapter_manager._build_modelfile(config, {})
+            adapter_manager._build_modelfile("math", config, {"adapters": {"math": config}})
+
+    def test_build_merged_gguf_without_path(self):
+        config = {"type": "merged-gguf"}
+        with pytest.raises(ValueError, match="gguf_path"):
+            adapter_manager._build_modelfile("math", config, {"adapters": {"math": config}})
 
     def test_build_modelfile_unsupported_type(self):
         config = {"type": "lora", "ollama_base": "qwen3:4b"}
         with pytest.raises(ValueError, match="Unsupported adapter type"):
-            adapter_manager._build_modelfile(config, {})
+            adapter_manager._build_modelfile("math", config, {})
 
 
 class TestAdapterModelName:
@@ -112,6 +121,82 @@ class TestAdapterModelName:
         assert name.startswith(adapter_manager.ADAPTER_MODEL_PREFIX)
 
 
+class TestResidencyPolicy:
+    """Tests for per-model keep_alive / preload settings."""
+
+    REGISTRY = {
+        "residency": {"keep_alive": "5m"},
+        "base_model": {"ollama_name": "qwen3:4b", "residency": {"preload": True}},
+        "adapters": {
+            "math": {"residency": {"keep_alive": "30m", "preload": True}},
+            "code": {"residency": {"pin": True}},
+            "analysis": {},
+        },
+    }
+
+    @pytest.fixture(autouse=True)
+    def _registry(self, monkeypatch):
+        monkeypatch.setattr(adapter_manager, "load_registry", lambda: self.REGISTRY)
+
+    def test_adapter_overrides_default(self):
+        policy = adapter_manager.residency_policy("locollm-math:latest")
+        assert policy == {"keep_alive": "30m", "preload": True}
+
+    def test_defaults_apply(self):
+        assert adapter_manager.residency_policy("locollm-analysis") == {
+            "keep_alive": "5m",
+            "preload": False,
+        }
+        assert adapter_manager.keep_alive_for("qwen3:4b") == "5m"
+
+    def test_pin_keeps_forever(self):
+        assert adapter_manager.residency_policy("locollm-code") == {
+            "keep_alive": -1,
+            "preload": True,
+        }
+
+    def test_unknown_model_gets_defaults(self):
+        assert adapter_manager.keep_alive_for("llama3:8b") == "5m"
+
+    def test_preload_models(self):
+        assert adapter_manager.preload_models() == ["qwen3:4b", "locollm-math", "locollm-code"]
+
+
+class TestInferenceOptions:
+    """Tests for registry inference options."""
+
+    REGISTRY = {
+        "options": {"num_ctx": 8192, "temperature": 0.7},
+        "eval_options": {"temperature": 0, "num_predict": 512},
+        "base_model": {"ollama_name": "qwen3:4b", "options": {"num_gpu": 99}},
+        "adapters": {"code": {"options": {"temperature": 0.2}}, "math": {}},
+    }
+
+    @pytest.fixture(autouse=True)
+    def _registry(self, monkeypatch):
+        monkeypatch.setattr(adapter_manager, "load_registry", lambda: self.REGISTRY)
+
+    def test_adapter_overrides_default(self):
+        options = adapter_manager.inference_options("locollm-code:latest")
+        assert options == {"num_ctx": 8192, "temperature": 0.2}
+
+    def test_base_model_overrides(self):
+        assert adapter_manager.inference_options("qwen3:4b")["num_gpu"] == 99
+
+    def test_unknown_model_gets_defaults(self):
+        assert adapter_manager.inference_options("llama3:8b") == self.REGISTRY["options"]
+
+    def test_result_is_a_copy(self):
+        adapter_manager.inference_options("locollm-math")["num_ctx"] = 1
+        adapter_manager.eval_options()["num_predict"] = 1
+        assert self.REGISTRY["options"]["num_ctx"] == 8192
+        assert adapter_manager.eval_options() == {"temperature": 0, "num_predict": 512}
+
+    def test_shipped_registry_caps_eval(self, monkeypatch):
+        monkeypatch.undo()
+        assert adapter_manager.eval_options()["num_predict"] > 0
+
+
 class TestEvalDatasetPath:
     """Tests for eval dataset path resolution."""
 
@@ -135,3 +220,185 @@ class TestEvalDatasetPath:
 
     def test_get_eval_dataset_path_missing(self):
         assert adapter_manager.get_eval_dataset_path("nonexistent") is None
+
+
+class TestRegistryCache:
+    """Tests for the in-process registry cache."""
+
+    REGISTRY = (
+        'base_model:\n  ollama_name: "qwen3:4b"\nadapters:\n  math:\n    type: "merged-gguf"\n'
+    )
+
+    def _use_registry(self, monkeypatch, tmp_path, text):
+        path = tmp_path / "registry.yaml"
+        path.write_text(text)
+        monkeypatch.setattr(adapter_manager, "REGISTRY_PATH", path)
+        return path
+
+    def test_parsed_once(self, monkeypatch, tmp_path):
+        self._use_registry(monkeypatch, tmp_path, self.REGISTRY)
+        calls = []
+        real_parse = adapter_manager._parse_registry
+        monkeypatch.setattr(
+            adapter_manager, "_parse_registry", lambda f: calls.append(1) or real_parse(f)
+        )
+        first = adapter_manager.load_registry()
+        adapter_manager.get_adapter("math")
+        adapter_manager.list_adapters()
+        adapter_manager.get_base_model_name()
+        assert adapter_manager.load_registry() is first
+        assert len(calls) == 1
+
+    def test_edit_invalidates(self, monkeypatch, tmp_path):
+        path = self._use_registry(monkeypatch, tmp_path, self.REGISTRY)
+        assert adapter_manager.get_adapter("code") is None
+        path.write_text(self.REGISTRY + '  code:\n    type: "merged-gguf"\n')
+        assert adapter_manager.get_adapter("code")["type"] == "merged-gguf"
+
+    def test_reload_forces_reparse(self, monkeypatch, tmp_path):
+        self._use_registry(monkeypatch, tmp_path, self.REGISTRY)
+        first = adapter_manager.load_registry()
+        assert adapter_manager.reload_registry() is not first
+        assert adapter_manager.reload_registry() == first
+
+    def test_registry_is_read_only(self):
+        registry = adapter_manager.load_registry()
+        with pytest.raises(TypeError):
+            registry["adapters"]["math"]["type"] = "system-prompt"
+        assert isinstance(registry["adapters"]["math"]["router_keywords"], tuple)
+
+    def test_thaw_returns_mutable_copy(self):
+        config = adapter_manager.thaw(adapter_manager.get_adapter("math"))
+        config["router_keywords"].append("extra")
+        assert "extra" not in adapter_manager.get_adapter("math")["router_keywords"]
+
+
+class TestRegistrySnapshot:
+    """Tests for the compiled registry snapshot kept next to registry.yaml."""
+
+    REGISTRY = (
+        'base_model:\n  ollama_name: "qwen3:4b"\n'
+        "adapters:\n"
+        '  math:\n    type: "merged-gguf"\n    gguf_path: "math/model.gguf"\n'
+        '    router_keywords: ["Solve", "MATH"]\n'
+    )
+
+    @pytest.fixture
+    def path(self, monkeypatch, tmp_path):
+        path = tmp_path / "registry.yaml"
+        path.write_text(self.REGISTRY)
+        monkeypatch.setattr(adapter_manager, "REGISTRY_PATH", path)
+        return path
+
+    def _count_parses(self, monkeypatch):
+        calls = []
+        real_parse = adapter_manager._parse_registry
+        monkeypatch.setattr(
+            adapter_manager, "_parse_registry", lambda f: calls.append(1) or real_parse(f)
+        )
+        return calls
+
+    def test_snapshot_skips_yaml(self, monkeypatch, path):
+        first = adapter_manager.reload_registry()
+        assert adapter_manager.snapshot_path(path).exists()
+        calls = self._count_parses(monkeypatch)
+        assert adapter_manager.reload_registry() == first
+        assert calls == []
+
+    def test_yaml_edit_rebuilds(self, monkeypatch, path):
+        adapter_manager.reload_registry()
+        calls = self._count_parses(monkeypatch)
+        path.write_text(self.REGISTRY.replace('"MATH"', '"Algebra"'))
+        assert adapter_manager.router_keywords() == {"math": ("solve", "algebra")}
+        assert len(calls) == 1
+        adapter_manager.reload_registry()
+        assert len(calls) == 1
+
+    def test_corrupt_snapshot_rebuilt(self, path):
+        adapter_manager.snapshot_path(path).write_text("{not json")
+        assert adapter_manager.reload_registry()["base_model"]["ollama_name"] == "qwen3:4b"
+        assert adapter_manager.snapshot_path(path).read_text().startswith("{")
+
+    def test_compiled_tables(self, path):
+        assert adapter_manager.router_keywords() == {"math": ("solve", "math")}
+        assert adapter_manager.gguf_path("math") == path.parent / "math" / "model.gguf"
+        assert adapter_manager.gguf_path("code") is None
+
+    def test_modelfile_loads_the_hashed_gguf(self, path):
+        gguf = path.parent / "math" / "model.gguf"
+        gguf.parent.mkdir()
+        gguf.write_bytes(b"weights")
+        registry = adapter_manager.reload_registry()
+        config = adapter_manager.get_adapter("math")
+        modelfile = adapter_manager._build_modelfile("math", config, registry)
+        assert modelfile == f"FROM {adapter_manager.gguf_path('math')}"
+        assert modelfile == f"FROM {gguf}"
+
+    def test_other_registry_normalised(self):
+        registry = {"adapters": {"poetry": {"router_keywords": ["Poem"]}, "plain": {}}}
+        assert adapter_manager.router_keywords(registry) == {"poetry": ["poem"]}
+
+    def test_invalid_registry_rejected(self, path):
+        path.write_text("adapters:\n  math:\n    type: lora\n    router_keywords: solve\n")
+        with pytest.raises(ValueError, match="type must be one of") as exc:
+            adapter_manager.reload_registry()
+        assert "router_keywords must be a list of strings" in str(exc.value)
+        assert not adapter_manager.snapshot_path(path).exists()
+
+
+class TestSyncAdapterModel:
+    """Tests for content-hash-aware adapter model sync."""
+
+    REGISTRY = {
+        "base_model": {"ollama_name": "qwen3:4b"},
+        "adapters": {"math": {"type": "merged-gguf", "gguf_path": "math/model.gguf"}},
+    }
+    MODELS = [{"name": "locollm-math:latest", "digest": "d-math"}]
+
+    @pytest.fixture
+    def stub(self, ollama_stub, monkeypatch, tmp_path):
+        monkeypatch.setattr(adapter_manager, "load_registry", lambda: self.REGISTRY)
+        monkeypatch.setattr(adapter_manager, "ADAPTERS_DIR", tmp_path)
+        ollama_client.set_client(OllamaClient(ollama_stub.url))
+        yield ollama_stub
+        ollama_client.set_client(None)
+
+    @pytest.fixture
+    def gguf(self, tmp_path):
+        path = tmp_path / "math" / "model.gguf"
+        path.parent.mkdir()
+        path.write_bytes(b"weights")
+        return path
+
+    def _sync(self, tmp_path, models=MODELS):
+        hashes = HashCache(tmp_path / "hashes.json")
+        return adapter_manager.sync_adapter_model("math", models, lambda _: None, hashes)
+
+    def _creates(self, stub):
+        return [r for r in stub.requests if r[1] == "/api/create"]
+
+    def test_matching_blob_is_unchanged(self, stub, gguf, tmp_path):
+        stub.blobs["locollm-math:latest"] = hashlib.sha256(b"weights").hexdigest()
+        assert self._sync(tmp_path) == "unchanged"
+        # The match is remembered, so the next run does not ask Ollama
+        stub.requests.clear()
+        assert self._sync(tmp_path) == "unchanged"
+        assert stub.requests == []
+
+    def test_changed_blob_is_recreated(self, stub, gguf, tmp_path):
+        stub.blobs["locollm-math:latest"] = "0" * 64
+        assert self._sync(tmp_path) == "updated"
+        [(_, _, body)] = self._creates(stub)
+        assert body["modelfile"] == f"FROM {gguf}"
+
+    def test_missing_model_is_created(self, stub, gguf, tmp_path):
+        assert self._sync(tmp_path, models=[]) == "created"
+        assert len(self._creates(stub)) == 1
+
+    def test_installed_model_without_gguf_kept(self, stub, tmp_path):
+        assert self._sync(tmp_path) == "unchanged"
+        assert self._creates(stub) == []
+
+    def test_missing_gguf_for_new_model(self, stub, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            self._sync(tmp_path, models=[])
@@ -0,0 +1,189 @@
+"""Tests for the asyncio Ollama client — run against an in-process stub server."""
+
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from locollm import ollama_client
+from locollm.async_ollama_client import AsyncOllamaClient, OllamaHTTPError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncOllamaClient:
+    def test_check_running(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                return await client.check_running()
+
+        assert run(go()) is True
+
+    def test_check_running_unreachable(self):
+        async def go():
+            async with AsyncOllamaClient("http://127.0.0.1:9") as client:
+                return await client.check_running()
+
+        assert run(go()) is False
+
+    def test_list_models(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                return await client.list_models()
+
+        assert run(go()) == ["qwen3:4b", "locollm-math:latest"]
+
+    def test_generate_non_streaming(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = "four"
+
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                return await client.generate("qwen3:4b", "2+2?", stream=False)
+
+        assert run(go()) == "four"
+
+    def test_generate_streaming(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = "one two three"
+
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                return [chunk async for chunk in client.generate("qwen3:4b", "count")]
+
+        assert run(go()) == ["one", " two", " three"]
+
+    def test_chat_streaming_meta_on_last_chunk(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                messages = [{"role": "user", "content": "hi"}]
+                return [item async for item in client.chat("qwen3:4b", messages)]
+
+        chunks = run(go())
+        assert all(meta is None for _, meta in chunks[:-1])
+        assert chunks[-1][1]["prompt_eval_count"] == 10
+
+    def test_keep_alive_policy_and_load(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url, keep_alive=lambda m: "30m") as client:
+                await client.generate_with_meta("qwen3:4b", "hi")
+                return await client.load_model("qwen3:4b")
+
+        assert run(go()) == 1_500_000_000
+        generate, load = [body for _, path, body in ollama_stub.requests[-2:]]
+        assert generate["keep_alive"] == load["keep_alive"] == "30m"
+        assert load["prompt"] == ""
+
+    def test_options_merged_into_payload(self, ollama_stub):
+        async def go():
+            client = AsyncOllamaClient(ollama_stub.url, options=lambda m: {"num_ctx": 8192})
+            async with client:
+                await client.generate_with_meta("qwen3:4b", "hi", options={"num_predict": 64})
+
+        run(go())
+        body = ollama_stub.requests[-1][2]
+        assert body["options"] == {"num_ctx": 8192, "num_predict": 64}
+
+    def test_generate_with_meta_times_stream(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                return await client.generate_with_meta("qwen3:4b", "hi")
+
+        text, meta = run(go())
+        assert text == "The answer is 42"
+        assert meta["eval_count"] == 4 and meta["chunks"] == 4
+        assert meta["ttft_ms"] > 0
+
+    def test_pull_model_reports_progress(self, ollama_stub):
+        seen = []
+
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                await client.pull_model("qwen3:4b", on_progress=seen.append)
+
+        run(go())
+        assert [s["status"] for s in seen] == ["working", "success"]
+
+    def test_http_error_raises(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                await client._request_json("GET", "/api/missing", "tags")
+
+        with pytest.raises(OllamaHTTPError) as exc:
+            run(go())
+        assert exc.value.status == 404
+
+
+class TestAsyncPooling:
+    def test_sequential_requests_reuse_connection(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url) as client:
+                for _ in range(3):
+                    await client.list_models()
+                    [c async for c in client.generate("qwen3:4b", "hi")]
+                return client.stats.as_dict()
+
+        stats = run(go())
+        assert stats["requests"] == 6
+        assert stats["new_connections"] == 1
+
+    def test_concurrent_requests_overlap(self, ollama_stub):
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url, max_connections=4) as client:
+                calls = [client.generate("qwen3:4b", f"q{i}", stream=False) for i in range(8)]
+                return await asyncio.gather(*calls), client.stats.new_connections
+
+        results, new_connections = run(go())
+        assert results == ["The answer is 42"] * 8
+        assert new_connections <= 4
+
+
+class TestCancellation:
+    def test_closing_stream_early_frees_connection(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = " ".join(["word"] * 50)
+
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url, max_connections=1) as client:
+                async with aclosing(client.generate("qwen3:4b", "ramble")) as stream:
+                    async for _ in stream:
+                        break
+                # The only slot must be free again for this to complete
+                return await asyncio.wait_for(client.list_models(), 5)
+
+        assert "qwen3:4b" in run(go())
+
+    def test_cancelling_task_mid_stream_frees_connection(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = " ".join(["word"] * 50)
+
+        async def go():
+            async with AsyncOllamaClient(ollama_stub.url, max_connections=1) as client:
+                started = asyncio.Event()
+
+                async def consume():
+                    async for _ in client.generate("qwen3:4b", "ramble"):
+                        started.set()
+                        await asyncio.sleep(1)
+
+                task = asyncio.create_task(consume())
+                await started.wait()
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                return await asyncio.wait_for(client.list_models(), 5)
+
+        assert "qwen3:4b" in run(go())
+
+
+class TestDefaultHost:
+    def test_follows_hosts_env(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434")
+        assert AsyncOllamaClient().base_url == "http://gpu0:11434"
+
+    def test_unset_env_is_localhost(self, monkeypatch):
+        monkeypatch.delenv(ollama_client.HOSTS_ENV, raising=False)
+        assert AsyncOllamaClient().base_url == ollama_client.BASE_URL
+
+    def test_refuses_several_hosts(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434,gpu1:11434")
+        with pytest.raises(ValueError, match="2 hosts"):
+            AsyncOllamaClient()
@@ -0,0 +1,267 @@
+"""Tests for the multi-backend pool — run against several stub servers."""
+
+import asyncio
+from contextlib import aclosing
+
+import pytest
+import requests
+
+from locollm import async_ollama_client, ollama_client
+from locollm.async_ollama_client import AsyncOllamaClient
+from locollm.backend_pool import AsyncBackendPool, BackendPool, parse_hosts
+from locollm.ollama_client import OllamaClient
+
+DEAD_URL = "http://127.0.0.1:9"
+
+
+def _generates(stub):
+    return sum(1 for _, path, _ in stub.requests if path == "/api/generate")
+
+
+class _SlowClient(OllamaClient):
+    """A reachable backend whose generations time out."""
+
+    def generate(self, *args, **kwargs):
+        raise requests.ReadTimeout("read timed out")
+
+
+class _SlowAsyncClient(AsyncOllamaClient):
+    async def generate_with_meta(self, *args, **kwargs):
+        raise asyncio.TimeoutError
+
+
+class _CutOffAsyncClient(AsyncOllamaClient):
+    """A backend that dies partway through a reply."""
+
+    async def generate_with_meta(self, *args, **kwargs):
+        raise ConnectionError("connection closed mid-response")
+
+
+class TestParseHosts:
+    def test_urls_and_bare_hosts(self):
+        hosts = parse_hosts(" http://gpu0:11434/, gpu1:11434 ,,")
+        assert hosts == ["http://gpu0:11434", "http://gpu1:11434"]
+
+    def test_empty(self):
+        assert parse_hosts("") == []
+
+
+class TestDispatch:
+    def test_prefers_backend_with_model_resident(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        b.running.append("locollm-math:latest")
+        with BackendPool([a.url, b.url]) as pool:
+            pool.generate("locollm-math", "2+2?", stream=False)
+        assert (_generates(a), _generates(b)) == (0, 1)
+
+    def test_least_loaded_when_none_resident(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        with BackendPool([a.url, b.url]) as pool:
+            held = pool.generate("qwen3:4b", "first")
+            assert [backend.in_flight for backend in pool.backends] == [1, 0]
+            pool.generate("locollm-math", "second", stream=False)
+            held.close()
+            assert [backend.in_flight for backend in pool.backends] == [0, 0]
+        assert (_generates(a), _generates(b)) == (1, 1)
+
+    def test_dispatch_marks_model_resident(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        with BackendPool([a.url, b.url]) as pool:
+            pool.generate("locollm-math", "one", stream=False)
+            pool.generate("qwen3:4b", "two", stream=False)
+            pool.generate("locollm-math", "three", stream=False)
+            assert "locollm-math:latest" in pool.backends[0].resident
+        # Both math requests went to the backend that already had it loaded
+        assert (_generates(a), _generates(b)) == (3, 0)
+
+    def test_stream_consumed_releases_slot(self, ollama_stub_factory):
+        a = ollama_stub_factory()
+        with BackendPool([a.url]) as pool:
+            chunks = list(pool.chat("qwen3:4b", [{"role": "user", "content": "hi"}]))
+            assert chunks[-1][1]["eval_count"] == 4
+            assert pool.backends[0].in_flight == 0
+
+
+class TestHealth:
+    def test_unreachable_backend_skipped(self, ollama_stub_factory):
+        live = ollama_stub_factory()
+        with BackendPool([DEAD_URL, live.url]) as pool:
+            assert pool.generate("qwen3:4b", "hi", stream=False) == "The answer is 42"
+            assert [b.healthy for b in pool.backends] == [False, True]
+
+    def test_failover_when_backend_dies_between_checks(self, ollama_stub_factory):
+        live = ollama_stub_factory()
+        with BackendPool([DEAD_URL, live.url]) as pool:
+            pool.refresh()
+            # Stale health info: the dead backend still looks up with the model loaded
+            pool.backends[0].healthy = True
+            pool.backends[0].resident = {"qwen3:4b"}
+            assert pool.generate("qwen3:4b", "hi", stream=False) == "The answer is 42"
+            dead = pool.backends[0]
+            assert (dead.healthy, dead.failures, dead.in_flight) == (False, 1, 0)
+
+    def test_read_timeout_does_not_fail_over(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+
+        def client_factory(url):
+            return (_SlowClient if url == a.url else OllamaClient)(url)
+
+        with BackendPool([a.url, b.url], client_factory=client_factory) as pool:
+            with pytest.raises(requests.ReadTimeout):
+                pool.generate("qwen3:4b", "hi", stream=False)
+            slow = pool.backends[0]
+            assert (slow.healthy, slow.failures, slow.in_flight) == (True, 0, 0)
+        assert _generates(b) == 0
+
+    def test_all_down_raises(self):
+        with BackendPool([DEAD_URL]) as pool:
+            assert pool.check_running() is False
+            with pytest.raises(requests.ConnectionError):
+                pool.generate("qwen3:4b", "hi", stream=False)
+
+    def test_recovered_backend_rejoins_on_refresh(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        now = [0.0]
+        with BackendPool([a.url, b.url], health_interval=10, clock=lambda: now[0]) as pool:
+            pool.refresh()
+            pool.backends[0].healthy = False
+            pool.generate("qwen3:4b", "hi", stream=False)
+            now[0] = 11
+            pool.generate("locollm-math", "hi", stream=False)
+            assert all(backend.healthy for backend in pool.backends)
+        assert (_generates(a), _generates(b)) == (1, 1)
+
+
+class TestManagement:
+    def test_create_applied_to_every_backend(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        with BackendPool([a.url, b.url]) as pool:
+            pool.create_model("locollm-code", "FROM qwen3:4b")
+        for stub in (a, b):
+            assert ("POST", "/api/create") in [(m, p) for m, p, _ in stub.requests]
+
+    def test_running_models_merged(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        a.running.append("qwen3:4b")
+        b.running.append("locollm-math:latest")
+        with BackendPool([a.url, b.url]) as pool:
+            assert pool.running_models() == ["locollm-math:latest", "qwen3:4b"]
+
+
+class TestAsyncPool:
+    def test_prefers_backend_with_model_resident(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+        b.running.append("locollm-math:latest")
+
+        async def go():
+            async with AsyncBackendPool([a.url, b.url]) as pool:
+                return await pool.generate_with_meta("locollm-math", "2+2?")
+
+        text, meta = asyncio.run(go())
+        assert text == "The answer is 42"
+        assert (_generates(a), _generates(b)) == (0, 1)
+
+    def test_concurrent_requests_spread_across_backends(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+
+        async def go():
+            async with AsyncBackendPool([a.url, b.url]) as pool:
+                await asyncio.gather(
+                    *(pool.generate_with_meta("qwen3:4b", str(i)) for i in range(4))
+                )
+                return [backend.in_flight for backend in pool.backends]
+
+        assert asyncio.run(go()) == [0, 0]
+        assert _generates(a) > 0 and _generates(b) > 0
+
+    def test_stream_fails_over_from_dead_backend(self, ollama_stub_factory):
+        live = ollama_stub_factory()
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def go():
+            async with AsyncBackendPool([DEAD_URL, live.url]) as pool:
+                await pool.refresh()
+                # Stale health info: the dead backend still looks up
+                pool.backends[0].healthy = True
+                async with aclosing(pool.chat("qwen3:4b", messages)) as stream:
+                    chunks = [chunk async for chunk in stream]
+                return chunks, pool.backends
+
+        chunks, (dead, _) = asyncio.run(go())
+        assert "".join(text for text, _ in chunks) == "The answer is 42"
+        assert (dead.healthy, dead.failures, dead.in_flight) == (False, 1, 0)
+
+    def test_read_timeout_does_not_fail_over(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+
+        def client_factory(url):
+            return (_SlowAsyncClient if url == a.url else AsyncOllamaClient)(url)
+
+        async def go():
+            async with AsyncBackendPool([a.url, b.url], client_factory=client_factory) as pool:
+                with pytest.raises(asyncio.TimeoutError):
+                    await pool.generate_with_meta("qwen3:4b", "hi")
+                return pool.backends[0]
+
+        slow = asyncio.run(go())
+        assert (slow.healthy, slow.failures, slow.in_flight) == (True, 0, 0)
+        assert _generates(b) == 0
+
+    def test_cut_off_reply_does_not_fail_over(self, ollama_stub_factory):
+        a, b = ollama_stub_factory(), ollama_stub_factory()
+
+        def client_factory(url):
+            return (_CutOffAsyncClient if url == a.url else AsyncOllamaClient)(url)
+
+        async def go():
+            async with AsyncBackendPool([a.url, b.url], client_factory=client_factory) as pool:
+                with pytest.raises(ConnectionError, match="mid-response"):
+                    await pool.generate_with_meta("qwen3:4b", "hi")
+                return pool.backends[0]
+
+        cut = asyncio.run(go())
+        assert (cut.healthy, cut.failures, cut.in_flight) == (True, 0, 0)
+        assert _generates(b) == 0
+
+    def test_all_down_raises(self):
+        async def go():
+            async with AsyncBackendPool([DEAD_URL]) as pool:
+                assert await pool.check_running() is False
+                await pool.generate_with_meta("qwen3:4b", "hi")
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(go())
+
+
+class TestDefaultClient:
+    def test_env_selects_pool(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434,gpu1:11434")
+        ollama_client.set_client(None)
+        try:
+            client = ollama_client.get_client()
+            assert isinstance(client, BackendPool)
+            assert [b.url for b in client.backends] == ["http://gpu0:11434", "http://gpu1:11434"]
+        finally:
+            ollama_client.set_client(None)
+
+    def test_single_host_is_plain_client(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434")
+        ollama_client.set_client(None)
+        try:
+            client = ollama_client.get_client()
+            assert isinstance(client, OllamaClient)
+            assert client.base_url == "http://gpu0:11434"
+        finally:
+            ollama_client.set_client(None)
+
+    def test_env_selects_async_pool(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434,gpu1:11434")
+        client = async_ollama_client.default_client(max_connections=4)
+        assert isinstance(client, AsyncBackendPool)
+        assert [b.url for b in client.backends] == ["http://gpu0:11434", "http://gpu1:11434"]
+
+    def test_single_host_is_plain_async_client(self, monkeypatch):
+        monkeypatch.setenv(ollama_client.HOSTS_ENV, "gpu0:11434")
+        client = async_ollama_client.default_client()
+        assert isinstance(client, AsyncOllamaClient)
+        assert client.base_url == "http://gpu0:11434"
@@ -0,0 +1,109 @@
+"""Tests for batch query planning and execution."""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from locollm.async_ollama_client import AsyncOllamaClient
+from locollm.batch import plan_batch, read_requests, run_batch
+from locollm.router import KeywordRouter
+
+FAKE_REGISTRY = {
+    "adapters": {
+        "math": {"router_keywords": ["solve", "equation"]},
+        "code": {"router_keywords": ["python", "function"]},
+    }
+}
+INSTALLED = {"qwen3", "locollm-math"}
+BASE = "qwen3:4b"
+
+
+@pytest.fixture
+def router():
+    with patch("locollm.batch.adapter_manager.load_registry", return_value=FAKE_REGISTRY):
+        yield KeywordRouter(FAKE_REGISTRY)
+
+
+def _plan(requests, router):
+    return plan_batch(requests, router, INSTALLED, BASE)
+
+
+class TestReadRequests:
+    def test_strings_and_objects(self):
+        lines = ['"hello"', "", '{"prompt": "solve x", "id": "q1"}']
+        assert read_requests(lines) == [{"prompt": "hello"}, {"prompt": "solve x", "id": "q1"}]
+
+    def test_invalid_json_names_line(self):
+        with pytest.raises(ValueError, match="line 2"):
+            read_requests(['"ok"', "{not json"])
+
+    def test_missing_prompt_rejected(self):
+        with pytest.raises(ValueError, match="line 1"):
+            read_requests(['{"id": 1}'])
+
+
+class TestPlanBatch:
+    def test_routes_to_installed_adapter(self, router):
+        [job] = _plan([{"prompt": "solve this equation"}], router)
+        assert (job["routed"], job["adapter"], job["model"]) == ("math", "math", "locollm-math")
+
+    def test_uninstalled_adapter_falls_back_to_base(self, router):
+        [job] = _plan([{"prompt": "write a python function"}], router)
+        assert (job["routed"], job["adapter"], job["model"]) == ("code", None, BASE)
+
+    def test_no_route(self, router):
+        [job] = _plan([{"prompt": "solve it", "route": False}], router)
+        assert (job["routed"], job["model"]) == (None, BASE)
+
+    def test_pinned_adapter(self, router):
+        [job] = _plan([{"prompt": "hi", "adapter": "math"}], router)
+        assert job["model"] == "locollm-math"
+        assert "error" not in job
+
+    def test_unknown_adapter_is_an_error(self, router):
+        [job] = _plan([{"prompt": "hi", "adapter": "poetry"}], router)
+        assert "not found in registry" in job["error"]
+
+    def test_ids_default_to_index(self, router):
+        jobs = _plan([{"prompt": "a"}, {"prompt": "b", "id": "x"}], router)
+        assert [job["id"] for job in jobs] == [0, "x"]
+
+
+class TestRunBatch:
+    def _run(self, stub, jobs, concurrency=2):
+        out = io.StringIO()
+        client = AsyncOllamaClient(stub.url, max_connections=concurrency)
+        summary = run_batch(jobs, out, concurrency=concurrency, client=client)
+        return summary, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_results_in_input_order(self, ollama_stub, router):
+        ollama_stub.replies["locollm-math"] = "four"
+        prompts = ["hello", "solve 2+2", "hi there", "solve 3+3"]
+        jobs = _plan([{"prompt": p} for p in prompts], router)
+        summary, records = self._run(ollama_stub, jobs)
+        assert [r["index"] for r in records] == [0, 1, 2, 3]
+        assert [r["model"] for r in records] == [BASE, "locollm-math", BASE, "locollm-math"]
+        assert records[1]["text"] == "four"
+        assert records[0]["meta"]["eval_count"] == 4
+        assert "wall_ms" in records[0]["meta"]
+        assert summary["total"] == 4 and summary["models"] == 2 and summary["errors"] == 0
+
+    def test_dispatch_grouped_by_model(self, ollama_stub, router):
+        jobs = _plan([{"prompt": p} for p in ["a", "solve 1", "b", "solve 2"]], router)
+        summary, _ = self._run(ollama_stub, jobs, concurrency=1)
+        models = [b["model"] for m, p, b in ollama_stub.requests if p == "/api/generate"]
+        assert models == [BASE, BASE, "locollm-math", "locollm-math"]
+        assert (summary["swaps"], summary["swaps_avoided"]) == (1, 2)
+
+    def test_errors_recorded_per_item(self, ollama_stub, router):
+        jobs = _plan([{"prompt": "a", "adapter": "poetry"}, {"prompt": "b"}], router)
+        summary, records = self._run(ollama_stub, jobs)
+        assert "error" in records[0]
+        assert records[1]["text"] == "The answer is 42"
+        assert summary["errors"] == 1
+
+    def test_rejects_zero_concurrency(self):
+        with pytest.raises(ValueError):
+            run_batch([], io.StringIO(), concurrency=0)
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from locollm.chat_session import ChatSession
+from locollm.tokens import PROMPT_OVERHEAD
 
 
 # ---------------------------------------------------------------------------
@@ -23,13 +24,13 @@ FAKE_REGISTRY = {
 FAKE_INSTALLED = ["qwen3:4b", "locollm-math:latest", "locollm-code:latest"]
 
 
-def _make_session(adapter="auto", context_limit=8192):
+def _make_session(adapter="auto", context_limit=8192, **kwargs):
     """Create a ChatSession with mocked external dependencies."""
     with (
         patch("locollm.chat_session.adapter_manager.load_registry", return_value=FAKE_REGISTRY),
         patch("locollm.chat_session.ollama_client.list_models", return_value=FAKE_INSTALLED),
     ):
-        return ChatSession(adapter=adapter, context_limit=context_limit)
+        return ChatSession(adapter=adapter, context_limit=context_limit, **kwargs)
 
 
 # ===========================================================================
@@ -106,6 +107,25 @@ class TestStatsFormatting:
         assert "0 tokens" in result
         assert "0.0 tok/s" in result
 
+    def test_client_timings_appended(self):
+        meta = {
+            "eval_count": 10,
+            "eval_duration": 1_000_000_000,
+            "total_duration": 3_000_000_000,
+            "load_duration": 2_000_000_000,
+            "ttft_ms": 2400.0,
+            "gap_p50_ms": 30.0,
+            "gap_p95_ms": 45.0,
+        }
+        result = ChatSession.format_stats("math", meta)
+        assert result.endswith("| TTFT 2.40s | gaps 30/45ms | cold load 2.0s]")
+
+    def test_session_latency_in_stats(self):
+        session = _make_session()
+        meta = {"eval_count": 5, "ttft_ms": 300.0, "gap_p50_ms": 20.0, "gap_p95_ms": 25.0}
+        session.record_turn(meta)
+        assert "latency: TTFT p50 300ms" in session.session_stats_display()
+
 
 # ===========================================================================
 # Conversation history
@@ -170,6 +190,205 @@ class TestContextCompaction:
         assert len(session.messages) == 4
 
 
+class TestContextBudget:
+    def _fill(self, session, turns, words=50):
+        for i in range(turns):
+            session.add_user_message(f"question {i} " + "word " * words)
+            session.add_assistant_message(f"answer {i} " + "word " * words)
+
+    def test_no_trim_when_under_budget(self):
+        session = _make_session(context_limit=8192)
+        self._fill(session, 2)
+        assert session.fit_context() is None
+        assert len(session.messages) == 4
+
+    def test_trims_before_sending(self):
+        session = _make_session(context_limit=500)
+        self._fill(session, 10)
+        session.add_user_message("latest")
+        notice = session.fit_context()
+        assert notice is not None and "dropped" in notice
+        assert session.context_tokens <= 500 * 0.9
+        assert session.messages[-1]["content"] == "latest"
+        assert session.messages[0]["role"] == "user"
+
+    def test_keeps_newest_message_even_if_too_long(self):
+        session = _make_session(context_limit=50)
+        session.add_user_message("word " * 200)
+        assert session.fit_context() is None
+        assert len(session.messages) == 1
+
+    def test_estimate_is_incremental(self):
+        session = _make_session()
+        session.add_user_message("hello there")
+        before = session.context_tokens
+        with patch("locollm.chat_session.message_tokens", return_value=7) as counter:
+            session.add_assistant_message("hi")
+            assert session.context_tokens == before + 7
+            assert session.context_tokens == before + 7
+        # Only the new message was estimated, once
+        assert counter.call_count == 1
+
+    def test_estimate_tracks_trimming_and_clear(self):
+        session = _make_session(context_limit=300)
+        self._fill(session, 6)
+        session.fit_context()
+        fresh = _make_session()
+        for message in session.messages:
+            fresh._messages.append(message)
+        assert session.context_tokens == fresh.context_tokens
+        session.clear()
+        assert session.context_tokens == PROMPT_OVERHEAD
+
+    def test_server_count_raises_scale(self):
+        session = _make_session()
+        session._client = MagicMock()
+        session.add_user_message("hello")
+        session.send()
+        estimate = session.context_tokens
+        session.record_turn({"eval_count": 1, "prompt_eval_count": estimate * 2})
+        assert session.context_tokens == estimate * 2
+
+    def test_server_undercount_ignored(self):
+        session = _make_session()
+        session._client = MagicMock()
+        session.add_user_message("hello")
+        session.send()
+        estimate = session.context_tokens
+        session.record_turn({"eval_count": 1, "prompt_eval_count": 1})
+        assert session.context_tokens == estimate
+
+
+class TestSummaryCompaction:
+    def _session(self, summary="Alice is learning fractions.", **kwargs):
+        session = _make_session(context_limit=400, **kwargs)
+        session._client = MagicMock()
+        session._client.chat.return_value = [(summary, {"eval_count": 20})]
+        return session
+
+    def _fill(self, session, turns, words=30):
+        for i in range(turns):
+            session.add_user_message(f"question {i} " + "word " * words)
+            session.add_assistant_message(f"answer {i} " + "word " * words)
+
+    def _summarize(self, session):
+        notice = session.maybe_summarize()
+        assert notice is not None
+        session._summary_job.wait(5)
+        return notice
+
+    def test_not_started_below_threshold(self):
+        session = self._session()
+        self._fill(session, 1)
+        assert session.maybe_summarize() is None
+
+    def test_folds_old_turns_into_summary(self):
+        session = self._session()
+        self._fill(session, 4)
+        recent = session.messages[-4:]
+        assert "summarising 4 older messages" in self._summarize(session)
+        assert "folded 4" in session.fit_context()
+        messages = session.messages
+        assert messages[0] == {
+            "role": "system",
+            "content": "Summary of the earlier conversation:\nAlice is learning fractions.",
+        }
+        assert messages[1:] == recent
+        model, prompt = session._client.chat.call_args.args
+        assert model == "qwen3:4b"
+        assert "question 0" in prompt[1]["content"]
+
+    def test_prefix_stable_between_compactions(self):
+        session = self._session()
+        self._fill(session, 4)
+        self._summarize(session)
+        session.fit_context()
+        prefix = session.messages[:3]
+        session.add_user_message("short follow-up")
+        session.fit_context()
+        session.add_assistant_message("short answer")
+        assert session.messages[:3] == prefix
+
+    def test_rolling_summary_includes_previous(self):
+        session = self._session()
+        self._fill(session, 4)
+        self._summarize(session)
+        session.fit_context()
+        self._fill(session, 3)
+        self._summarize(session)
+        transcript = session._client.chat.call_args.args[1][1]["content"]
+        assert transcript.startswith("Earlier summary: Alice is learning fractions.")
+        session.fit_context()
+        assert sum(m["role"] == "system" for m in session.messages) == 1
+
+    def test_leading_system_messages_kept_verbatim(self):
+        session = self._session()
+        persona = {"role": "system", "content": "You are a patient maths tutor."}
+        session.add_system_message(persona["content"])
+        self._fill(session, 4)
+        recent = session.messages[-4:]
+        assert "summarising 4 older messages" in self._summarize(session)
+        transcript = session._client.chat.call_args.args[1][1]["content"]
+        assert "maths tutor" not in transcript
+        session.fit_context()
+        messages = session.messages
+        assert messages[0] == persona
+        assert messages[1]["content"].startswith("Summary of the earlier conversation:")
+        assert messages[2:] == recent
+        # A second compaction folds the summary, never the instructions
+        self._fill(session, 3)
+        self._summarize(session)
+        session.fit_context()
+        assert session.messages[0] == persona
+        assert sum(m["role"] == "system" for m in session.messages) == 2
+
+    def test_over_budget_keeps_summary(self):
+        session = self._session()
+        self._fill(session, 4)
+        self._summarize(session)
+        session.fit_context()
+        summary = session.messages[0]
+        self._fill(session, 2, words=80)
+        session.add_user_message("latest question")
+        assert "dropped" in session.fit_context()
+        assert session.messages[0] == summary
+        assert session.messages[1]["role"] == "user"
+        assert session.messages[-1]["content"] == "latest question"
+
+    def test_stats_report_prompt_eval_before_and_after(self):
+        session = self._session()
+        self._fill(session, 4)
+        session.record_turn({"eval_count": 5, "prompt_eval_count": 320})
+        self._summarize(session)
+        session.fit_context()
+        session.record_turn({"eval_count": 5, "prompt_eval_count": 140})
+        assert session.compactions == [{"folded": 4, "before": 320, "after": 140}]
+        assert "prompt_eval_count 320 -> 140" in session.session_stats_display()
+
+    def test_stale_summary_discarded_after_clear(self):
+        session = self._session()
+        self._fill(session, 4)
+        self._summarize(session)
+        session.clear()
+        session.add_user_message("new topic")
+        assert session.fit_context() is None
+        assert session.messages == [{"role": "user", "content": "new topic"}]
+
+    def test_failed_summary_leaves_history(self):
+        session = self._session()
+        session._client.chat.side_effect = ConnectionError("down")
+        self._fill(session, 4)
+        self._summarize(session)
+        assert session.fit_context() is None
+        assert len(session.messages) == 8
+        assert session._summary_job is None
+
+    def test_disabled(self):
+        session = self._session(summarize=False)
+        self._fill(session, 4)
+        assert session.maybe_summarize() is None
+
+
 # ===========================================================================
 # Adapter switching
 # ===========================================================================
@@ -283,3 +502,59 @@ class TestNudge:
 
         for _ in range(10):
             assert session.next_nudge() in NUDGE_PHRASES
+
+
+# ===========================================================================
+# Client injection
+# ===========================================================================
+
+
+class TestClientInjection:
+    def test_uses_injected_client(self):
+        client = MagicMock()
+        client.list_models.return_value = FAKE_INSTALLED
+        client.chat.return_value = [("hi", {"eval_count": 1})]
+        registry = patch(
+            "locollm.chat_session.adapter_manager.load_registry", return_value=FAKE_REGISTRY
+        )
+        with registry:
+            session = ChatSession(adapter="none", client=client)
+        session.add_user_message("hello")
+        assert list(session.send()) == [("hi", {"eval_count": 1})]
+        client.chat.assert_called_once_with("qwen3:4b", session.messages, options=None)
+
+    def test_passes_inference_options(self):
+        client = MagicMock()
+        client.list_models.return_value = FAKE_INSTALLED
+        registry = patch(
+            "locollm.chat_session.adapter_manager.load_registry", return_value=FAKE_REGISTRY
+        )
+        with registry:
+            session = ChatSession(adapter="none", client=client, options={"temperature": 0})
+        session.add_user_message("hello")
+        session.send()
+        assert client.chat.call_args.kwargs["options"] == {"temperature": 0}
+
+    def test_uses_injected_router(self):
+        router = MagicMock()
+        router.route.return_value = "code"
+        with (
+            patch(
+                "locollm.chat_session.adapter_manager.load_registry", return_value=FAKE_REGISTRY
+            ),
+            patch("locollm.chat_session.ollama_client.list_models", return_value=FAKE_INSTALLED),
+        ):
+            session = ChatSession(router=router)
+        session.add_user_message("anything")
+        assert session.active_adapter == "code"
+        router.route.assert_called_once_with("anything")
+
+    def test_shared_router_reused_across_messages(self):
+        from locollm import router as router_module
+
+        session = _make_session()
+        session.add_user_message("solve 2+2")
+        first = session.router
+        session.clear()
+        session.add_user_message("write a python function")
+        assert session.router is first is router_module.get_router()
@@ -37,6 +37,32 @@ class TestCLI:
         assert result.returncode == 0
         assert "chat" in result.stdout
 
+    def test_warm_in_help(self):
+        result = run_loco("--help")
+        assert result.returncode == 0
+        assert "warm" in result.stdout
+
+    def test_serve_in_help(self):
+        result = run_loco("serve", "--help")
+        assert result.returncode == 0
+        assert "--max-sessions" in result.stdout
+
+    def test_eval_rejects_zero_concurrency(self):
+        result = run_loco("eval", "math", "--concurrency", "0")
+        assert result.returncode == 1
+        assert "--concurrency must be at least 1" in result.stdout
+
+    def test_offline_commands_skip_http_stack(self):
+        for args in (["--version"], ["route", "solve 2+2"], ["adapters", "list"]):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-m", "locollm.cli", *args],
+                capture_output=True,
+                text=True,
+            )
+            assert result.returncode == 0
+            imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()}
+            assert "requests" not in imported and "urllib3" not in imported, args
+
     def test_no_args_shows_help(self):
         result = run_loco()
         assert result.returncode == 1
@@ -69,3 +95,9 @@ class TestCLI:
         result = run_loco("route", "hello")
         assert result.returncode == 0
         assert "base model" in result.stdout
+
+    def test_route_timing(self):
+        result = run_loco("route", "--timing", "solve 2+2")
+        assert result.returncode == 0
+        assert "math" in result.stdout
+        assert "routing: 1 calls" in result.stdout
@@ -1,12 +1,28 @@
 """Tests for the evaluation harness — answer extraction, checkers, and dataset loading."""
 
+import json
+
+import pytest
+
+from locollm.async_ollama_client import AsyncOllamaClient
 from locollm.eval import (
+    EVAL_NUM_PREDICT,
+    EvalCheckpoint,
+    answer_settled,
+    capped_options,
     check_code_syntax,
     check_contains_answer,
     check_keywords,
+    early_stop_summary,
     extract_number,
+    latency_summary,
     load_dataset,
+    run_eval,
+    run_eval_concurrent,
+    score_response,
 )
+from locollm.ollama_client import OllamaClient
+from locollm.response_cache import ResponseCache
 
 
 class TestExtractNumber:
@@ -134,3 +150,342 @@ class TestLoadDataset:
         data.write_text('{"question": "q1", "answer": 1}\n\n{"question": "q2", "answer": 2}\n')
         problems = load_dataset(data)
         assert len(problems) == 2
+
+
+class TestScoreResponse:
+    """Tests for per-item scoring across eval types."""
+
+    def test_numeric(self):
+        assert score_response({"answer": 42}, "The answer is 42", "numeric")[0] is True
+
+    def test_numeric_wrong(self):
+        is_correct, detail = score_response({"answer": 42}, "The answer is 41", "numeric")
+        assert is_correct is False
+        assert "got=41" in detail
+
+    def test_code(self):
+        problem = {"answer_keywords": ["def "]}
+        assert score_response(problem, "def f():\n    pass", "code")[0] is True
+
+    def test_analysis(self):
+        assert score_response({"answer": "mitosis"}, "It is Mitosis.", "analysis")[0] is True
+
+    def test_unknown_type(self):
+        with pytest.raises(ValueError, match="Unknown eval_type"):
+            score_response({"answer": 1}, "1", "essay")
+
+
+class TestRunEvalConcurrent:
+    """Tests for the concurrent evaluation engine against a stub server."""
+
+    DATASET = [{"question": f"q{i}", "answer": 42} for i in range(7)]
+
+    def test_results_in_dataset_order(self, ollama_stub):
+        client = AsyncOllamaClient(ollama_stub.url, max_connections=3)
+        summary = run_eval_concurrent(["qwen3:4b"], self.DATASET, concurrency=3, client=client)
+        correct, total, results = summary["qwen3:4b"]
+        assert (correct, total) == (7, 7)
+        assert [r["question"] for r in results] == [p["question"] for p in self.DATASET]
+        assert latency_summary(results).as_dict()["responses"] == 7
+
+    def test_interleaved_models(self, ollama_stub):
+        ollama_stub.replies["locollm-math"] = "The answer is 7"
+        summary = run_eval_concurrent(
+            ["qwen3:4b", "locollm-math"],
+            self.DATASET,
+            concurrency=4,
+            interleave=True,
+            client=AsyncOllamaClient(ollama_stub.url, max_connections=4),
+        )
+        assert summary["qwen3:4b"][0] == 7
+        assert summary["locollm-math"][0] == 0
+        models = [body["model"] for _, _, body in ollama_stub.requests if body]
+        last_base = max(i for i, m in enumerate(models) if m == "qwen3:4b")
+        # Interleaved: the adapter is queried before the base model has finished
+        assert models.index("locollm-math") < last_base
+
+    def test_rejects_unknown_eval_type(self):
+        with pytest.raises(ValueError, match="Unknown eval_type"):
+            run_eval_concurrent(["m"], self.DATASET, eval_type="essay")
+
+    def test_rejects_zero_concurrency(self):
+        with pytest.raises(ValueError, match="concurrency"):
+            run_eval_concurrent(["m"], self.DATASET, concurrency=0)
+
+
+class TestEvalOptions:
+    """Tests for inference options on eval requests."""
+
+    DATASET = [{"question": "q1", "answer": 42}]
+
+    def test_num_predict_always_capped(self):
+        assert capped_options() == {"num_predict": EVAL_NUM_PREDICT}
+        assert capped_options({"num_predict": -1})["num_predict"] == EVAL_NUM_PREDICT
+        assert capped_options({"num_predict": 64, "seed": 1}) == {"num_predict": 64, "seed": 1}
+
+    def test_sent_with_every_request(self, ollama_stub):
+        client = OllamaClient(ollama_stub.url, options=None)
+        run_eval("qwen3:4b", self.DATASET, client=client, options={"temperature": 0})
+        body = ollama_stub.requests[-1][2]
+        assert body["options"] == {"temperature": 0, "num_predict": EVAL_NUM_PREDICT}
+
+    def test_concurrent_sends_options(self, ollama_stub):
+        client = AsyncOllamaClient(ollama_stub.url, options=None)
+        run_eval_concurrent(["qwen3:4b"], self.DATASET, client=client)
+        assert ollama_stub.requests[-1][2]["options"] == {"num_predict": EVAL_NUM_PREDICT}
+
+    def test_options_are_part_of_cache_key(self, ollama_stub, tmp_path):
+        client = OllamaClient(ollama_stub.url)
+        run_eval("qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path))
+        _, _, results = run_eval(
+            "qwen3:4b",
+            self.DATASET,
+            client=client,
+            cache=ResponseCache(tmp_path),
+            options={"temperature": 1.0},
+        )
+        assert not results[0]["cached"]
+
+
+class TestAnswerSettled:
+    """Tests for deciding when a streamed answer can no longer change."""
+
+    def test_numeric_needs_a_complete_number(self):
+        assert not answer_settled({}, "The answer is 4")
+        assert not answer_settled({}, "The answer is 42.")
+        assert answer_settled({}, "The answer is 42. Let me")
+        assert answer_settled({}, "Answer: 1,250\n")
+
+    def test_numeric_other_patterns_do_not_settle(self):
+        # A later "the answer is" would take priority over these
+        assert not answer_settled({}, "\\boxed{42} and then")
+        assert not answer_settled({}, "x = 42\nso")
+
+    def test_analysis_settles_on_expected_answer(self):
+        problem = {"answer": "chlorophyll"}
+        assert answer_settled(problem, "It is Chlorophyll", "analysis")
+        assert not answer_settled(problem, "It is chloro", "analysis")
+
+    def test_code_never_settles(self):
+        assert not answer_settled({}, "def f():\n    return 1\n", "code")
+
+
+class TestEarlyStop:
+    """Tests for cancelling eval generations once the answer is scored."""
+
+    DATASET = [{"question": "q1", "answer": 42}, {"question": "q2", "answer": 7}]
+    REPLY = "The answer is 42. Let me double check that by adding it up again"
+
+    def test_stops_after_settled_answer(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = self.REPLY
+        client = OllamaClient(ollama_stub.url, options=None)
+        correct, _, results = run_eval(
+            "qwen3:4b", self.DATASET, client=client, early_stop=True, options={"num_predict": 100}
+        )
+        assert correct == 1
+        first = results[0]
+        assert first["response"] == "The answer is 42. Let"
+        assert first["meta"]["early_stop"] is True
+        assert first["meta"]["eval_count"] == 5
+        assert early_stop_summary(results) == (2, 190)
+
+    def test_scores_match_full_run(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = self.REPLY
+        client = OllamaClient(ollama_stub.url)
+        full = run_eval("qwen3:4b", self.DATASET, client=client)
+        early = run_eval("qwen3:4b", self.DATASET, client=client, early_stop=True)
+        assert [r["correct"] for r in full[2]] == [r["correct"] for r in early[2]]
+        assert early_stop_summary(full[2]) == (0, 0)
+
+    def test_unsettled_answer_read_to_end(self, ollama_stub):
+        _, _, results = run_eval(
+            "qwen3:4b", self.DATASET, client=OllamaClient(ollama_stub.url), early_stop=True
+        )
+        assert results[0]["response"] == "The answer is 42"
+        assert "early_stop" not in results[0]["meta"]
+
+    def test_concurrent(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = self.REPLY
+        client = AsyncOllamaClient(ollama_stub.url, max_connections=2)
+        summary = run_eval_concurrent(
+            ["qwen3:4b"], self.DATASET, concurrency=2, client=client, early_stop=True
+        )
+        correct, _, results = summary["qwen3:4b"]
+        assert correct == 1
+        assert all(r["meta"]["early_stop"] for r in results)
+        assert results[1]["response"] == "The answer is 42. Let"
+
+    def test_cached_apart_from_full_responses(self, ollama_stub, tmp_path):
+        ollama_stub.replies["qwen3:4b"] = self.REPLY
+        client = OllamaClient(ollama_stub.url)
+        run_eval("qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path))
+        _, _, results = run_eval(
+            "qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path), early_stop=True
+        )
+        assert not any(r["cached"] for r in results)
+
+
+class TestEvalCache:
+    """Tests for response-cache integration in run_eval."""
+
+    DATASET = [{"question": "q1", "answer": 42}, {"question": "q2", "answer": 42}]
+
+    def test_second_run_served_from_cache(self, ollama_stub, tmp_path):
+        client = OllamaClient(ollama_stub.url)
+        run_eval("qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path))
+        generated = sum(1 for _, path, _ in ollama_stub.requests if path == "/api/generate")
+
+        cache = ResponseCache(tmp_path)
+        correct, _, results = run_eval("qwen3:4b", self.DATASET, client=client, cache=cache)
+        after = sum(1 for _, path, _ in ollama_stub.requests if path == "/api/generate")
+        assert (generated, after) == (2, 2)
+        assert correct == 2
+        assert all(r["cached"] for r in results)
+        # Cached answers carry no timings
+        assert not latency_summary(results)
+
+    def test_generated_items_record_timings(self, ollama_stub):
+        _, _, results = run_eval("qwen3:4b", self.DATASET, client=OllamaClient(ollama_stub.url))
+        assert all(r["meta"]["ttft_ms"] > 0 for r in results)
+
+    def test_changed_digest_misses(self, ollama_stub, tmp_path):
+        client = OllamaClient(ollama_stub.url)
+        run_eval("qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path))
+        ollama_stub.models[0]["digest"] = "d-retrained"
+        client.inventory.invalidate()
+        _, _, results = run_eval(
+            "qwen3:4b", self.DATASET, client=client, cache=ResponseCache(tmp_path)
+        )
+        assert not any(r["cached"] for r in results)
+
+    def test_concurrent_uses_cache(self, ollama_stub, tmp_path):
+        cache = ResponseCache(tmp_path)
+
+        def run():
+            client = AsyncOllamaClient(ollama_stub.url)
+            return run_eval_concurrent(["qwen3:4b"], self.DATASET, client=client, cache=cache)
+
+        run()
+        _, _, results = run()["qwen3:4b"]
+        assert all(r["cached"] for r in results)
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_concurrent_early_stop_uses_cache(self, ollama_stub, tmp_path):
+        cache = ResponseCache(tmp_path)
+
+        def run():
+            client = AsyncOllamaClient(ollama_stub.url)
+            return run_eval_concurrent(
+                ["qwen3:4b"], self.DATASET, client=client, cache=cache, early_stop=True
+            )
+
+        run()
+        _, _, results = run()["qwen3:4b"]
+        assert all(r["cached"] for r in results)
+        assert (cache.hits, cache.misses) == (2, 2)
+
+
+class TestEvalCheckpoint:
+    """Tests for checkpointed, resumable eval runs."""
+
+    DATASET = [{"question": f"q{i}", "answer": 42} for i in range(4)]
+
+    def _generate_calls(self, stub):
+        return sum(1 for _, path, _ in stub.requests if path == "/api/generate")
+
+    def test_records_each_item(self, ollama_stub, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            run_eval(
+                "qwen3:4b",
+                self.DATASET,
+                client=OllamaClient(ollama_stub.url),
+                checkpoint=checkpoint,
+            )
+        lines = path.read_text().splitlines()
+        assert len(lines) == 5
+        assert json.loads(lines[0]) == {"settings": None}
+        assert '"model": "qwen3:4b"' in lines[1]
+
+    def test_resume_skips_scored_items(self, ollama_stub, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            run_eval(
+                "qwen3:4b",
+                self.DATASET[:2],
+                client=OllamaClient(ollama_stub.url),
+                checkpoint=checkpoint,
+            )
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            assert len(checkpoint) == 2
+            correct, total, results = run_eval(
+                "qwen3:4b",
+                self.DATASET,
+                client=OllamaClient(ollama_stub.url),
+                checkpoint=checkpoint,
+            )
+        assert (correct, total) == (4, 4)
+        assert self._generate_calls(ollama_stub) == 4
+        assert len(path.read_text().splitlines()) == 5
+
+    def test_refuses_to_overwrite_without_resume(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            checkpoint.record("m", 0, {"question": "q0", "response": "42"})
+        with pytest.raises(FileExistsError, match="--resume"):
+            EvalCheckpoint(path)
+        assert len(path.read_text().splitlines()) == 2
+
+    def test_force_starts_fresh(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            checkpoint.record("m", 0, {"question": "q0", "response": "42"})
+        with EvalCheckpoint(path, force=True) as checkpoint:
+            assert len(checkpoint) == 0
+        assert path.read_text().splitlines() == ['{"settings": null}']
+
+    def test_resume_with_changed_settings_rejected(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        settings = {"options": {"temperature": 0, "num_predict": 512}, "early_stop": True}
+        with EvalCheckpoint(path, settings=settings) as checkpoint:
+            checkpoint.record("m", 0, {"question": "q0", "response": "42"})
+        with EvalCheckpoint(path, resume=True, settings=dict(settings)) as checkpoint:
+            assert len(checkpoint) == 1
+        with pytest.raises(ValueError, match="different settings"):
+            EvalCheckpoint(path, resume=True, settings={**settings, "early_stop": False})
+
+    def test_changed_question_is_rerun(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            checkpoint.record("m", 0, {"question": "old", "response": "42"})
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            assert checkpoint.get("m", 0, "new") is None
+            assert checkpoint.get("m", 0, "old")["response"] == "42"
+
+    def test_torn_last_line_ignored(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        path.write_text('{"model": "m", "index": 0, "question": "q0", "response": "1"}\n{"mod')
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            assert len(checkpoint) == 1
+            checkpoint.record("m", 1, {"question": "q1", "response": "2"})
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            assert len(checkpoint) == 2
+            checkpoint.record("m", 2, {"question": "q2", "response": "3"})
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            assert len(checkpoint) == 3
+        # The header-less log gained no header: it keeps one line per item
+        assert len(path.read_text().splitlines()) == 3
+
+    def test_concurrent_resume(self, ollama_stub, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        with EvalCheckpoint(path) as checkpoint:
+            checkpoint.record("qwen3:4b", 1, {"question": "q1", "response": "The answer is 42"})
+        with EvalCheckpoint(path, resume=True) as checkpoint:
+            summary = run_eval_concurrent(
+                ["qwen3:4b"],
+                self.DATASET,
+                client=AsyncOllamaClient(ollama_stub.url),
+                checkpoint=checkpoint,
+            )
+        assert summary["qwen3:4b"][0] == 4
+        assert self._generate_calls(ollama_stub) == 3
@@ -0,0 +1,158 @@
+"""Tests for structured eval run reports."""
+
+import json
+import subprocess
+from datetime import datetime, timezone
+
+from locollm import eval_report
+from locollm.eval import run_eval
+from locollm.eval_report import (
+    REPORT_SCHEMA,
+    build_report,
+    default_report_path,
+    gpu_summary,
+    host_summary,
+    item_record,
+    model_summary,
+    write_report,
+)
+from locollm.ollama_client import OllamaClient
+
+CONFIG = {"version": "0.2.0", "type": "lora"}
+STARTED = datetime(2026, 10, 16, 10, 15, tzinfo=timezone.utc)
+
+
+def _result(correct, eval_count=10, eval_duration=500_000_000, cached=False):
+    meta = None
+    if not cached:
+        meta = {
+            "eval_count": eval_count,
+            "eval_duration": eval_duration,
+            "prompt_eval_count": 20,
+            "total_duration": 900_000_000,
+            "ttft_ms": 120.0,
+        }
+    return {
+        "question": "q",
+        "correct": correct,
+        "detail": "ok" if correct else "expected 4, got 5",
+        "response": "The answer is 4",
+        "cached": cached,
+        "meta": meta,
+    }
+
+
+class TestHostSummary:
+    def test_fields(self):
+        host = host_summary()
+        assert host["cpu_count"] >= 1
+        assert set(host) >= {"platform", "machine", "memory_bytes", "gpu", "python"}
+
+    def test_gpus_from_nvidia_smi(self, monkeypatch):
+        def run(cmd, **kwargs):
+            out = "NVIDIA GeForce RTX 4090, 24564\nNVIDIA GeForce RTX 4090, 24564\n"
+            return subprocess.CompletedProcess(cmd, 0, stdout=out)
+
+        monkeypatch.setattr(eval_report.shutil, "which", lambda name: "/usr/bin/nvidia-smi")
+        monkeypatch.setattr(eval_report.subprocess, "run", run)
+        gpu = gpu_summary()
+        assert gpu["count"] == 2
+        assert gpu["devices"][0] == {"name": "NVIDIA GeForce RTX 4090", "vram_bytes": 24564 << 20}
+
+    def test_no_nvidia_smi_is_unknown(self, monkeypatch):
+        monkeypatch.setattr(eval_report.shutil, "which", lambda name: None)
+        assert gpu_summary() == "unknown"
+
+
+class TestItemRecord:
+    def test_flattens_meta(self):
+        item = item_record(3, _result(True))
+        assert item["index"] == 3
+        assert (item["eval_count"], item["tok_s"]) == (10, 20.0)
+        assert (item["ttft_ms"], item["total_ms"]) == (120.0, 900.0)
+        assert item["response"] == "The answer is 4"
+
+    def test_cached_item_has_no_timings(self):
+        item = item_record(0, _result(False, cached=True))
+        assert item["cached"] and item["tok_s"] is None and item["eval_count"] is None
+        assert item["detail"] == "expected 4, got 5"
+
+
+class TestModelSummary:
+    def test_aggregates(self):
+        results = [_result(True), _result(False, eval_count=30), _result(True, cached=True)]
+        summary = model_summary("qwen3:4b", "sha-1", results)
+        assert (summary["correct"], summary["total"], summary["cached"]) == (2, 3, 1)
+        assert summary["accuracy"] == 0.6667
+        assert (summary["eval_tokens"], summary["tok_s"]) == (40, 40.0)
+        assert summary["latency"]["responses"] == 2
+        assert len(summary["items"]) == 3
+
+    def test_early_stop_totals(self):
+        stopped = _result(True)
+        stopped["meta"].update(early_stop=True, tokens_saved=400)
+        summary = model_summary("m", None, [stopped, _result(True)])
+        assert (summary["early_stopped"], summary["tokens_saved_max"]) == (1, 400)
+        assert [i["early_stop"] for i in summary["items"]] == [True, False]
+
+    def test_early_stopped_rates_kept_out_of_tok_s(self):
+        stopped = _result(True, eval_count=5, eval_duration=100_000_000)
+        stopped["meta"].update(early_stop=True, tokens_saved=0)
+        summary = model_summary("m", None, [stopped, _result(True)])
+        assert (summary["eval_tokens"], summary["tok_s"]) == (15, 20.0)
+        assert [i["tok_s_source"] for i in summary["items"]] == ["client", "server"]
+
+    def test_empty(self):
+        assert model_summary("m", None, [])["accuracy"] is None
+
+
+class TestBuildReport:
+    def test_report_shape(self, tmp_path):
+        runs = {
+            "base": ("qwen3:4b", "sha-base", [_result(False), _result(True)]),
+            "adapter": ("locollm-math", "sha-math", [_result(True), _result(True)]),
+        }
+        report = build_report(
+            "math",
+            CONFIG,
+            "numeric",
+            tmp_path / "test.jsonl",
+            runs,
+            options={"temperature": 0},
+            started_at=STARTED,
+            wall_s=1.234,
+        )
+        assert report["schema"] == REPORT_SCHEMA
+        assert report["adapter"] == {"name": "math", "version": "0.2.0", "type": "lora"}
+        assert report["started_at"] == "2026-10-16T10:15:00+00:00"
+        assert report["dataset"]["items"] == 2
+        assert report["options"] == {"temperature": 0}
+        assert report["models"]["adapter"]["digest"] == "sha-math"
+        assert report["accuracy_delta"] == 0.5
+        assert report["wall_s"] == 1.23
+
+    def test_from_live_run(self, ollama_stub, tmp_path):
+        dataset = [{"question": "q1", "answer": 42}, {"question": "q2", "answer": 7}]
+        _, _, results = run_eval("qwen3:4b", dataset, client=OllamaClient(ollama_stub.url))
+        report = build_report(
+            "math", CONFIG, "numeric", tmp_path, {"base": ("qwen3:4b", "d", results)}
+        )
+        items = report["models"]["base"]["items"]
+        assert [i["correct"] for i in items] == [True, False]
+        assert items[0]["eval_count"] == 4 and items[0]["ttft_ms"] > 0
+        assert "accuracy_delta" not in report
+        # The report is plain JSON
+        json.dumps(report)
+
+
+class TestWriteReport:
+    def test_default_path(self):
+        path = default_report_path("math", "0.2.0", STARTED)
+        assert path.name == "math-0.2.0-20261016T101500Z.json"
+        assert default_report_path("math", None, STARTED).name.startswith("math-unversioned-")
+
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "nested" / "run.json"
+        write_report({"schema": REPORT_SCHEMA}, path)
+        assert json.loads(path.read_text()) == {"schema": REPORT_SCHEMA}
+        assert [p.name for p in path.parent.iterdir()] == ["run.json"]
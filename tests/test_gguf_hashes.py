@@ -0,0 +1,50 @@
+"""Tests for the GGUF content-hash cache."""
+
+import hashlib
+import json
+
+from locollm.gguf_hashes import HashCache, file_sha256
+
+
+class TestFileSha256:
+    def test_streams_in_chunks(self, tmp_path):
+        path = tmp_path / "model.gguf"
+        path.write_bytes(b"x" * 10_000)
+        expected = hashlib.sha256(b"x" * 10_000).hexdigest()
+        assert file_sha256(path, chunk_size=4096) == expected
+
+
+class TestHashCache:
+    def test_hashes_once(self, tmp_path, monkeypatch):
+        path = tmp_path / "model.gguf"
+        path.write_bytes(b"weights")
+        cache = HashCache(tmp_path / "hashes.json")
+        first = cache.sha256(path)
+        # A fresh cache reads the sidecar file instead of the GGUF
+        reopened = HashCache(tmp_path / "hashes.json")
+        monkeypatch.setattr("locollm.gguf_hashes.file_sha256", None)
+        assert reopened.sha256(path) == first
+        assert (cache.hashed, reopened.hashed) == (1, 0)
+
+    def test_rehashes_when_file_changes(self, tmp_path):
+        path = tmp_path / "model.gguf"
+        path.write_bytes(b"v1")
+        cache = HashCache(tmp_path / "hashes.json")
+        first = cache.sha256(path)
+        path.write_bytes(b"v2!")
+        assert cache.sha256(path) == hashlib.sha256(b"v2!").hexdigest() != first
+        assert cache.hashed == 2
+
+    def test_records_syncs(self, tmp_path):
+        cache = HashCache(tmp_path / "hashes.json")
+        assert cache.synced("locollm-math") is None
+        cache.record_sync("locollm-math", "abc", "d-1")
+        reopened = HashCache(tmp_path / "hashes.json")
+        assert reopened.synced("locollm-math") == {"sha256": "abc", "digest": "d-1"}
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        path = tmp_path / "hashes.json"
+        path.write_text("{broken")
+        cache = HashCache(path)
+        cache.record_sync("m", "abc", None)
+        assert json.loads(path.read_text())["synced"] == {"m": {"sha256": "abc", "digest": None}}
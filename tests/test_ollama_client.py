@@ -0,0 +1,192 @@
+"""Tests for the pooled Ollama client — run against an in-process stub server."""
+
+from locollm import ollama_client
+from locollm.ollama_client import DEFAULT_TIMEOUTS, OllamaClient
+
+
+class TestOllamaClient:
+    def test_check_running(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            assert client.check_running() is True
+
+    def test_check_running_unreachable(self):
+        with OllamaClient("http://127.0.0.1:9") as client:
+            assert client.check_running() is False
+
+    def test_list_models(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            assert client.list_models() == ["qwen3:4b", "locollm-math:latest"]
+
+    def test_generate_non_streaming(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = "four"
+        with OllamaClient(ollama_stub.url) as client:
+            assert client.generate("qwen3:4b", "2+2?", stream=False) == "four"
+
+    def test_generate_streaming(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = "one two three"
+        with OllamaClient(ollama_stub.url) as client:
+            assert "".join(client.generate("qwen3:4b", "count")) == "one two three"
+
+    def test_chat_streaming_meta_on_last_chunk(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            chunks = list(client.chat("qwen3:4b", [{"role": "user", "content": "hi"}]))
+        assert all(meta is None for _, meta in chunks[:-1])
+        assert chunks[-1][1]["prompt_eval_count"] == 10
+
+    def test_chat_meta_has_client_timings(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            *_, (_, meta) = client.chat("qwen3:4b", [{"role": "user", "content": "hi"}])
+        assert meta["ttft_ms"] > 0
+        assert meta["chunks"] == 4
+        assert meta["gap_p95_ms"] >= meta["gap_p50_ms"]
+        assert "load_duration" in meta and "prompt_eval_duration" in meta
+
+    def test_generate_with_meta(self, ollama_stub):
+        ollama_stub.replies["qwen3:4b"] = "one two"
+        with OllamaClient(ollama_stub.url) as client:
+            chunks = list(client.generate("qwen3:4b", "count", with_meta=True))
+            text, meta = client.generate("qwen3:4b", "count", stream=False, with_meta=True)
+        assert "".join(chunk for chunk, _ in chunks) == "one two"
+        assert chunks[-1][1]["chunks"] == 2
+        assert (text, meta["eval_count"]) == ("one two", 2)
+
+    def test_delete_model(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            client.delete_model("locollm-math")
+        assert ollama_stub.requests[-1] == ("DELETE", "/api/delete", {"name": "locollm-math"})
+
+    def test_progress_callback(self, ollama_stub, capsys):
+        seen = []
+        with OllamaClient(ollama_stub.url) as client:
+            client.create_model("locollm-code", "FROM qwen3:4b", on_progress=seen.append)
+            client.pull_model("qwen3:4b", on_progress=seen.append)
+        assert [d["status"] for d in seen] == ["working", "success"] * 2
+        assert capsys.readouterr().out == ""
+
+    def test_weights_digest(self, ollama_stub):
+        ollama_stub.blobs["locollm-math:latest"] = "ab" * 32
+        with OllamaClient(ollama_stub.url) as client:
+            assert client.weights_digest("locollm-math") == "ab" * 32
+            assert client.weights_digest("missing") is None
+
+
+class TestKeepAlive:
+    def _body(self, stub):
+        return stub.requests[-1][2]
+
+    def test_policy_sent_with_requests(self, ollama_stub):
+        with OllamaClient(ollama_stub.url, keep_alive=lambda model: "30m") as client:
+            client.generate("qwen3:4b", "hi", stream=False)
+            assert self._body(ollama_stub)["keep_alive"] == "30m"
+            list(client.chat("qwen3:4b", [{"role": "user", "content": "hi"}]))
+            assert self._body(ollama_stub)["keep_alive"] == "30m"
+
+    def test_no_policy_sends_nothing(self, ollama_stub):
+        with OllamaClient(ollama_stub.url, keep_alive=lambda model: None) as client:
+            client.generate("qwen3:4b", "hi", stream=False)
+        assert "keep_alive" not in self._body(ollama_stub)
+
+    def test_load_model(self, ollama_stub):
+        with OllamaClient(ollama_stub.url, keep_alive=lambda model: "30m") as client:
+            assert client.load_model("locollm-math", keep_alive=-1) == 1_500_000_000
+        body = self._body(ollama_stub)
+        assert (body["prompt"], body["keep_alive"], body["stream"]) == ("", -1, False)
+
+
+class TestInferenceOptions:
+    def _body(self, stub):
+        return stub.requests[-1][2]
+
+    def test_call_options_override_defaults(self, ollama_stub):
+        defaults = {"num_ctx": 8192, "temperature": 0.7}
+        with OllamaClient(ollama_stub.url, options=lambda model: dict(defaults)) as client:
+            client.generate("qwen3:4b", "hi", stream=False, options={"temperature": 0})
+            assert self._body(ollama_stub)["options"] == {"num_ctx": 8192, "temperature": 0}
+            messages = [{"role": "user", "content": "hi"}]
+            list(client.chat("qwen3:4b", messages, options={"seed": 1}))
+            assert self._body(ollama_stub)["options"] == {**defaults, "seed": 1}
+
+    def test_no_options_sends_nothing(self, ollama_stub):
+        with OllamaClient(ollama_stub.url, options=None) as client:
+            client.generate("qwen3:4b", "hi", stream=False)
+        assert "options" not in self._body(ollama_stub)
+
+
+class TestConnectionPooling:
+    def test_keep_alive_reuses_connection(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            for _ in range(5):
+                client.check_running()
+            client.generate("qwen3:4b", "hi", stream=False)
+            stats = client.stats.as_dict()
+        assert stats["requests"] == 6
+        assert stats["new_connections"] == 1
+        assert stats["reused_connections"] == 5
+
+    def test_streamed_response_returns_connection(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            for _ in range(3):
+                list(client.generate("qwen3:4b", "hi"))
+            assert client.stats.new_connections == 1
+
+    def test_timeouts_override_defaults(self):
+        client = OllamaClient(timeouts={"generate": 30})
+        assert client.timeouts["generate"] == 30
+        assert client.timeouts["pull"] == DEFAULT_TIMEOUTS["pull"]
+        client.close()
+
+    def test_pool_size_applied(self):
+        client = OllamaClient(pool_size=3)
+        adapter = client._session.get_adapter("http://localhost")
+        assert adapter._pool_maxsize == 3
+        client.close()
+
+
+class TestDefaultClient:
+    def test_helpers_share_default_client(self, ollama_stub):
+        client = OllamaClient(ollama_stub.url)
+        ollama_client.set_client(client)
+        try:
+            assert ollama_client.get_client() is client
+            assert ollama_client.check_running() is True
+            assert "qwen3:4b" in ollama_client.list_models()
+            assert client.stats.requests == 2
+        finally:
+            ollama_client.set_client(None)
+
+
+class TestModelInventory:
+    def _tag_requests(self, stub):
+        return sum(1 for _, path, _ in stub.requests if path == "/api/tags")
+
+    def test_listing_cached_within_ttl(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            client.list_models()
+            client.model_digest("qwen3:4b")
+            client.inventory.base_names()
+        assert self._tag_requests(ollama_stub) == 1
+
+    def test_expires_after_ttl(self, ollama_stub):
+        now = [0.0]
+        with OllamaClient(ollama_stub.url) as client:
+            client.inventory._clock = lambda: now[0]
+            client.list_models()
+            now[0] = client.inventory.ttl + 1
+            client.list_models()
+        assert self._tag_requests(ollama_stub) == 2
+
+    def test_create_and_delete_invalidate(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            client.list_models()
+            client.create_model("locollm-code", "FROM qwen3:4b")
+            client.list_models()
+            client.delete_model("locollm-code")
+            client.list_models()
+        assert self._tag_requests(ollama_stub) == 3
+
+    def test_digests_and_sizes(self, ollama_stub):
+        with OllamaClient(ollama_stub.url) as client:
+            assert client.inventory.digest("locollm-math") == "d-math"
+            assert client.inventory.size("qwen3:4b") == 2_500_000_000
+            assert client.inventory.digest("missing") is None
+            assert client.inventory.base_names() == {"qwen3", "locollm-math"}
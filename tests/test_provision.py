@@ -0,0 +1,146 @@
+"""Tests for concurrent model provisioning behind `loco setup`."""
+
+import io
+import threading
+
+import pytest
+
+from locollm import adapter_manager, ollama_client
+from locollm.gguf_hashes import HashCache
+from locollm.ollama_client import OllamaClient
+from locollm.provision import ProgressBoard, provision
+
+REGISTRY = {
+    "base_model": {"ollama_name": "qwen3:4b"},
+    "adapters": {
+        "math": {"type": "system-prompt", "system_prompt": "Do maths."},
+        "code": {"type": "system-prompt", "system_prompt": "Write code."},
+        "poetry": {"type": "merged-gguf", "gguf_path": "poetry/missing.gguf"},
+        "legal": {"type": "merged-gguf", "gguf_path": "legal/model.gguf"},
+    },
+}
+
+BASE = [{"name": "qwen3:4b", "digest": "d-base"}]
+
+
+@pytest.fixture
+def stub(ollama_stub, monkeypatch, tmp_path):
+    monkeypatch.setattr(adapter_manager, "load_registry", lambda: REGISTRY)
+    monkeypatch.setattr(adapter_manager, "ADAPTERS_DIR", tmp_path)
+    ollama_client.set_client(OllamaClient(ollama_stub.url))
+    yield ollama_stub
+    ollama_client.set_client(None)
+
+
+@pytest.fixture
+def hashes(tmp_path):
+    return HashCache(tmp_path / "hashes.json")
+
+
+def _board():
+    return ProgressBoard(["qwen3:4b", "math", "code", "poetry", "legal"], out=io.StringIO())
+
+
+def _posts(stub):
+    return [(path, body["name"]) for method, path, body in stub.requests if method == "POST"]
+
+
+class TestProvision:
+    def test_fresh_machine(self, stub, hashes):
+        result = provision("qwen3:4b", ["math", "code"], [], board=_board(), hashes=hashes)
+        assert result.outcomes == {
+            "qwen3:4b": ("pulled", ""),
+            "math": ("created", ""),
+            "code": ("created", ""),
+        }
+        posts = _posts(stub)
+        # System-prompt adapters are built FROM the base model, so it is pulled first
+        assert posts[0] == ("/api/pull", "qwen3:4b")
+        assert sorted(posts[1:]) == [
+            ("/api/create", "locollm-code"),
+            ("/api/create", "locollm-math"),
+        ]
+
+    def test_uses_snapshot_only(self, stub, hashes):
+        models = [*BASE, {"name": "locollm-math:latest", "digest": "d-math"}]
+        result = provision("qwen3:4b", ["math", "code"], models, board=_board(), hashes=hashes)
+        assert set(result.names("ready")) == {"qwen3:4b", "math"}
+        assert _posts(stub) == [("/api/create", "locollm-code")]
+        assert not [r for r in stub.requests if r[1] == "/api/tags"]
+
+    def test_missing_gguf_skipped(self, stub, hashes):
+        result = provision("qwen3:4b", ["poetry"], BASE, board=_board(), hashes=hashes)
+        outcome, message = result.outcomes["poetry"]
+        assert outcome == "skipped" and "GGUF file not found" in message
+        assert result.ok
+
+    def test_failure_does_not_stop_others(self, stub, monkeypatch, hashes):
+        real_create = ollama_client.create_model
+
+        def create_model(name, modelfile, on_progress=None):
+            if name == "locollm-math":
+                raise RuntimeError("disk full")
+            return real_create(name, modelfile, on_progress=on_progress)
+
+        monkeypatch.setattr(ollama_client, "create_model", create_model)
+        result = provision("qwen3:4b", ["math", "code"], BASE, board=_board(), hashes=hashes)
+        assert result.outcomes["math"] == ("failed", "disk full")
+        assert result.outcomes["code"][0] == "created"
+        assert not result.ok
+
+    def test_creates_concurrently(self, stub, monkeypatch, hashes):
+        # Each create waits for the other: this only finishes if both run at once
+        barrier = threading.Barrier(2, timeout=5)
+        monkeypatch.setattr(ollama_client, "create_model", lambda *args, **kwargs: barrier.wait())
+        result = provision(
+            "qwen3:4b", ["math", "code"], BASE, concurrency=3, board=_board(), hashes=hashes
+        )
+        assert set(result.names("created")) == {"math", "code"}
+
+    def test_incremental_gguf_sync(self, stub, hashes, tmp_path):
+        gguf = tmp_path / "legal" / "model.gguf"
+        gguf.parent.mkdir()
+        gguf.write_bytes(b"weights v1")
+
+        def run():
+            stub.requests.clear()
+            models = ollama_client.list_model_details()
+            return provision("qwen3:4b", ["legal"], models, board=_board(), hashes=hashes)
+
+        assert run().outcomes["legal"] == ("created", "")
+        # Unchanged GGUF: nothing beyond the model listing reaches Ollama
+        assert run().outcomes["legal"] == ("ready", "")
+        assert {path for _, path, _ in stub.requests} <= {"/api/tags"}
+        assert hashes.hashed == 1
+
+        gguf.write_bytes(b"weights v2, retrained")
+        assert run().outcomes["legal"] == ("updated", "")
+        assert ("/api/create", "locollm-legal") in _posts(stub)
+        assert run().outcomes["legal"] == ("ready", "")
+
+    def test_rejects_bad_concurrency(self):
+        with pytest.raises(ValueError, match="concurrency"):
+            provision("qwen3:4b", [], set(), concurrency=0)
+
+
+class TestProgressBoard:
+    def test_plain_output_prints_changes(self):
+        out = io.StringIO()
+        board = ProgressBoard(["qwen3:4b"], out=out, interactive=False)
+        for completed in (10, 50):
+            board.update("qwen3:4b", {"status": "pulling", "total": 100, "completed": completed})
+        board.finish("qwen3:4b", "pulled")
+        assert out.getvalue() == "qwen3:4b: pulling\nqwen3:4b: pulled\n"
+
+    def test_terminal_redraws_in_place(self):
+        out = io.StringIO()
+        now = [0.0]
+        board = ProgressBoard(["a", "bb"], out=out, interactive=True, clock=lambda: now[0])
+        board.update("a", {"status": "pulling", "total": 4, "completed": 1})
+        # Within the redraw interval: recorded, not drawn
+        board.update("a", {"status": "pulling", "total": 4, "completed": 2})
+        board.finish("bb", "created")
+        lines = out.getvalue()
+        assert lines.count("\x1b[2K") == 4
+        assert "\x1b[2F" in lines
+        assert lines.endswith("\x1b[2Ka   pulling 50%\n\x1b[2Kbb  created\n")
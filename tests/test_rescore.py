@@ -0,0 +1,112 @@
+"""Tests for offline re-scoring of saved eval results."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from locollm.eval import score_response
+from locollm.eval_report import build_report, read_report, write_report
+from locollm.rescore import rescore_files, score_many
+
+
+def _write_dataset(path, answers):
+    lines = [json.dumps({"question": f"q{i}", "answer": a}) for i, a in enumerate(answers)]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def _write_results(tmp_path, dataset, responses):
+    results = []
+    problems = [json.loads(line) for line in dataset.read_text().splitlines()]
+    for problem, response in zip(problems, responses, strict=True):
+        correct, detail = score_response(problem, response)
+        results.append(
+            {
+                "question": problem["question"],
+                "correct": correct,
+                "detail": detail,
+                "response": response,
+                "meta": None,
+            }
+        )
+    runs = {"base": ("qwen3:4b", "d", results)}
+    report = build_report("math", {"version": "0.2.0"}, "numeric", dataset, runs)
+    return write_report(report, tmp_path / "run.json")
+
+
+class TestScoreMany:
+    TASKS = [("numeric", {"answer": 4}, f"The answer is {n}") for n in range(10)]
+
+    def test_matches_serial_scoring(self):
+        expected = [score_response(p, r, t) for t, p, r in self.TASKS]
+        assert score_many(self.TASKS, workers=1) == expected
+
+    def test_process_pool(self):
+        expected = [score_response(p, r, t) for t, p, r in self.TASKS]
+        assert score_many(self.TASKS, workers=2, chunk_size=3) == expected
+
+    def test_mixed_eval_types(self):
+        tasks = [
+            ("numeric", {"answer": 4}, "The answer is 4"),
+            ("analysis", {"answer": "cell"}, "The Cell wall"),
+        ]
+        assert [ok for ok, _ in score_many(tasks, workers=1)] == [True, True]
+
+
+class TestRescoreFiles:
+    def test_unchanged_rules_change_nothing(self, tmp_path):
+        dataset = _write_dataset(tmp_path / "data.jsonl", [4, 5])
+        path = _write_results(tmp_path, dataset, ["The answer is 4", "The answer is 6"])
+        [result] = rescore_files([path], workers=1)
+        assert result.models["base"] == [1, 1, 0, 2]
+        assert not result.changed
+
+    def test_changed_answers_flip_and_write(self, tmp_path):
+        dataset = _write_dataset(tmp_path / "data.jsonl", [4, 5])
+        path = _write_results(tmp_path, dataset, ["The answer is 4", "The answer is 6"])
+        fixed = _write_dataset(tmp_path / "fixed.jsonl", [4, 6])
+        [result] = rescore_files([path], dataset_path=fixed, workers=1, write=True)
+        assert result.models["base"] == [1, 2, 1, 2]
+        assert "1/2 -> 2/2 (1 flipped)" in result.display()
+        report = read_report(path)
+        assert report["models"]["base"]["correct"] == 2
+        assert report["models"]["base"]["items"][1]["correct"] is True
+
+    def test_dry_run_leaves_file(self, tmp_path):
+        dataset = _write_dataset(tmp_path / "data.jsonl", [4])
+        path = _write_results(tmp_path, dataset, ["The answer is 5"])
+        before = path.read_text()
+        _write_dataset(dataset, [5])
+        [result] = rescore_files([path], workers=1)
+        assert result.changed
+        assert path.read_text() == before
+
+    def test_mismatched_items_skipped(self, tmp_path):
+        dataset = _write_dataset(tmp_path / "data.jsonl", [4, 5])
+        path = _write_results(tmp_path, dataset, ["The answer is 4", "The answer is 5"])
+        dataset.write_text(json.dumps({"question": "other", "answer": 4}) + "\n")
+        [result] = rescore_files([path], workers=1)
+        assert result.skipped == 2
+        assert result.models["base"][1] == 2
+
+    def test_rejects_unknown_schema(self, tmp_path):
+        path = tmp_path / "old.json"
+        path.write_text(json.dumps({"schema": 99}))
+        with pytest.raises(ValueError, match="schema"):
+            rescore_files([path])
+
+
+class TestRescoreCLI:
+    def test_runs_offline(self, tmp_path):
+        dataset = _write_dataset(tmp_path / "data.jsonl", [4])
+        path = _write_results(tmp_path, dataset, ["The answer is 4"])
+        result = subprocess.run(
+            [sys.executable, "-m", "locollm.cli", "rescore", str(path), "--workers", "1"],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        assert "base 1/1 -> 1/1 (0 flipped)" in result.stdout
+        assert "Rescored 1 items in 1 files" in result.stdout
@@ -0,0 +1,57 @@
+"""Tests for the on-disk response cache."""
+
+import os
+
+from locollm.response_cache import ResponseCache, cache_key
+
+
+class TestCacheKey:
+    def test_stable(self):
+        assert cache_key("sha256:abc", "2+2?") == cache_key("sha256:abc", "2+2?")
+
+    def test_depends_on_digest(self):
+        assert cache_key("sha256:abc", "2+2?") != cache_key("sha256:def", "2+2?")
+
+    def test_depends_on_options(self):
+        assert cache_key("d", "p", {"temperature": 0}) != cache_key("d", "p", {"temperature": 1})
+
+    def test_option_order_irrelevant(self):
+        a = cache_key("d", "p", {"temperature": 0, "seed": 1})
+        b = cache_key("d", "p", {"seed": 1, "temperature": 0})
+        assert a == b
+
+
+class TestResponseCache:
+    def test_miss_then_hit(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        key = cache_key("d", "p")
+        assert cache.get(key) is None
+        cache.put(key, "42")
+        assert cache.get(key) == "42"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_persists_across_instances(self, tmp_path):
+        key = cache_key("d", "p")
+        ResponseCache(tmp_path).put(key, "42")
+        assert ResponseCache(tmp_path).get(key) == "42"
+
+    def test_refresh_skips_reads_but_writes(self, tmp_path):
+        key = cache_key("d", "p")
+        ResponseCache(tmp_path).put(key, "old")
+        refreshing = ResponseCache(tmp_path, read=False)
+        assert refreshing.get(key) is None
+        refreshing.put(key, "new")
+        assert ResponseCache(tmp_path).get(key) == "new"
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=300)
+        keys = [cache_key("d", f"p{i}") for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 80)
+            # Give each entry a distinct, increasing mtime
+            path = cache._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        cache.get(keys[0])  # touch: now most recently used
+        cache.put(cache_key("d", "p3"), "x" * 80)
+        assert cache.get(keys[0]) == "x" * 80
+        assert cache.get(keys[1]) is None
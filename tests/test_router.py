@@ -48,3 +48,110 @@ class TestKeywordRouter:
 
     def test_code_multiple_keywords(self):
         assert self.router.route("write a function to implement a class in python") == "code"
+
+
+def _naive_route(adapter_keywords, query):
+    """Reference implementation: the original per-keyword substring scan."""
+    query_lower = query.lower()
+    best_adapter, best_score = None, 0
+    for name in sorted(adapter_keywords):
+        score = sum(1 for kw in adapter_keywords[name] if kw.lower() in query_lower)
+        if score > best_score:
+            best_adapter, best_score = name, score
+    return best_adapter
+
+
+class TestCompiledMatching:
+    """The compiled matchers must score exactly like the original scan."""
+
+    KEYWORDS = {
+        "beta": ["he", "she", "his", "hers", "sum"],
+        "alpha": ["her", "summarize", "sum", "she"],
+        "gamma": ["s", "ushers", "sum"],
+        "delta": ["hi", "hi"],  # duplicates count twice
+    }
+
+    def _routers(self, keywords):
+        from locollm.router import _KeywordAutomaton, _SubstringMatcher
+
+        for matcher_cls in (_SubstringMatcher, _KeywordAutomaton):
+            router = KeywordRouter.from_keywords(keywords)
+            router._matcher = matcher_cls(router._patterns)
+            yield router
+
+    def test_overlapping_patterns(self):
+        for router in self._routers(self.KEYWORDS):
+            for query in ["ushers", "she sells", "summarize his", "hi", "HIS HERS", "xyz"]:
+                assert router.route(query) == _naive_route(self.KEYWORDS, query), query
+
+    def test_tie_breaks_alphabetically(self):
+        keywords = {"zeta": ["apple"], "eta": ["pear"]}
+        for router in self._routers(keywords):
+            assert router.route("apple pear") == "eta"
+
+    def test_randomised_parity(self):
+        import random
+
+        rng = random.Random(1234)
+        alphabet = "abcde "
+        keywords = {
+            f"a{i}": ["".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(6)]
+            for i in range(8)
+        }
+        queries = ["".join(rng.choices(alphabet, k=rng.randint(0, 30))) for _ in range(300)]
+        for router in self._routers(keywords):
+            for query in queries:
+                assert router.route(query) == _naive_route(keywords, query), query
+
+    def test_large_registry_uses_automaton(self):
+        from locollm.router import AUTOMATON_MIN_PATTERNS, _KeywordAutomaton
+
+        keywords = {"big": [f"kw{i}" for i in range(AUTOMATON_MIN_PATTERNS)]}
+        router = KeywordRouter.from_keywords(keywords)
+        assert isinstance(router._matcher, _KeywordAutomaton)
+        assert router.route("use kw7 please") == "big"
+
+
+class TestSharedRouter:
+    """Tests for the process-wide, hot-reloading router."""
+
+    def test_same_router_returned(self):
+        from locollm.router import get_router
+
+        assert get_router() is get_router()
+
+    def test_rebuilt_when_registry_changes(self, monkeypatch):
+        from locollm import adapter_manager
+        from locollm.router import get_router
+
+        first = get_router()
+        first.route("solve 2+2")
+        registry = {"adapters": {"poetry": {"router_keywords": ["poem"]}}}
+        monkeypatch.setattr(adapter_manager, "load_registry", lambda: registry)
+        rebuilt = get_router()
+        assert rebuilt is not first
+        assert rebuilt.route("write a poem") == "poetry"
+        # Latency metrics survive the rebuild
+        assert rebuilt.metrics is first.metrics
+
+    def test_metrics_record_each_route(self):
+        router = KeywordRouter()
+        router.route("solve 2+2")
+        router.route("hello")
+        assert router.metrics.calls == 2
+        assert router.metrics.total_ns > 0
+        assert "2 calls" in router.metrics.display()
+
+    def test_explicit_registry(self):
+        registry = {"adapters": {"poetry": {"router_keywords": ["Poem"]}}}
+        assert KeywordRouter(registry).route("a POEM please") == "poetry"
+
+    def test_uses_compiled_keywords(self, monkeypatch, tmp_path):
+        from locollm import adapter_manager
+
+        path = tmp_path / "registry.yaml"
+        path.write_text('adapters:\n  poetry:\n    router_keywords: ["Poem"]\n')
+        monkeypatch.setattr(adapter_manager, "REGISTRY_PATH", path)
+        adapter_manager.reload_registry()
+        monkeypatch.setattr(adapter_manager, "_compile_keywords", None)
+        assert KeywordRouter().route("a POEM please") == "poetry"
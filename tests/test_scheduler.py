@@ -0,0 +1,117 @@
+"""Tests for the model-affinity scheduler."""
+
+import asyncio
+
+import pytest
+
+from locollm.scheduler import ModelScheduler
+
+
+def _serve(arrivals, concurrency=1, **kwargs):
+    """Submit (model, label) requests in order; return labels in run order and metrics."""
+    order = []
+
+    async def run(model, label):
+        order.append(label)
+        await asyncio.sleep(0)
+        return label
+
+    async def main():
+        scheduler = ModelScheduler(run, concurrency=concurrency, **kwargs)
+        results = await asyncio.gather(*(scheduler.submit(m, label) for m, label in arrivals))
+        assert results == [label for _, label in arrivals]
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    return order, scheduler.metrics
+
+
+class TestModelScheduler:
+    def test_drains_resident_model_first(self):
+        order, metrics = _serve([("a", "a1"), ("b", "b1"), ("a", "a2"), ("b", "b2")])
+        assert order == ["a1", "a2", "b1", "b2"]
+        assert (metrics.swaps, metrics.swaps_avoided) == (1, 2)
+
+    def test_known_resident_served_first(self):
+        order, metrics = _serve([("a", "a1"), ("b", "b1")], resident="b")
+        # a1 arrives first and nothing is in flight, so it starts immediately
+        assert order == ["a1", "b1"]
+        assert metrics.swaps == 2
+
+    def test_max_wait_forces_switch(self):
+        now = [0.0]
+        order = []
+
+        async def run(model, label):
+            order.append(label)
+            now[0] += 1
+            await asyncio.sleep(0)
+
+        async def main():
+            scheduler = ModelScheduler(run, max_wait=2.5, clock=lambda: now[0])
+            arrivals = [("a", f"a{i}") for i in range(5)] + [("b", "b0")]
+            await asyncio.gather(*(scheduler.submit(m, label) for m, label in arrivals))
+            return scheduler.metrics
+
+        metrics = asyncio.run(main())
+        # Each request takes one tick; everything behind a0 queues at t=1, so
+        # b0 is overdue at t=4 even though a4 is still waiting
+        assert order == ["a0", "a1", "a2", "a3", "b0", "a4"]
+        assert metrics.forced_switches == 1
+        assert metrics.max_wait_s == 4
+
+    def test_concurrency_stays_on_one_model(self):
+        running = set()
+        overlap = []
+
+        async def run(model, label):
+            running.add(model)
+            overlap.append(len(running))
+            await asyncio.sleep(0.01)
+            running.discard(model)
+
+        async def main():
+            scheduler = ModelScheduler(run, concurrency=3)
+            arrivals = ["a", "b", "a", "b", "a", "b"]
+            await asyncio.gather(*(scheduler.submit(m, i) for i, m in enumerate(arrivals)))
+
+        asyncio.run(main())
+        assert max(overlap) == 1
+
+    def test_errors_propagate_and_release_slot(self):
+        async def run(model, label):
+            if label == "bad":
+                raise RuntimeError("boom")
+            return label
+
+        async def main():
+            scheduler = ModelScheduler(run)
+            results = await asyncio.gather(
+                scheduler.submit("a", "bad"), scheduler.submit("a", "ok"), return_exceptions=True
+            )
+            return results
+
+        bad, ok = asyncio.run(main())
+        assert isinstance(bad, RuntimeError) and ok == "ok"
+
+    def test_cancelled_request_leaves_queue(self):
+        async def run(model, label):
+            await asyncio.sleep(0.01)
+            return label
+
+        async def main():
+            scheduler = ModelScheduler(run)
+            first = asyncio.create_task(scheduler.submit("a", 1))
+            queued = asyncio.create_task(scheduler.submit("b", 2))
+            await asyncio.sleep(0)
+            assert scheduler.pending() == {"b": 1}
+            queued.cancel()
+            await asyncio.sleep(0)
+            assert scheduler.pending() == {}
+            return await first
+
+        assert asyncio.run(main()) == 1
+
+    def test_rejects_zero_concurrency(self):
+        with pytest.raises(ValueError):
+            ModelScheduler(lambda *a: None, concurrency=0)
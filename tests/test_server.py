@@ -0,0 +1,288 @@
+"""Tests for the OpenAI-compatible gateway behind `loco serve`."""
+
+import http.client
+import json
+import threading
+
+import pytest
+import requests
+
+from locollm.ollama_client import OllamaClient
+from locollm.router import KeywordRouter
+from locollm.server import (
+    SESSION_HEADER,
+    Gateway,
+    GatewayError,
+    SessionStore,
+    make_server,
+    request_options,
+)
+
+
+@pytest.fixture
+def gateway(ollama_stub):
+    router = KeywordRouter.from_keywords({"math": ["solve"], "code": ["python"]})
+    return Gateway(client=OllamaClient(ollama_stub.url), router=router, context_limit=4096)
+
+
+@pytest.fixture
+def url(gateway):
+    server = make_server(gateway, port=0)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def _chat_requests(stub):
+    return [body for method, path, body in stub.requests if path == "/api/chat"]
+
+
+def _events(resp):
+    """Return the JSON payloads of an SSE response, and whether it ended with [DONE]."""
+    data = [line[len("data: ") :] for line in resp.iter_lines(decode_unicode=True) if line]
+    done = data[-1] == "[DONE]"
+    return [json.loads(d) for d in data if d != "[DONE]"], done
+
+
+class TestRequestOptions:
+    def test_maps_openai_fields(self):
+        body = {"temperature": 0.2, "max_tokens": 64, "stop": "\n", "seed": 1, "n": 1}
+        assert request_options(body) == {
+            "temperature": 0.2,
+            "num_predict": 64,
+            "stop": ["\n"],
+            "seed": 1,
+        }
+
+    def test_empty(self):
+        assert request_options({"model": "auto"}) == {}
+
+
+class TestSessionStore:
+    def test_reuses_session(self):
+        store = SessionStore()
+        first, lock = store.get("a", object)
+        assert store.get("a", object) == (first, lock)
+
+    def test_evicts_least_recently_used(self):
+        store = SessionStore(max_sessions=2)
+        store.get("a", object)
+        store.get("b", object)
+        store.get("a", object)
+        store.get("c", object)
+        assert "a" in store and "b" not in store and len(store) == 2
+
+    def test_expires_idle(self):
+        now = [0.0]
+        store = SessionStore(ttl=10, clock=lambda: now[0])
+        store.get("a", object)
+        now[0] = 11
+        store.get("b", object)
+        assert "a" not in store and "b" in store
+
+
+class TestGateway:
+    def test_unknown_model(self, gateway):
+        with pytest.raises(GatewayError) as exc:
+            gateway.chat({"model": "poetry", "messages": [{"role": "user", "content": "hi"}]})
+        assert exc.value.status == 404
+
+    def test_bad_messages(self, gateway):
+        with pytest.raises(GatewayError, match="messages"):
+            gateway.chat({"messages": []})
+        with pytest.raises(GatewayError, match="role"):
+            gateway.chat({"messages": [{"role": "tool", "content": "x"}]})
+
+    def test_closing_reply_releases_session(self, gateway):
+        body = {"messages": [{"role": "user", "content": "solve 2+2"}]}
+        reply = gateway.chat(body, session_id="s")
+        next(reply)
+        reply.close()
+        # A second turn would block forever if the first still held the session
+        with gateway.chat(body, session_id="s") as second:
+            assert "".join(text for text, _ in second) == "The answer is 42"
+
+    def test_cut_short_turn_keeps_history_alternating(self, gateway):
+        body = {"messages": [{"role": "user", "content": "solve 2+2"}]}
+        reply = gateway.chat(body, session_id="s")
+        next(reply)
+        reply.close()
+        # Closed before it was ever read, as when the client hangs up at once
+        gateway.chat(body, session_id="s").close()
+        session, _ = gateway.sessions.get("s", None)
+        assert [m["role"] for m in session.messages] == ["user", "assistant"] * 2
+        assert session.messages[1]["content"] == "The"
+
+    def test_system_message_survives_over_budget_history(self, gateway, ollama_stub):
+        system = {"role": "system", "content": "Answer in French."}
+        history = []
+        for i in range(6):
+            history.append({"role": "user", "content": f"question {i} " + "word " * 800})
+            history.append({"role": "assistant", "content": f"answer {i} " + "word " * 800})
+        body = {"messages": [system, *history, {"role": "user", "content": "and now?"}]}
+        with gateway.chat(body) as reply:
+            list(reply)
+        sent = _chat_requests(ollama_stub)[-1]["messages"]
+        assert sent[0] == system
+        assert len(sent) < len(body["messages"])
+        assert sent[-1]["content"] == "and now?"
+
+        with gateway.chat(body, session_id="s") as reply:
+            list(reply)
+        session, _ = gateway.sessions.get("s", None)
+        # The fallback for an over-long prompt reported by Ollama keeps it too
+        assert session.maybe_compact(4096) is not None
+        assert session.messages[0] == system
+        assert len(session.messages) == 5
+
+
+class TestChatCompletions:
+    def test_auto_routes(self, url, ollama_stub):
+        resp = requests.post(
+            f"{url}/chat/completions",
+            json={"model": "auto", "messages": [{"role": "user", "content": "solve 2+2"}]},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["object"] == "chat.completion"
+        assert data["model"] == "locollm-math"
+        assert data["choices"][0]["message"] == {
+            "role": "assistant",
+            "content": "The answer is 42",
+        }
+        assert data["usage"] == {"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14}
+        assert resp.headers["X-Locollm-Adapter"] == "math"
+
+    def test_uninstalled_adapter_falls_back_to_base(self, url):
+        body = {"messages": [{"role": "user", "content": "write python"}]}
+        assert requests.post(f"{url}/chat/completions", json=body).json()["model"] == "qwen3:4b"
+
+    def test_stateless_forwards_history(self, url, ollama_stub):
+        messages = [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "hi"},
+            {"role": "assistant", "content": "hello"},
+            {"role": "user", "content": "solve 2+2"},
+        ]
+        body = {"model": "base", "messages": messages, "temperature": 0}
+        resp = requests.post(f"{url}/chat/completions", json=body)
+        assert resp.json()["model"] == "qwen3:4b"
+        [sent] = _chat_requests(ollama_stub)
+        assert sent["messages"] == messages
+        assert sent["options"]["temperature"] == 0
+
+    def test_session_keeps_history(self, url, ollama_stub):
+        headers = {SESSION_HEADER: "abc"}
+        for text in ("solve 2+2", "and 3+3?"):
+            body = {"messages": [{"role": "user", "content": text}]}
+            resp = requests.post(f"{url}/chat/completions", json=body, headers=headers)
+            assert resp.headers[SESSION_HEADER] == "abc"
+        first, second = _chat_requests(ollama_stub)
+        assert second["model"] == "locollm-math"
+        assert [m["content"] for m in second["messages"]] == [
+            "solve 2+2",
+            "The answer is 42",
+            "and 3+3?",
+        ]
+
+    def test_streams_sse(self, url, ollama_stub):
+        ollama_stub.replies["locollm-math"] = "x equals four"
+        body = {
+            "messages": [{"role": "user", "content": "solve it"}],
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        with requests.post(f"{url}/chat/completions", json=body, stream=True) as resp:
+            assert resp.headers["Content-Type"] == "text/event-stream"
+            events, done = _events(resp)
+        assert done
+        assert events[0]["choices"][0]["delta"]["role"] == "assistant"
+        deltas = [e["choices"][0]["delta"].get("content", "") for e in events]
+        assert "".join(deltas) == "x equals four"
+        assert events[-1]["choices"][0]["finish_reason"] == "stop"
+        assert events[-1]["usage"]["completion_tokens"] == 3
+        assert {e["object"] for e in events} == {"chat.completion.chunk"}
+
+    def test_length_finish_reason(self, url):
+        body = {"messages": [{"role": "user", "content": "hi"}], "max_tokens": 2}
+        data = requests.post(f"{url}/chat/completions", json=body).json()
+        assert data["choices"][0]["finish_reason"] == "length"
+
+    def test_errors(self, url):
+        resp = requests.post(f"{url}/chat/completions", data="{oops")
+        assert resp.status_code == 400
+        assert resp.json()["error"]["type"] == "invalid_request_error"
+        body = {"model": "nope", "messages": [{"role": "user", "content": "hi"}]}
+        assert requests.post(f"{url}/chat/completions", json=body).status_code == 404
+        assert requests.post(f"{url}/embeddings", json={}).status_code == 404
+
+    def test_ollama_down_mid_session(self, ollama_stub, url, gateway):
+        headers = {SESSION_HEADER: "abc"}
+        body = {"messages": [{"role": "user", "content": "hi"}]}
+        requests.post(f"{url}/chat/completions", json=body, headers=headers)
+        ollama_stub.stop()
+        # A stopped stub still answers on open keep-alive connections
+        gateway.client.close()
+        resp = requests.post(f"{url}/chat/completions", json=body, headers=headers)
+        assert resp.status_code == 503
+        session, _ = gateway.sessions.get("abc", None)
+        assert [m["role"] for m in session.messages] == ["user", "assistant"] * 2
+
+    def test_bad_content_length(self, url):
+        host, port = url.split("//")[1].split("/")[0].split(":")
+        conn = http.client.HTTPConnection(host, int(port), timeout=5)
+        conn.putrequest("POST", "/v1/chat/completions")
+        conn.putheader("Content-Length", "lots")
+        conn.endheaders()
+        resp = conn.getresponse()
+        assert resp.status == 400
+        assert json.loads(resp.read())["error"]["message"] == "invalid Content-Length header"
+        conn.close()
+
+    def test_unexpected_error_is_500(self, url, gateway, monkeypatch):
+        def boom():
+            raise RuntimeError("bug")
+
+        monkeypatch.setattr(gateway, "models", boom)
+        monkeypatch.setattr("http.server.BaseHTTPRequestHandler.log_message", lambda *a: None)
+        resp = requests.get(f"{url}/models")
+        assert resp.status_code == 500
+        assert resp.json()["error"]["type"] == "server_error"
+
+    def test_ollama_down(self, ollama_stub, url):
+        ollama_stub.stop()
+        body = {"model": "base", "messages": [{"role": "user", "content": "hi"}]}
+        resp = requests.post(f"{url}/chat/completions", json=body)
+        assert resp.status_code == 503
+        assert resp.json()["error"]["type"] == "api_error"
+
+
+class TestCompletions:
+    def test_routes_prompt(self, url, ollama_stub):
+        resp = requests.post(f"{url}/completions", json={"model": "auto", "prompt": "solve 1+1"})
+        data = resp.json()
+        assert data["object"] == "text_completion"
+        assert data["model"] == "locollm-math"
+        assert data["choices"][0]["text"] == "The answer is 42"
+
+    def test_streams(self, url):
+        body = {"model": "qwen3:4b", "prompt": "hi", "stream": True}
+        with requests.post(f"{url}/completions", json=body, stream=True) as resp:
+            events, done = _events(resp)
+        assert done
+        assert "".join(e["choices"][0]["text"] for e in events) == "The answer is 42"
+
+    def test_prompt_required(self, url):
+        resp = requests.post(f"{url}/completions", json={"prompt": 3})
+        assert resp.status_code == 400
+
+
+class TestModels:
+    def test_lists_installed(self, url):
+        data = requests.get(f"{url}/models").json()
+        assert [m["id"] for m in data["data"]] == ["auto", "qwen3:4b", "locollm-math"]
@@ -0,0 +1,78 @@
+"""Tests for client-side stream timing."""
+
+from locollm.timing import LatencyStats, StreamTimer, format_timing, percentile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+
+    def test_single_and_empty(self):
+        assert percentile([7], 95) == 7
+        assert percentile([], 50) is None
+
+
+class TestStreamTimer:
+    def test_ttft_and_gaps(self):
+        clock = FakeClock()
+        timer = StreamTimer(clock)
+        for t in (0.5, 0.52, 0.54, 0.64):
+            clock.now = t
+            timer.chunk()
+        meta = timer.as_meta()
+        assert meta["ttft_ms"] == 500.0
+        assert meta["gap_p50_ms"] == 20.0
+        assert meta["gap_p95_ms"] == 100.0
+        assert meta["chunks"] == 4
+
+    def test_no_chunks(self):
+        meta = StreamTimer().as_meta()
+        assert meta == {"ttft_ms": None, "gap_p50_ms": None, "gap_p95_ms": None, "chunks": 0}
+
+
+class TestFormatTiming:
+    def test_warm(self):
+        meta = {"ttft_ms": 420.0, "gap_p50_ms": 31.0, "gap_p95_ms": 58.0, "load_duration": 1000}
+        assert format_timing(meta) == "TTFT 0.42s | gaps 31/58ms"
+
+    def test_cold_load_called_out(self):
+        meta = {"ttft_ms": 2500.0, "gap_p50_ms": None, "load_duration": 2_100_000_000}
+        assert format_timing(meta) == "TTFT 2.50s | cold load 2.1s"
+
+    def test_no_timings(self):
+        assert format_timing({"eval_count": 3}) == ""
+
+
+class TestLatencyStats:
+    def test_aggregates(self):
+        stats = LatencyStats()
+        stats.add({"ttft_ms": 100.0, "gap_p50_ms": 20.0, "gap_p95_ms": 40.0})
+        stats.add(
+            {
+                "ttft_ms": 3000.0,
+                "gap_p50_ms": 22.0,
+                "gap_p95_ms": 50.0,
+                "load_duration": 2_000_000_000,
+                "prompt_eval_duration": 100_000_000,
+            }
+        )
+        stats.add(None)
+        summary = stats.as_dict()
+        assert summary["responses"] == 2
+        assert summary["ttft_p95_ms"] == 3000.0
+        assert summary["cold_loads"] == 1
+        assert summary["load_s"] == 2.0
+        assert "1 cold loads" in stats.display()
+
+    def test_empty_is_falsy(self):
+        assert not LatencyStats()
@@ -0,0 +1,33 @@
+"""Tests for the local token estimator."""
+
+from locollm.tokens import MESSAGE_OVERHEAD, estimate_tokens, message_tokens
+
+
+class TestEstimateTokens:
+    def test_empty(self):
+        assert estimate_tokens("") == 0
+
+    def test_digits_count_individually(self):
+        assert estimate_tokens("340") == 3
+
+    def test_short_words_one_token_each(self):
+        assert estimate_tokens("what is the sum") == 4
+
+    def test_long_words_cost_more(self):
+        assert estimate_tokens("internationalization") > estimate_tokens("nation")
+
+    def test_question(self):
+        # What / is / 1 5 / % / of / 3 4 0 / ?
+        assert estimate_tokens("What is 15% of 340?") == 10
+
+    def test_non_ascii_letters_one_each(self):
+        assert estimate_tokens("你好世界") == 4
+
+    def test_newlines_count(self):
+        assert estimate_tokens("a\nb") > estimate_tokens("a b")
+
+
+class TestMessageTokens:
+    def test_includes_template_overhead(self):
+        message = {"role": "user", "content": "hello"}
+        assert message_tokens(message) == 1 + MESSAGE_OVERHEAD